@@ -0,0 +1,93 @@
+import threading
+
+
+class AttendanceWriteBuffer:
+    """
+    Bộ đệm ghi sau (write-behind) cho thao tác điểm danh.
+    Giao diện cập nhật ngay, còn các thay đổi được gom lại theo (student_id, ngày)
+    (nhấn nhiều lần chỉ giữ trạng thái cuối) và ghi xuống CSDL theo lô bằng flush().
+    flush() có thể được gọi từ thread nền; các lần flush được thực hiện lần lượt
+    để thay đổi mới hơn không bị ghi đè bởi một lô cũ hơn.
+    Sau các lần flush lỗi liên tiếp, retry_delay() cho thời gian chờ tăng dần trước lần thử lại.
+    """
+
+    RETRY_MAX_MS = 60000 # Thời gian chờ tối đa giữa hai lần thử lại
+
+    def __init__(self, db):
+        self.db = db
+        self._pending = {} # (student_id, attendance_date) -> status
+        self._inflight = {} # Lô đang được ghi (vẫn coi là "đang chờ" khi hiển thị)
+        self._failed = set() # Các khóa ghi thất bại ở lần flush gần nhất
+        self._failures = 0 # Số lần flush lỗi liên tiếp
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def put(self, student_id, attendance_date, status):
+        with self._lock:
+            key = (student_id, attendance_date)
+            self._pending[key] = status
+            self._failed.discard(key)
+
+    def has_pending(self):
+        with self._lock:
+            return bool(self._pending or self._inflight)
+
+    def is_pending(self, student_id, attendance_date):
+        with self._lock:
+            key = (student_id, attendance_date)
+            return key in self._pending or key in self._inflight
+
+    def is_failed(self, student_id, attendance_date):
+        with self._lock:
+            return (student_id, attendance_date) in self._failed
+
+    def status_of(self, student_id, attendance_date):
+        """Trạng thái đang chờ ghi (None nếu không có)."""
+        with self._lock:
+            key = (student_id, attendance_date)
+            return self._pending.get(key, self._inflight.get(key))
+
+    def retry_delay(self, base_ms):
+        """Thời gian chờ (ms) trước lần flush tiếp theo: gấp đôi sau mỗi lần lỗi liên tiếp, tối đa RETRY_MAX_MS."""
+        with self._lock:
+            return min(self.RETRY_MAX_MS, base_ms * 2 ** self._failures)
+
+    def discard(self):
+        """Bỏ các thay đổi đang chờ (vd: người dùng chọn bỏ qua khi đóng ứng dụng lúc CSDL lỗi)."""
+        with self._lock:
+            self._pending.clear()
+            self._failed.clear()
+
+    def flush(self):
+        """
+        Ghi toàn bộ thay đổi đang chờ bằng một lệnh upsert nhiều dòng.
+        Trả về (success, message, saved_keys, failed_keys).
+        Nếu lỗi, các thay đổi được giữ lại để thử lại ở lần flush sau
+        (trừ khi đã có giá trị mới hơn được put trong lúc đang ghi).
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return True, "Không có thay đổi.", set(), set()
+
+            entries = [(student_id, attendance_date, status) for (student_id, attendance_date), status in batch.items()]
+            try:
+                success, message = self.db.mark_attendance_bulk(entries)
+            except Exception as e:
+                success, message = False, f"Lỗi khi lưu điểm danh: {e}"
+            return self._finish(batch, success, message)
+
+    def _finish(self, batch, success, message):
+        with self._lock:
+            self._inflight = {}
+            if success:
+                self._failed -= batch.keys()
+                self._failures = 0
+                return True, message, set(batch), set()
+            for key, status in batch.items():
+                self._pending.setdefault(key, status)
+            self._failed |= batch.keys()
+            self._failures += 1
+            return False, message, set(), set(batch)
@@ -0,0 +1,9 @@
+"""
+Các script đo hiệu năng (benchmark) cho DatabaseConnector và các view.
+
+Chạy từ thư mục gốc của dự án, ví dụ:
+    python -m benchmarks.bench_dashboard_stats --database hostel_bench
+
+Lưu ý: benchmark sẽ XÓA và tạo lại dữ liệu trong CSDL được chỉ định,
+vì vậy hãy dùng một CSDL riêng (mặc định: hostel_bench), không dùng hostel_v2.
+"""
@@ -0,0 +1,91 @@
+"""
+So sánh độ trễ mỗi lời gọi DatabaseConnector giữa MySQL (qua socket / TCP) và SQLite
+(backend='sqlite', trong tiến trình) trên cùng một bộ dữ liệu (seed_data, cùng seed và ngày mốc).
+
+Các lời gọi tra cứu ngắn (khóa chính, trang đầu, Dashboard) là nơi chi phí mỗi lượt gửi
+chiếm phần lớn: trên SQLite chúng chỉ còn vài chục micro giây.
+
+    python -m benchmarks.bench_backends --students 20000
+    python -m benchmarks.bench_backends --backends sqlite --sqlite-path hostel_bench.db
+"""
+from datetime import date
+
+from benchmarks.common import make_parser, connect, per_call_us
+from database import DatabaseConnector
+from seed_data import seed_database
+
+ANCHOR = date(2025, 1, 31) # Ngày mốc cố định: hai backend nhận đúng cùng dữ liệu
+
+
+def build_cases(db):
+    """(tên, hàm không tham số) cho các lời gọi được đo; khóa tra cứu lấy từ dữ liệu đã tạo."""
+    student = next(s for s in db.get_students_page(limit=100) if s['room_no'])
+    student_id, room_no = student['student_id'], student['room_no']
+    day = ANCHOR.isoformat()
+    flip = {'status': 'Present'}
+
+    def mark_attendance():
+        # Đổi trạng thái qua lại: mỗi lời gọi là một lệnh ghi thật (upsert + bảng tổng hợp + commit)
+        flip['status'] = 'Absent' if flip['status'] == 'Present' else 'Present'
+        db.mark_attendance(student_id, day, flip['status'])
+
+    return [
+        ('get_room_by_no', lambda: db.get_room_by_no(room_no)),
+        ('get_student_by_id', lambda: db.get_student_by_id(student_id)),
+        ('get_student_count', db.get_student_count),
+        ('get_dashboard_stats', db.get_dashboard_stats),
+        ('get_students_page(50)', lambda: db.get_students_page(limit=50)),
+        ('get_payments_page(50)', lambda: db.get_payments_page(limit=50)),
+        ('get_attendance_page(50)', lambda: db.get_attendance_page(day, limit=50)),
+        ('get_due_summary(1 student)', lambda: db.get_due_summary(student_ids=[student_id])),
+        ('search_students(prefix)', lambda: db.search_students(student_id[:-2], limit=20)),
+        ('mark_attendance', mark_attendance),
+    ]
+
+
+def run_backend(args, backend):
+    if backend == 'sqlite':
+        db = DatabaseConnector(database=args.sqlite_path, backend='sqlite')
+        if not db.is_connected():
+            raise SystemExit(f"Không thể mở {args.sqlite_path}.")
+    else:
+        db = connect(args)
+    try:
+        if not args.skip_seed:
+            print(f"[{backend}] Đang tạo dữ liệu: {args.students} sinh viên, {args.attendance_days} ngày điểm danh...")
+            result = seed_database(db, args.students, attendance_days=args.attendance_days, anchor=ANCHOR)
+            print(f"[{backend}] Xong trong {result['seconds']:.1f}s")
+        db.query_stats.disable()
+        db.reference_cache.invalidate()
+        return {name: per_call_us(fn, args.calls, args.repeat) for name, fn in build_cases(db)}
+    finally:
+        db.close()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--attendance-days", type=int, default=30)
+    parser.add_argument("--calls", type=int, default=200, help="Số lời gọi mỗi lần đo")
+    parser.add_argument("--backends", default="mysql,sqlite", help="Danh sách backend, cách nhau bởi dấu phẩy")
+    parser.add_argument("--sqlite-path", default="hostel_bench.db", help="File SQLite (dữ liệu sẽ bị xóa!)")
+    parser.set_defaults(repeat=5)
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    results = {backend: run_backend(args, backend) for backend in backends}
+
+    header = f"{'lời gọi':<28}" + "".join(f"{backend + ' (us)':>16}" for backend in backends)
+    if len(backends) == 2:
+        header += f"{'tỷ lệ':>10}"
+    print(header)
+    for name in results[backends[0]]:
+        values = [results[backend][name] for backend in backends]
+        line = f"{name:<28}" + "".join(f"{us:16.1f}" for us in values)
+        if len(backends) == 2:
+            line += f"{values[0] / values[1]:9.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+So sánh get_dashboard_stats: 10 truy vấn COUNT / SUM riêng lẻ trên các bảng gốc (cách cũ)
+và đọc các bảng tổng hợp hostel_stats / hostel_stats_monthly / hostel_stats_daily (cách hiện tại).
+
+Mặc định: 10.000 phòng và 5 triệu thanh toán. seed_data chỉ sinh tối đa một thanh toán mỗi tháng
+cho sinh viên đang ở (vài trăm nghìn dòng với 10.000 phòng), nên phần còn thiếu được thêm bằng cách
+nhân bản các thanh toán đã tạo (pad_payments). Số dòng thực tế được in ra trước khi đo.
+
+    python -m benchmarks.bench_dashboard_stats
+    python -m benchmarks.bench_dashboard_stats --rooms 10000 --payments 5000000
+    python -m benchmarks.bench_dashboard_stats --skip-seed
+"""
+from datetime import date
+
+from benchmarks.common import make_parser, connect, time_call, print_result
+from seed_data import seed_database
+
+
+def legacy_dashboard_stats(db):
+    """Cách cũ: mỗi chỉ số là một truy vấn (10 round trip)."""
+    queries = [
+        ("SELECT COUNT(*) FROM students", ()),
+        ("SELECT COUNT(*) FROM users WHERE role = 'staff'", ()),
+        ("SELECT COUNT(*) FROM rooms", ()),
+        ("SELECT COUNT(*) FROM rooms WHERE occupied > 0", ()),
+        ("SELECT COUNT(*) FROM rooms WHERE status = 'Available'", ()),
+        ("SELECT COUNT(*) FROM rooms WHERE status = 'Full'", ()),
+        ("SELECT SUM(amount) FROM payments", ()),
+        ("SELECT SUM(amount) FROM payments WHERE YEAR(payment_date) = YEAR(CURDATE()) AND MONTH(payment_date) = MONTH(CURDATE())", ()),
+        ("SELECT COUNT(*) FROM attendance WHERE attendance_date = %s AND status = 'Present'", (date.today().isoformat(),)),
+        ("SELECT COUNT(*) FROM attendance WHERE attendance_date = %s AND status = 'Absent'", (date.today().isoformat(),)),
+    ]
+    conn = db._connect()
+    cursor = conn.cursor()
+
+    def run():
+        for query, params in queries:
+            cursor.execute(query, params)
+            cursor.fetchone()
+    return run, conn
+
+
+def pad_payments(db, target):
+    """Nhân bản các thanh toán đã có (INSERT ... SELECT) tới khi bảng payments có 'target' dòng."""
+    count = db.get_payment_count()
+    conn = db._connect()
+    cursor = conn.cursor()
+    try:
+        while 0 < count < target:
+            batch = min(count, target - count)
+            cursor.execute("INSERT INTO payments (student_id, amount, payment_date, method) "
+                           "SELECT student_id, amount, payment_date, method FROM payments "
+                           "ORDER BY payment_id LIMIT %s", (batch,))
+            conn.commit()
+            count += batch
+    finally:
+        cursor.close()
+        conn.close()
+    db.rebuild_stats()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--students", type=int, default=30000, help="Mặc định: vừa đủ lấp 10.000 phòng")
+    parser.add_argument("--payment-months", type=int, default=24)
+    parser.add_argument("--payments", type=int, default=5000000, help="Số dòng payments sau khi tạo dữ liệu")
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên, {args.rooms} phòng, {args.payments} thanh toán...")
+        seed_database(db, args.students, args.rooms, attendance_days=1, payment_months=args.payment_months)
+        pad_payments(db, args.payments)
+    stats = db.get_dashboard_stats()
+    print(f"Dữ liệu: {stats['total_students']:,} sinh viên, {stats['total_rooms']:,} phòng, "
+          f"{db.get_payment_count():,} thanh toán")
+
+    legacy, legacy_conn = legacy_dashboard_stats(db)
+    print_result("legacy (10 queries)", time_call(legacy, args.repeat))
+    print_result("get_dashboard_stats", time_call(db.get_dashboard_stats, args.repeat))
+    legacy_conn.close()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
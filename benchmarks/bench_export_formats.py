@@ -0,0 +1,58 @@
+"""
+So sánh thời gian xuất và kích thước file theo định dạng (xlsx, csv, csv.gz, parquet,
+feather) cho báo cáo thanh toán và điểm danh (đều đọc theo luồng qua report_export).
+
+    python -m benchmarks.bench_export_formats --students 50000 --payment-months 20 --attendance-days 30
+    python -m benchmarks.bench_export_formats --skip-seed --format .parquet --format .csv.gz
+"""
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import report_export
+from benchmarks.common import make_parser, connect
+from seed_data import seed_database
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--payment-months", type=int, default=20)
+    parser.add_argument("--attendance-days", type=int, default=30)
+    parser.add_argument("--format", action="append", choices=list(report_export.WRITERS),
+                        help="Định dạng cần đo (mặc định: tất cả)")
+    parser.set_defaults(repeat=1)
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên, "
+              f"{args.payment_months} tháng thanh toán, {args.attendance_days} ngày điểm danh...")
+        seed_database(db, args.students, args.rooms, args.attendance_days, args.payment_months)
+
+    end = date.today()
+    start = end - timedelta(days=args.attendance_days)
+    reports = [('payments', ()), ('attendance', (start.isoformat(), end.isoformat()))]
+    formats = args.format or [".xlsx", ".csv", ".csv.gz", ".parquet", ".feather"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for report, params in reports:
+            for extension in formats:
+                path = os.path.join(tmp, report + extension)
+                best = None
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    rows = report_export.export_report(db, report, path, params)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                size = os.path.getsize(path)
+                print(f"{report:<11} {extension:<9} {rows:>10,} rows | {best:8.2f} s | "
+                      f"{rows / best if best else 0:>10,.0f} rows/s | {size / 1e6:8.1f} MB")
+                os.remove(path)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
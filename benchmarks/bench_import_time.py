@@ -0,0 +1,76 @@
+"""
+Đo thời gian import lúc khởi động bằng `python -X importtime` (mỗi lần chạy là một
+tiến trình mới, nên đo được "cold start" của trình thông dịch).
+
+Với mỗi module: thời gian import tổng (median), các module con tốn nhiều nhất,
+và kiểm tra các thư viện nặng (pandas, openpyxl, ...) KHÔNG được nạp khi mở cửa sổ
+đăng nhập. Thoát với mã 1 nếu có thư viện nặng bị nạp sớm.
+
+Không cần CSDL.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --module main_app_view --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Các thư viện chỉ nên được nạp khi thật sự dùng (xuất/nhập báo cáo, pop-up chọn ngày)
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow", "tkcalendar")
+
+
+def import_profile(module):
+    """Chạy `import module` trong tiến trình mới. Trả về (tổng µs, {module: cumulative µs})."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Không import được '{module}':\n{result.stderr}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative.get(module, 0), cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="Module cần đo (mặc định: main, main_app_view)")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần chạy cho mỗi module")
+    parser.add_argument("--top", type=int, default=10, help="Số module con tốn nhiều nhất được in ra")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or ["main", "main_app_view"]:
+        totals, profile = [], {}
+        for _ in range(args.repeat):
+            total, profile = import_profile(module)
+            totals.append(total)
+
+        print(f"\nimport {module}: median {statistics.median(totals) / 1000:.1f} ms "
+              f"(min {min(totals) / 1000:.1f} ms, {args.repeat} lần)")
+        top = sorted(((us, name) for name, us in profile.items() if name != module and "." not in name), reverse=True)
+        for us, name in top[:args.top]:
+            print(f"    {name:<30} {us / 1000:8.1f} ms")
+
+        heavy = [name for name in HEAVY_MODULES if name in profile]
+        if heavy:
+            failed = True
+            print(f"  !! thư viện nặng bị nạp khi import {module}: {', '.join(heavy)}")
+        else:
+            print(f"  OK: không nạp {', '.join(HEAVY_MODULES)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Đo chi phí của lớp đo đạc truy vấn (query_stats) trên mỗi lời gọi DatabaseConnector:
+
+    bare     : hàm gốc, không qua @_with_connection
+    checkout : hàm gốc trong db._checkout() (như @_with_connection trước khi có đo đạc)
+    disabled : qua @_with_connection, đo đạc tắt (mặc định)
+    enabled  : đo đạc bật (histogram, đếm lượt gửi / số dòng, kiểm tra slow-query)
+
+--offline dùng kết nối giả trong bộ nhớ (không cần MySQL) để tách riêng chi phí Python
+của lớp bọc; khi có CSDL, phép đo chạy get_room_by_no thật trên CSDL benchmark.
+
+    python -m benchmarks.bench_instrumentation --offline
+    python -m benchmarks.bench_instrumentation --students 5000
+"""
+import json
+
+from benchmarks.common import make_parser, connect, per_call_us
+from database import DatabaseConnector
+from seed_data import seed_database
+
+ROOM = {'room_no': 'R000001', 'room_type': 'Single', 'capacity': 2, 'occupied': 1, 'rent': 3000, 'status': 'Available'}
+
+
+class MemoryCursor:
+    """Cursor giả: mọi SELECT trả về một dòng phòng."""
+    rowcount = 1
+    lastrowid = None
+
+    def execute(self, operation, params=None):
+        pass
+
+    def fetchone(self):
+        return ROOM
+
+    def fetchall(self):
+        return [ROOM]
+
+    def close(self):
+        pass
+
+
+class MemoryConnection:
+    in_transaction = False
+
+    def cursor(self, **kwargs):
+        return MemoryCursor()
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class OfflineConnector(DatabaseConnector):
+    def _connect(self):
+        return MemoryConnection()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=None, help="Số lời gọi mỗi lần đo")
+    parser.add_argument("--offline", action="store_true", help="Dùng kết nối giả, không cần CSDL")
+    parser.set_defaults(repeat=7)
+    args = parser.parse_args()
+
+    if args.offline:
+        db = OfflineConnector()
+        calls = args.calls or 20000
+        room_no = ROOM['room_no']
+    else:
+        db = connect(args)
+        calls = args.calls or 2000
+        if not args.skip_seed:
+            print(f"Đang tạo dữ liệu: {args.students} sinh viên...")
+            seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=0)
+        room_no = db.get_all_rooms()[0]['room_no']
+
+    bare = DatabaseConnector.get_room_by_no.__wrapped__
+
+    def checkout():
+        with db._checkout():
+            return bare(db, room_no)
+
+    db.query_stats.disable()
+    results = {
+        'bare': per_call_us(lambda: bare(db, room_no), calls, args.repeat),
+        'checkout': per_call_us(checkout, calls, args.repeat),
+        'disabled': per_call_us(lambda: db.get_room_by_no(room_no), calls, args.repeat),
+    }
+    db.query_stats.enable()
+    db.query_stats.reset()
+    results['enabled'] = per_call_us(lambda: db.get_room_by_no(room_no), calls, args.repeat)
+
+    for label, us in results.items():
+        print(f"get_room_by_no {label:<10} {us:9.2f} us/call  (+{us - results['checkout']:6.2f} us so với checkout)")
+    print(json.dumps(db.query_metrics()['methods']['get_room_by_no'], indent=2))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+So sánh mark_all_present: cách cũ (kéo student_id về Python + REPLACE INTO executemany)
+và cách mới (một lệnh INSERT ... SELECT ... ON DUPLICATE KEY UPDATE).
+
+    python -m benchmarks.bench_mark_all_present --students 50000
+"""
+from datetime import date, timedelta
+
+from benchmarks.common import make_parser, connect, time_call, print_result
+from seed_data import seed_database
+
+
+def legacy_mark_all_present(db, attendance_date):
+    conn = db._connect()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT student_id FROM students")
+    students = cursor.fetchall()
+    cursor.executemany(
+        "REPLACE INTO attendance (student_id, attendance_date, status) VALUES (%s, %s, %s)",
+        [(s['student_id'], attendance_date, 'Present') for s in students]
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=50000)
+    args = parser.parse_args()
+    args.repeat = min(args.repeat, 5)
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên...")
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=0)
+
+    # Lần chạy đầu chèn dòng mới; các lần sau đi qua nhánh "đã tồn tại" (REPLACE xóa-rồi-chèn / UPDATE)
+    old_day = (date.today() - timedelta(days=1)).isoformat()
+    new_day = (date.today() - timedelta(days=2)).isoformat()
+    print_result("legacy REPLACE INTO executemany", time_call(lambda: legacy_mark_all_present(db, old_day), args.repeat))
+    print_result("mark_all_present (INSERT ... SELECT)", time_call(lambda: db.mark_all_present(new_day), args.repeat))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Đo thời gian đọc dữ liệu tham chiếu mà các pop-up cần khi mở (phòng còn trống,
+danh sách tên sinh viên, loại phòng, danh sách phòng):
+
+    cold : bộ đệm bị xóa trước mỗi lần đọc (như trước khi có reference_cache)
+    warm : đọc lại khi bộ đệm còn hiệu lực (chỉ kiểm tra data_versions mỗi VERSION_CHECK_INTERVAL giây)
+
+    python -m benchmarks.bench_reference_cache --students 500000
+"""
+from benchmarks.common import make_parser, connect, time_call, print_result
+from seed_data import seed_database
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=500000)
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên...")
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=0)
+
+    reads = [
+        ("get_available_rooms", db.get_available_rooms),
+        ("get_student_list_for_payments", db.get_student_list_for_payments),
+        ("get_room_types", db.get_room_types),
+        ("get_all_rooms", db.get_all_rooms),
+    ]
+    for label, read in reads:
+        def cold():
+            db.reference_cache.invalidate()
+            read()
+        print_result(f"{label} cold", time_call(cold, max(3, args.repeat // 4)))
+        print_result(f"{label} warm", time_call(read, args.repeat))
+    print(f"cache hits {db.reference_cache.hits}, misses {db.reference_cache.misses}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+So sánh xuất báo cáo Excel: cách cũ (fetchall -> pandas.DataFrame -> to_excel)
+và cách mới (cursor không đệm -> workbook write_only, report_export.export_report).
+
+Mỗi cách chạy trong một tiến trình riêng để đo được bộ nhớ đỉnh (peak RSS, Linux/macOS).
+
+    python -m benchmarks.bench_report_export --students 50000 --payment-months 40
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_parser, connect
+from seed_data import seed_database
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def legacy_export(db, report, path, params):
+    import pandas as pd
+    data = db.get_all_payments() if report == 'payments' else db.get_attendance_report(*params)
+    pd.DataFrame(data).to_excel(path, index=False, engine='openpyxl')
+    return len(data)
+
+
+def streaming_export(db, report, path, params):
+    import report_export
+    return report_export.export_report(db, report, path, params)
+
+
+def _worker(args, method, report, params, path, results):
+    db = connect(args)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    rows = method(db, report, path, params)
+    results.put((rows, time.perf_counter() - start, baseline, peak_rss_mb(), os.path.getsize(path)))
+    db.close()
+
+
+def run(args, method, report, params):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_worker, args=(args, method, report, params, os.path.join(tmp, "report.xlsx"), results)
+        )
+        process.start()
+        outcome = results.get()
+        process.join()
+    return outcome
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--payment-months", type=int, default=40)
+    parser.add_argument("--attendance-days", type=int, default=30)
+    parser.add_argument("--skip-legacy", action="store_true", help="Bỏ qua cách cũ (có thể hết bộ nhớ với dữ liệu lớn)")
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên, "
+              f"{args.payment_months} tháng thanh toán, {args.attendance_days} ngày điểm danh...")
+        seed_database(db, args.students, args.rooms, args.attendance_days, args.payment_months)
+    db.close()
+
+    end = date.today()
+    start = end - timedelta(days=args.attendance_days)
+    reports = [('payments', ()), ('attendance', (start.isoformat(), end.isoformat()))]
+
+    methods = [("streaming", streaming_export)]
+    if not args.skip_legacy:
+        methods.insert(0, ("legacy", legacy_export))
+
+    for report, params in reports:
+        for label, method in methods:
+            rows, seconds, baseline, peak, size = run(args, method, report, params)
+            memory = f"peak RSS {peak:8.1f} MB (+{peak - baseline:7.1f})" if peak is not None else "peak RSS n/a"
+            print(f"{report:<11} {label:<10} {rows:>10,} rows | {seconds:8.2f} s | {memory} | {size / 1e6:8.1f} MB file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Đo xếp phòng hàng loạt (room_allocation / DatabaseConnector.allocate_rooms).
+
+    compute : chỉ thuật toán (dữ liệu giả trong bộ nhớ, không cần CSDL)
+    database: allocate_rooms trên CSDL benchmark, gồm khóa phòng / sinh viên và ghi trong một giao dịch
+              (trước mỗi lần đo, mọi sinh viên được đưa về trạng thái chưa có phòng)
+
+    python -m benchmarks.bench_room_allocation --compute-only
+    python -m benchmarks.bench_room_allocation --rooms 3000 --students 10000
+"""
+import random
+
+from benchmarks.common import make_parser, connect, time_call, print_result
+from room_allocation import allocate
+from seed_data import seed_database
+
+ROOM_TYPES = ("Single", "Double", "Dorm")
+
+
+def synthetic(rooms, students, seed=42):
+    """Phòng đã có sẵn một phần người ở và sinh viên với các điều kiện ngẫu nhiên (có tính quyết định)."""
+    rng = random.Random(seed)
+    room_rows = []
+    for n in range(rooms):
+        capacity = rng.randint(2, 6)
+        occupied = rng.randint(0, capacity // 2)
+        room_rows.append({
+            'room_no': f"R{n:06d}", 'room_type': ROOM_TYPES[n % 3], 'capacity': capacity,
+            'occupied': occupied, 'rent': 3000 + (n % 5) * 500, 'status': 'Available',
+            'gender': rng.choice(("Male", "Female")) if occupied else None,
+        })
+    student_rows = [{
+        'student_id': f"S{n:08d}", 'gender': rng.choice(("Male", "Female")),
+        'room_type': rng.choice(ROOM_TYPES + (None,)), 'max_rent': rng.choice((None, 4000, 5000)),
+    } for n in range(students)]
+    return room_rows, student_rows
+
+
+def reset_assignments(db):
+    """Đưa mọi sinh viên về trạng thái chưa có phòng (ghi thẳng, không qua DatabaseConnector)."""
+    conn = db._connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE students SET room_no = NULL")
+        cursor.execute("UPDATE rooms SET occupied = 0, status = CASE WHEN status = 'Maintenance' THEN status ELSE 'Available' END")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=3000)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--compute-only", action="store_true", help="Chỉ đo thuật toán, không cần CSDL")
+    parser.set_defaults(repeat=5)
+    args = parser.parse_args()
+
+    rooms, students = synthetic(args.rooms, args.students)
+    placements, unplaced = allocate(rooms, students)
+    print(f"compute: {len(placements)} placed, {len(unplaced)} unplaced")
+    print_result(f"compute {args.students} -> {args.rooms} rooms", time_call(lambda: allocate(rooms, students), args.repeat))
+    if args.compute_only:
+        return
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.rooms} phòng, {args.students} sinh viên...")
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=0)
+
+    results = []
+    samples = time_call(lambda: results.append(db.allocate_rooms()), args.repeat, warmup=0,
+                        setup=lambda: reset_assignments(db))
+    placements, unplaced = results[-1]
+    print(f"database: {len(placements)} placed, {len(unplaced)} unplaced")
+    print_result(f"allocate_rooms {args.students} -> {args.rooms} rooms", samples)
+    db.rebuild_stats()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
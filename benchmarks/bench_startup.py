@@ -0,0 +1,54 @@
+"""
+Đo thời gian từ lúc đăng nhập đến khi MainAppView hiển thị: tạo tất cả view ngay
+(cách cũ, lazy=False) so với chỉ tạo Dashboard và tạo các view khác khi mở (lazy=True).
+
+    first paint : tạo cửa sổ + vẽ lần đầu
+    data ready  : cho đến khi mọi truy vấn nền đã gửi lúc khởi động đều xong
+
+Cần màn hình (DISPLAY) vì phải tạo cửa sổ Tk thật.
+
+    python -m benchmarks.bench_startup --students 50000 --payment-months 20
+"""
+import time
+
+from benchmarks.common import make_parser, connect, time_call, print_result
+from db_executor import DEFAULT_WORKERS
+from main_app_view import MainAppView
+from seed_data import seed_database
+
+USER = {'id': 1, 'username': 'bench', 'role': 'admin'}
+
+
+def open_window(db, lazy, wait_for_data):
+    def run():
+        app = MainAppView(db, USER, lazy=lazy, prefetch=False)
+        app.update()
+        if wait_for_data:
+            while app.executor._outstanding:
+                app.update()
+                time.sleep(0.001)
+        app.destroy()
+    return run
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--payment-months", type=int, default=20)
+    parser.set_defaults(repeat=5)
+    args = parser.parse_args()
+
+    db = connect(args, pool_size=DEFAULT_WORKERS + 1)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên, {args.payment_months} tháng thanh toán...")
+        seed_database(db, args.students, args.rooms, attendance_days=1, payment_months=args.payment_months)
+
+    for wait_for_data, stage in ((False, "first paint"), (True, "data ready")):
+        for lazy, mode in ((False, "eager (all 7 views)"), (True, "lazy (dashboard only)")):
+            print_result(f"{stage}: {mode}", time_call(open_window(db, lazy, wait_for_data), args.repeat))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Đo thời gian nhập một đợt sinh viên từ file CSV (mặc định 20k dòng).
+
+    python -m benchmarks.bench_student_import --intake 20000
+"""
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.common import make_parser, connect
+from seed_data import HostelData, seed_database
+import student_import
+
+
+def write_intake_csv(path, intake, rooms, offset):
+    room_no = HostelData(0, rooms).room_no # Cùng cách đặt mã phòng với seed_data
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(student_import.COLUMNS)
+        for i in range(intake):
+            n = offset + i
+            writer.writerow((f"N{n:08d}", f"New Student {n}", "Female" if n % 2 else "Male", 18 + n % 6,
+                             f"new{n}@example.com", f"08{n:08d}", "2025-09-01", room_no(n % rooms)))
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=5000)
+    parser.add_argument("--intake", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = connect(args)
+    # Phòng trống (không có sinh viên) để đợt nhập vừa đủ chỗ
+    seed_database(db, 0, args.rooms, attendance_days=0, payment_months=0)
+    conn = db._connect()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE rooms SET capacity = %s, status = 'Available'", (-(-args.intake // args.rooms),))
+    conn.commit()
+    conn.close()
+    db.rebuild_stats()
+
+    path = os.path.join(tempfile.mkdtemp(), "intake.csv")
+    write_intake_csv(path, args.intake, args.rooms, offset=0)
+
+    start = time.perf_counter()
+    result = student_import.import_students(db, path, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Nhập {result['imported']} sinh viên ({len(result['rejected'])} bị loại) trong {elapsed:.2f} s "
+          f"({result['imported'] / elapsed:,.0f} dòng/giây)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
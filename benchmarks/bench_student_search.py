@@ -0,0 +1,37 @@
+"""
+Đo thời gian tìm kiếm sinh viên (search-as-you-type) trên dữ liệu lớn.
+
+    python -m benchmarks.bench_student_search --students 500000
+"""
+from benchmarks.common import make_parser, connect, time_call, print_result
+from seed_data import seed_database
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=500000)
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên...")
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=0)
+
+    # Mô phỏng người dùng gõ dần từng ký tự (mã S00000000..., tên kiểu "Nguyễn Văn An", xem seed_data)
+    for term in ("S", "S00", "S0012", "Ngu", "Văn Hù", "12345"):
+        print_result(f"search_students({term!r})", time_call(lambda: db.search_students(term), args.repeat))
+
+    def legacy_like(term):
+        conn = db._connect()
+        cursor = conn.cursor()
+        like_term = f"%{term}%"
+        cursor.execute("SELECT * FROM students WHERE name LIKE %s OR student_id LIKE %s ORDER BY student_id", (like_term, like_term))
+        cursor.fetchall()
+        conn.close()
+    print_result("legacy LIKE '%12345%'", time_call(lambda: legacy_like("12345"), max(3, args.repeat // 5)))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
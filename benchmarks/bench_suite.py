@@ -0,0 +1,426 @@
+"""
+Bộ benchmark tổng hợp: tạo dữ liệu giả lập có tính quyết định theo từng cỡ, đo mọi hàm
+của DatabaseConnector và đường tải dữ liệu của các view (VirtualTreeview / pop-up),
+rồi ghi kết quả ra JSON để phát hiện hồi quy giữa các commit.
+
+    small  : 1k sinh viên
+    medium : 100k sinh viên
+    large  : 1M sinh viên, 10M dòng điểm danh
+
+    python -m benchmarks.bench_suite --size small
+    python -m benchmarks.bench_suite --size small --size medium --output base.json
+    python -m benchmarks.bench_suite --skip-seed --compare base.json   (mã thoát 1 nếu có hồi quy)
+    python -m benchmarks.bench_suite --case "^view:" --case get_due_summary
+
+Mỗi kết quả gồm thời gian (min / median / p95 / max, đo khi tắt query_stats) và số lượt
+gửi / số dòng đọc về của một lần chạy riêng có bật query_stats. Số lượt gửi không phụ
+thuộc máy đo nên phát hiện được hồi quy kiểu N+1 ngay cả khi thời gian bị nhiễu.
+
+Các bản ghi tạm của phép đo ghi (phòng / sinh viên / nhân viên tiền tố BENCH) được tạo
+lại ở đầu mỗi cỡ dữ liệu; bảng tổng hợp hostel_stats được tính lại ở cuối.
+"""
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import make_parser, connect, time_call, print_result
+from database import DatabaseConnector
+from seed_data import HostelData, seed_database
+from virtual_grid import ListSource, QuerySource, VirtualTreeview
+
+# Tham số của seed_data.seed_database (số phòng: theo số sinh viên) + số lần lặp
+SIZES = {
+    'small': {'students': 1_000, 'payment_months': 24, 'attendance_days': 30, 'repeat': 20},
+    'medium': {'students': 100_000, 'payment_months': 24, 'attendance_days': 30, 'repeat': 7},
+    'large': {'students': 1_000_000, 'payment_months': 5, 'attendance_days': 10, 'repeat': 3},
+}
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+FORMAT_VERSION = 1
+
+BENCH_ROOM = "BENCH0" # Phòng lớn nhận sinh viên của các phép đo ghi
+BENCH_STUDENT = "BENCHS0"
+BENCH_USER, BENCH_PASSWORD = "bench_user", "bench-password"
+BULK_PREFIX, UNASSIGNED_PREFIX = "BENCHB", "BENCHU"
+BATCH = 200 # Số dòng của các phép đo theo lô (= một trang của VirtualTreeview)
+
+
+def student_data(student_id, room_no=BENCH_ROOM):
+    return {'student_id': student_id, 'name': f"Bench {student_id}", 'gender': 'Male', 'age': 20,
+            'email': f"{student_id.lower()}@bench.example", 'contact': "0900000000",
+            'admission_date': date.today().isoformat(), 'room_no': room_no}
+
+
+# --- Bản ghi tạm cho các phép đo ghi (SQL trực tiếp, không qua DatabaseConnector) ---
+
+def _raw(db, *statements):
+    conn = db._connect()
+    cursor = conn.cursor()
+    try:
+        for statement, params in statements:
+            cursor.execute(statement, params)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _recount(room_filter, params=()):
+    return (f"""UPDATE rooms r SET r.occupied = (SELECT COUNT(*) FROM students s WHERE s.room_no = r.room_no),
+                    r.status = IF(r.status = 'Maintenance', r.status, IF(r.occupied >= r.capacity, 'Full', 'Available'))
+                WHERE {room_filter}""", params)
+
+
+def purge_bulk(db):
+    """Xóa các sinh viên do add_students_bulk tạo (phòng của họ luôn là BENCH_ROOM)."""
+    _raw(db, ("DELETE FROM students WHERE student_id LIKE %s", (BULK_PREFIX + "%",)),
+         _recount("r.room_no = %s", (BENCH_ROOM,)))
+
+
+def unassign(db):
+    """Đưa các sinh viên BENCHU về trạng thái chưa có phòng (trước mỗi lần đo allocate_rooms)."""
+    _raw(db, ("CREATE TEMPORARY TABLE IF NOT EXISTS bench_touched (room_no VARCHAR(20) PRIMARY KEY)", ()),
+         ("DELETE FROM bench_touched", ()),
+         ("INSERT IGNORE INTO bench_touched SELECT room_no FROM students WHERE student_id LIKE %s AND room_no IS NOT NULL",
+          (UNASSIGNED_PREFIX + "%",)),
+         ("UPDATE students SET room_no = NULL WHERE student_id LIKE %s", (UNASSIGNED_PREFIX + "%",)),
+         _recount("r.room_no IN (SELECT room_no FROM bench_touched)"))
+
+
+def prepare_fixtures(db):
+    _raw(db, ("DELETE FROM students WHERE student_id LIKE %s", ("BENCH%",)),
+         ("DELETE FROM rooms WHERE room_no LIKE %s", ("BENCH%",)),
+         ("DELETE FROM users WHERE username LIKE %s", ("bench%",)),
+         ("INSERT INTO rooms (room_no, room_type, capacity, occupied, rent, status) VALUES (%s, 'Dorm', 100000, 0, 3000, 'Available')",
+          (BENCH_ROOM,)))
+    # Sinh viên chưa có phòng cho allocate_rooms
+    _raw(db, *[("INSERT INTO students (student_id, name, gender, age, email, contact, admission_date, room_no) VALUES (%s, %s, %s, 20, %s, '0900000000', CURDATE(), NULL)",
+                (f"{UNASSIGNED_PREFIX}{n:04d}", f"Unassigned {n}", ('Male', 'Female')[n % 2], f"unassigned{n}@bench.example"))
+               for n in range(BATCH)])
+    db.register_user(BENCH_USER, "bench_user@bench.example", BENCH_PASSWORD)
+    db.rebuild_stats()
+    db.reference_cache.invalidate()
+
+
+# --- Các phép đo ---
+
+class Case:
+    """Một phép đo: 'fn' được tính giờ, 'setup' chạy trước mỗi lần (không tính giờ)."""
+
+    def __init__(self, name, fn, setup=None, heavy=False):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.heavy = heavy # Đọc toàn bảng: ít lần lặp hơn ở cỡ lớn
+
+    @property
+    def method(self):
+        return None if self.name.startswith("view:") else self.name.split()[0]
+
+
+def drain_report(db, name, params=()):
+    rows = 0
+    with db.stream_report(name, params) as (columns, chunks):
+        for chunk in chunks:
+            rows += len(chunk)
+    return rows
+
+
+def view_sources(db, today):
+    """Nguồn dữ liệu giống hệt các view đang dùng (xem views/*.py)."""
+    return {
+        'students': QuerySource(db.get_student_count, db.get_students_page,
+                                cursor_of=lambda student: student['student_id']),
+        'payments': QuerySource(db.get_payment_count, db.get_payments_page,
+                                cursor_of=lambda item: (item['payment_date'], item['payment_id'])),
+        'due_summary': QuerySource(db.get_due_count, db.get_due_summary_page,
+                                   cursor_of=lambda item: (item['room_no'], item['name'], item['student_id'])),
+        'attendance': QuerySource(db.get_student_count,
+                                  lambda after, limit, offset: db.get_attendance_page(today, after, limit, offset),
+                                  cursor_of=lambda student: (student['room_no'], student['name'], student['student_id'])),
+    }
+
+
+def build_cases(db, dataset):
+    today = date.today().isoformat()
+    week_ago = (date.today() - timedelta(days=6)).isoformat()
+    data = HostelData(dataset['students']) # Cùng mã sinh viên / mã phòng với seed_database
+    students, rooms, payments = data.student_count, data.room_count, db.get_payment_count()
+    step = max(1, students // BATCH)
+    student_ids = [data.student_id(n) for n in range(0, students, step)][:BATCH]
+    room_nos = [data.room_no(n) for n in range(0, rooms, max(1, rooms // BATCH))][:BATCH]
+    mid_id, mid_room = data.student_id(students // 2), data.room_no(rooms // 2)
+    unassigned = [{'student_id': f"{UNASSIGNED_PREFIX}{n:04d}"} for n in range(BATCH)]
+    bulk = [student_data(f"{BULK_PREFIX}{n:04d}") for n in range(BATCH)]
+    statuses = itertools.cycle(("Absent", "Present"))
+    invalidate = db.reference_cache.invalidate
+    page = VirtualTreeview.PAGE_SIZE
+    sources = view_sources(db, today)
+    state = {}
+
+    def first_page(name):
+        source = sources[name]
+        return source.fetch(0, page) if source.count() else []
+
+    def remember_first_page(name):
+        state[name] = first_page(name)
+
+    def next_page(name):
+        rows = state[name]
+        return sources[name].fetch(page, page, rows[-1] if rows else None)
+
+    def jump(name):
+        source = sources[name]
+        return source.fetch(source.count() // 2, page)
+
+    def find_user(username):
+        return next((user['id'] for user in db.get_all_users() if user['username'] == username), None)
+
+    bench_user_id = find_user(BENCH_USER)
+
+    def prepare_delete_user():
+        db.register_user("bench_tmp", "bench_tmp@bench.example", BENCH_PASSWORD)
+        state['tmp_user'] = find_user("bench_tmp")
+
+    def delete_tmp_user():
+        user_id = find_user("bench_tmp")
+        if user_id is not None:
+            db.delete_user(user_id)
+
+    return [
+        # Dashboard / nhân viên
+        Case("get_dashboard_stats", db.get_dashboard_stats),
+        Case("rebuild_stats", db.rebuild_stats, heavy=True),
+        Case("create_tables", db.create_tables),
+        Case("get_all_users", db.get_all_users),
+        Case("validate_login", lambda: db.validate_login(BENCH_USER, BENCH_PASSWORD)),
+        Case("register_user", lambda: db.register_user("bench_tmp", "bench_tmp@bench.example", BENCH_PASSWORD),
+             setup=delete_tmp_user),
+        Case("delete_user", lambda: db.delete_user(state['tmp_user']), setup=prepare_delete_user),
+        Case("reset_user_password", lambda: db.reset_user_password(bench_user_id, BENCH_PASSWORD)),
+
+        # Phòng (đọc lạnh: xóa reference_cache trước mỗi lần)
+        Case("get_room_types", db.get_room_types, setup=invalidate),
+        Case("get_all_rooms", db.get_all_rooms, setup=invalidate, heavy=True),
+        Case("get_all_rooms filter", lambda: db.get_all_rooms("Single"), setup=invalidate, heavy=True),
+        Case("get_available_rooms", db.get_available_rooms, setup=invalidate, heavy=True),
+        Case("get_room_by_no", lambda: db.get_room_by_no(mid_room)),
+        Case("get_rooms_by_no", lambda: db.get_rooms_by_no(room_nos)),
+        Case("add_room", lambda: db.add_room("BENCH1", "Single", 4, 3000, "Available"),
+             setup=lambda: db.delete_room("BENCH1")),
+        Case("update_room", lambda: db.update_room(BENCH_ROOM, "Dorm", 100000, 3000, "Available")),
+        Case("delete_room", lambda: db.delete_room("BENCH1"),
+             setup=lambda: db.add_room("BENCH1", "Single", 4, 3000, "Available")),
+
+        # Sinh viên
+        Case("get_all_students", db.get_all_students, heavy=True),
+        Case("get_all_students search", lambda: db.get_all_students("Văn Hùng"), heavy=True),
+        Case("get_student_count", db.get_student_count),
+        Case("get_students_page first", lambda: db.get_students_page(None, page, 0)),
+        Case("get_students_page keyset", lambda: db.get_students_page(mid_id, page, 0)),
+        Case("get_students_page offset", lambda: db.get_students_page(None, page, students // 2)),
+        Case("search_students prefix", lambda: db.search_students("Nguyễn Văn")),
+        Case("search_students substring", lambda: db.search_students("udent 1234")),
+        Case("get_student_by_id", lambda: db.get_student_by_id(mid_id)),
+        Case("get_students_by_ids", lambda: db.get_students_by_ids(student_ids)),
+        Case("add_student", lambda: db.add_student(student_data(BENCH_STUDENT)),
+             setup=lambda: db.delete_student(BENCH_STUDENT)),
+        Case("update_student", lambda: db.update_student(BENCH_STUDENT, student_data(BENCH_STUDENT), BENCH_ROOM),
+             setup=lambda: db.get_student_by_id(BENCH_STUDENT) or db.add_student(student_data(BENCH_STUDENT))),
+        Case("delete_student", lambda: db.delete_student(BENCH_STUDENT),
+             setup=lambda: db.add_student(student_data(BENCH_STUDENT))),
+        Case(f"add_students_bulk {BATCH}", lambda: db.add_students_bulk(bulk), setup=lambda: purge_bulk(db)),
+        Case(f"allocate_rooms {BATCH}", lambda: db.allocate_rooms(unassigned), setup=lambda: unassign(db)),
+
+        # Thanh toán
+        Case("get_student_list_for_payments", db.get_student_list_for_payments, setup=invalidate, heavy=True),
+        Case("get_all_payments", db.get_all_payments, heavy=True),
+        Case("get_payment_count", db.get_payment_count),
+        Case("get_payments_page first", lambda: db.get_payments_page(None, page, 0)),
+        Case("get_payments_page offset", lambda: db.get_payments_page(None, page, payments // 2)),
+        Case("get_due_summary", db.get_due_summary, heavy=True),
+        Case("get_due_summary keyed", lambda: db.get_due_summary(student_ids=student_ids)),
+        Case("get_due_count", db.get_due_count),
+        Case("get_due_summary_page first", lambda: db.get_due_summary_page(None, page, 0)),
+        Case("get_due_summary_page offset", lambda: db.get_due_summary_page(None, page, students // 2)),
+        Case("add_payment", lambda: db.add_payment(mid_id, 100, today, "Cash")),
+
+        # Điểm danh
+        Case("get_attendance_for_date", lambda: db.get_attendance_for_date(today), heavy=True),
+        Case("get_attendance_for_students", lambda: db.get_attendance_for_students(today, student_ids)),
+        Case("get_attendance_page first", lambda: db.get_attendance_page(today, None, page, 0)),
+        Case("get_attendance_page offset", lambda: db.get_attendance_page(today, None, page, students // 2)),
+        Case("get_attendance_report week", lambda: db.get_attendance_report(week_ago, today), heavy=True),
+        Case("mark_attendance", lambda: db.mark_attendance(mid_id, today, next(statuses))),
+        Case(f"mark_attendance_bulk {BATCH}", lambda: db.mark_attendance_bulk([(sid, today, "Present") for sid in student_ids])),
+        Case("mark_all_present room", lambda: db.mark_all_present(today, room_no=mid_room)),
+        Case("mark_all_present day", lambda: db.mark_all_present(today), heavy=True),
+
+        # Xuất báo cáo theo luồng
+        Case("stream_report payments", lambda: drain_report(db, 'payments'), heavy=True),
+        Case("stream_report attendance week", lambda: drain_report(db, 'attendance', (week_ago, today)), heavy=True),
+
+        # Đường tải dữ liệu của các view
+        Case("view:dashboard", db.get_dashboard_stats),
+        Case("view:staff", db.get_all_users),
+        Case("view:rooms", lambda: (db.get_room_types(), db.get_all_rooms()), setup=invalidate, heavy=True),
+        Case("view:students first page", lambda: first_page('students')),
+        Case("view:students next page", lambda: next_page('students'), setup=lambda: remember_first_page('students')),
+        Case("view:students jump", lambda: jump('students')),
+        Case("view:students search", lambda: ListSource(loader=lambda: db.search_students("Nguyễn Văn")).count()),
+        Case("view:student popup", lambda: (db.get_available_rooms(), db.get_room_types()), setup=invalidate, heavy=True),
+        Case("view:payments", lambda: (first_page('due_summary'), first_page('payments'))),
+        Case("view:payments jump", lambda: jump('payments')),
+        Case("view:payment popup", db.get_student_list_for_payments, setup=invalidate, heavy=True),
+        Case("view:attendance first page", lambda: first_page('attendance')),
+        Case("view:attendance next page", lambda: next_page('attendance'), setup=lambda: remember_first_page('attendance')),
+        Case("view:attendance jump", lambda: jump('attendance')),
+    ]
+
+
+def untimed_methods(cases):
+    """Các hàm @_with_connection của DatabaseConnector chưa có phép đo nào."""
+    timed = {case.method for case in cases}
+    return sorted(name for name, member in vars(DatabaseConnector).items()
+                  if hasattr(member, '__wrapped__') and not name.startswith('_') and name not in timed)
+
+
+def measure(db, case, repeat):
+    """Thời gian (đo khi tắt query_stats) + số lượt gửi / số dòng của một lần chạy có đo đạc."""
+    db.query_stats.disable()
+    result = time_call(case.fn, repeat, setup=case.setup)
+    if case.setup:
+        case.setup()
+    db.query_stats.reset()
+    db.query_stats.enable()
+    try:
+        case.fn()
+    finally:
+        db.query_stats.disable()
+    methods = db.query_metrics()['methods'].values()
+    result.update(repeat=repeat,
+                  calls=sum(m['calls'] for m in methods),
+                  round_trips=sum(m['round_trips'] for m in methods),
+                  rows=sum(m['rows'] for m in methods),
+                  commits=sum(m['commits'] for m in methods))
+    return result
+
+
+def run_size(db, size, args, patterns):
+    dataset = {key: value for key, value in SIZES[size].items() if key != 'repeat'}
+    if args.skip_seed:
+        count = db.get_student_count()
+        if count < dataset['students']:
+            print(f"Cảnh báo: CSDL có {count} sinh viên, ít hơn cỡ '{size}' ({dataset['students']}).")
+    else:
+        print(f"[{size}] Đang tạo dữ liệu: {dataset}...")
+        seed_database(db, **dataset)
+    prepare_fixtures(db)
+
+    repeat = args.repeat or SIZES[size]['repeat']
+    cases = build_cases(db, dataset)
+    results = {}
+    for case in cases:
+        if patterns and not any(pattern.search(case.name) for pattern in patterns):
+            continue
+        case_repeat = max(3, repeat // 4) if case.heavy else repeat
+        results[case.name] = measure(db, case, case_repeat)
+        print_result(f"[{size}] {case.name}", results[case.name])
+
+    db.rebuild_stats() # Các phép đo ghi bằng SQL trực tiếp không cập nhật hostel_stats
+    missing = untimed_methods(cases)
+    if missing:
+        print(f"Chưa có phép đo cho: {', '.join(missing)}")
+    return {'dataset': dataset, 'results': results}
+
+
+# --- Kết quả / so sánh ---
+
+def git_revision():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def server_version(db):
+    conn = db._connect()
+    try:
+        return conn.get_server_info()
+    finally:
+        conn.close()
+
+
+def compare(report, baseline, threshold, min_delta_ms):
+    """In các phép đo chậm đi so với 'baseline'; trả về số hồi quy."""
+    regressions = 0
+    for size, run in report['runs'].items():
+        base_results = baseline.get('runs', {}).get(size, {}).get('results', {})
+        for name, result in run['results'].items():
+            base = base_results.get(name)
+            if base is None:
+                continue
+            ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+            slower = ratio > 1 + threshold and result['median_ms'] - base['median_ms'] > min_delta_ms
+            more_trips = result['round_trips'] > base.get('round_trips', result['round_trips'])
+            if slower or more_trips:
+                regressions += 1
+                print(f"HỒI QUY [{size}] {name}: median {base['median_ms']:.2f} -> {result['median_ms']:.2f} ms "
+                      f"(x{ratio:.2f}), round trips {base.get('round_trips')} -> {result['round_trips']}")
+    print(f"So với {baseline.get('commit') or '?'}: {regressions} hồi quy.")
+    return regressions
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--size", action="append", choices=sorted(SIZES), help="Cỡ dữ liệu (lặp lại được; mặc định: small)")
+    parser.add_argument("--case", action="append", default=[], help="Chỉ chạy phép đo khớp biểu thức chính quy (lặp lại được)")
+    parser.add_argument("--output", help=f"File JSON kết quả (mặc định: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tỷ lệ chậm đi tối đa cho phép (mặc định 0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Bỏ qua chênh lệch nhỏ hơn (nhiễu đo)")
+    parser.set_defaults(repeat=None)
+    args = parser.parse_args()
+
+    patterns = [re.compile(pattern) for pattern in args.case]
+    db = connect(args)
+    commit, dirty = git_revision()
+    report = {
+        'format': FORMAT_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'server': server_version(db),
+        'runs': {},
+    }
+    try:
+        for size in args.size or ['small']:
+            report['runs'][size] = run_size(db, size, args, patterns)
+    finally:
+        db.close()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Đã ghi kết quả: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold, args.min_delta_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
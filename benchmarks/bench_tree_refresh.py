@@ -0,0 +1,117 @@
+"""
+Đo chi phí tải lại bảng theo kích thước bảng, khi chỉ một dòng thay đổi (vd: sau khi
+đóng pop-up sửa một sinh viên):
+
+    reinsert  : cách cũ, xóa hết item rồi chèn lại từng dòng
+    sync      : utils.TreeviewSync, chỉ sửa dòng thay đổi (RoomView, StaffView)
+    virtual   : virtual_grid.VirtualTreeview.refresh() (StudentView, PaymentView, AttendanceView)
+
+Không cần CSDL (dữ liệu giả trong bộ nhớ), nhưng cần màn hình (DISPLAY) vì dùng ttk.Treeview thật.
+
+    python -m benchmarks.bench_tree_refresh
+    python -m benchmarks.bench_tree_refresh --size 1000 --size 100000 --repeat 3
+"""
+import argparse
+import tkinter as tk
+from tkinter import ttk
+
+from benchmarks.common import time_call, print_result
+from utils import TreeviewSync
+from virtual_grid import VirtualTreeview, ListSource
+
+COLUMNS = ("ID", "Name", "Room", "Contact")
+
+
+def make_rows(size):
+    return [{'id': f"S{i:06d}", 'name': f"Student {i}", 'room': f"R{i % 2000:04d}", 'contact': f"09{i:08d}"}
+            for i in range(size)]
+
+
+def values_of(row):
+    return (row['id'], row['name'], row['room'], row['contact']), ()
+
+
+def touch_one(rows, generation):
+    """Đổi một dòng ở giữa bảng, giống như vừa sửa một bản ghi."""
+    middle = rows[len(rows) // 2]
+    middle['contact'] = f"edit {generation}"
+
+
+def new_tree(root):
+    frame = ttk.Frame(root)
+    frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(frame, columns=COLUMNS, show="headings", height=25)
+    scrollbar = ttk.Scrollbar(frame, orient="vertical")
+    tree.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+    return frame, tree, scrollbar
+
+
+def bench_reinsert(root, rows):
+    frame, tree, _ = new_tree(root)
+    generation = 0
+
+    def run():
+        nonlocal generation
+        generation += 1
+        touch_one(rows, generation)
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert("", "end", iid=row['id'], values=values_of(row)[0])
+        root.update()
+    run()
+    return frame, run
+
+
+def bench_sync(root, rows):
+    frame, tree, _ = new_tree(root)
+    sync = TreeviewSync(tree, key_of=lambda row: row['id'], values_of=values_of)
+    sync.sync(rows)
+    generation = 0
+
+    def run():
+        nonlocal generation
+        generation += 1
+        touch_one(rows, generation)
+        sync.sync(rows)
+        root.update()
+    return frame, run
+
+
+def bench_virtual(root, rows):
+    frame, tree, scrollbar = new_tree(root)
+    grid = VirtualTreeview(tree, scrollbar, values_of=values_of, key_of=lambda row: row['id'])
+    root.update()
+    # Mỗi lần tải lại trả về bản sao như khi đọc lại từ CSDL
+    grid.set_source(ListSource(loader=lambda: [dict(row) for row in rows]))
+    grid.scroll_to(len(rows) // 2 - 5) # Dòng thay đổi nằm trong khung nhìn
+    generation = 0
+
+    def run():
+        nonlocal generation
+        generation += 1
+        touch_one(rows, generation)
+        grid.refresh()
+        root.update()
+    return frame, run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, action="append", help="Số dòng của bảng (mặc định: 1k, 10k, 50k, 100k)")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần lặp cho mỗi phép đo")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.geometry("900x700")
+    for size in args.size or [1000, 10000, 50000, 100000]:
+        rows = make_rows(size)
+        for label, setup in (("reinsert", bench_reinsert), ("sync", bench_sync), ("virtual", bench_virtual)):
+            frame, run = setup(root, rows)
+            print_result(f"{size:>7,} rows | {label}", time_call(run, args.repeat))
+            frame.destroy()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
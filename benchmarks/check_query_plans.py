@@ -0,0 +1,69 @@
+"""
+Kiểm tra hồi quy kế hoạch truy vấn (EXPLAIN): các truy vấn lọc theo tháng trên
+bảng payments phải dùng index, không được quét toàn bảng.
+
+    python -m benchmarks.check_query_plans
+
+Trả về mã thoát 1 nếu có kế hoạch không đạt (dùng được trong CI).
+"""
+import sys
+
+from benchmarks.common import make_parser, connect
+from database import DatabaseConnector, month_range
+from seed_data import seed_database
+
+
+def explain(db, query, params):
+    conn = db._connect()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("ANALYZE TABLE payments, students, rooms")
+        cursor.fetchall()
+        cursor.execute(f"EXPLAIN {query}", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def check(name, plan, table, allowed_keys, covering=False):
+    rows = [row for row in plan if row['table'] == table]
+    problems = []
+    for row in rows:
+        if row['type'] == 'ALL':
+            problems.append("quét toàn bảng (type=ALL)")
+        if row['key'] not in allowed_keys:
+            problems.append(f"dùng index {row['key']!r}, mong đợi một trong {allowed_keys}")
+        if covering and 'Using index' not in (row['Extra'] or ''):
+            problems.append("không phải covering index (thiếu 'Using index')")
+    status = "OK  " if rows and not problems else "FAIL"
+    print(f"[{status}] {name}: " + ("; ".join(problems) if problems else ", ".join(f"{r['key']} ({r['type']})" for r in rows)))
+    return bool(rows) and not problems
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--payment-months", type=int, default=10)
+    args = parser.parse_args()
+
+    db = connect(args)
+    if not args.skip_seed:
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=args.payment_months)
+
+    start, end = month_range()
+    results = [
+        check("get_due_summary / payments",
+              explain(db, DatabaseConnector.DUE_SUMMARY_QUERY, (start, end)),
+              table='p', allowed_keys=('idx_payments_student_date_amount',), covering=True),
+        check("doanh thu theo khoảng ngày / payments",
+              explain(db, "SELECT SUM(amount) FROM payments WHERE payment_date >= %s AND payment_date < %s", (start, end)),
+              table='payments', allowed_keys=('idx_payments_date_id', 'idx_payments_student_date_amount')),
+    ]
+    db.close()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Kiểm tra tách đọc / ghi (DatabaseConnector(replicas=...)) trên hai MySQL chạy cục bộ:
+primary (--host) và một replica đang sao chép từ primary (--replica host:port).
+
+    1. Replica được phát hiện qua SHOW REPLICA STATUS và nhận lời gọi đọc.
+    2. Đọc-được-ghi-của-mình: ngay sau add_room, get_room_by_no thấy phòng mới (chạy trên primary).
+    3. Hết khoảng bám primary, lời gọi đọc chạy trên replica và replica cũng thấy phòng đó.
+    4. Tải cuối tháng: --readers luồng đọc get_due_summary / get_payments_page trong khi một quầy
+       khác ghi add_payment liên tục; so sánh chỉ dùng primary với có replica.
+    5. --stop-sql-thread: dừng luồng SQL của replica (cần quyền REPLICATION_SLAVE_ADMIN),
+       lời gọi đọc phải quay về primary; luồng SQL được chạy lại khi kết thúc.
+
+    python -m benchmarks.check_replica_routing --replica 127.0.0.1:3307
+    python -m benchmarks.check_replica_routing --replica 127.0.0.1:3307 --students 20000 --load-seconds 10
+
+Trả về mã thoát 1 nếu kết quả sai.
+"""
+import sys
+import threading
+import time
+from datetime import date
+
+import mysql.connector
+
+from benchmarks.common import make_parser, connect
+from seed_data import seed_database
+
+ROOM_PREFIX = "RR"
+
+
+def replica_reads(db):
+    return sum(replica['reads'] for replica in db.replica_metrics()['replicas'].values())
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def report(ok, message):
+    print(f"[{'OK  ' if ok else 'FAIL'}] {message}")
+    return ok
+
+
+def check_routing(db, args):
+    ok = True
+    router = db.router
+
+    def served_by_replica():
+        db.get_student_count()
+        return replica_reads(db) > 0
+    ok &= report(wait_until(served_by_replica, args.timeout),
+                 f"replica nhận lời gọi đọc: {db.replica_metrics()['replicas']}")
+
+    room_no = f"{ROOM_PREFIX}{int(time.time()) % 100000:05d}"
+    db.add_room(room_no, "Replica", 2, 1000, "Available")
+    before = db.replica_metrics()['sticky_reads']
+    ok &= report(db.get_room_by_no(room_no) is not None and db.replica_metrics()['sticky_reads'] == before + 1,
+                 "đọc ngay sau khi ghi thấy dữ liệu mới (chạy trên primary)")
+
+    time.sleep(router.sticky_seconds)
+    reads = replica_reads(db)
+    ok &= report(wait_until(lambda: db.get_room_by_no(room_no) is not None and replica_reads(db) > reads, args.timeout),
+                 f"sau {router.sticky_seconds:.1f}s lời gọi đọc chạy trên replica và thấy phòng {room_no}")
+
+    if args.stop_sql_thread:
+        host, _, port = args.replica[0].partition(":")
+        admin = mysql.connector.connect(host=host, port=int(port or 3306), user=args.user, password=args.password)
+        cursor = admin.cursor()
+        try:
+            cursor.execute("STOP REPLICA SQL_THREAD")
+            time.sleep(router.CHECK_INTERVAL + 0.2)
+            db.update_room(room_no, "Replica", 3, 1000, "Available")
+            time.sleep(router.sticky_seconds)
+            reads = replica_reads(db)
+            room = db.get_room_by_no(room_no)
+            ok &= report(room is not None and room['capacity'] == 3 and replica_reads(db) == reads,
+                         "luồng SQL của replica dừng: lời gọi đọc quay về primary")
+        finally:
+            cursor.execute("START REPLICA SQL_THREAD")
+            cursor.close()
+            admin.close()
+
+    db.delete_room(room_no)
+    return ok
+
+
+def run_load(reader_db, writer_db, args, student_id):
+    """Đọc màn hình cuối tháng song song với một quầy ghi thanh toán; trả về (lượt đọc/giây, p95 đọc, p95 ghi) ms."""
+    stop = time.monotonic() + args.load_seconds
+    read_ms, write_ms = [], []
+    lock = threading.Lock()
+
+    def reader():
+        samples = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            reader_db.get_due_summary()
+            reader_db.get_payments_page(limit=200)
+            samples.append((time.perf_counter() - start) * 1000)
+        with lock:
+            read_ms.extend(samples)
+
+    def writer():
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            writer_db.add_payment(student_id, 100, date.today(), 'Cash')
+            write_ms.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def p95(samples):
+        samples = sorted(samples)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+    return len(read_ms) / args.load_seconds, p95(read_ms), p95(write_ms)
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--replica", action="append", required=True, help="host:port của replica (lặp lại nếu nhiều)")
+    parser.add_argument("--rooms", type=int, default=None, help="Mặc định: theo số sinh viên (xem seed_data)")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--payment-months", type=int, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--load-seconds", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=15.0, help="Giây chờ replica theo kịp")
+    parser.add_argument("--stop-sql-thread", action="store_true")
+    args = parser.parse_args()
+
+    db = connect(args, pool_size=4, replicas=args.replica)
+    if not args.skip_seed:
+        print(f"Đang tạo dữ liệu: {args.students} sinh viên, {args.payment_months} tháng thanh toán...")
+        seed_database(db, args.students, args.rooms, attendance_days=0, payment_months=args.payment_months)
+    ok = check_routing(db, args)
+    student_id = db.get_students_page(limit=1)[0]['student_id']
+    db.close()
+
+    # Mỗi quầy là một connector riêng: quầy ghi không làm các quầy đọc bám primary
+    writer_db = connect(args, pool_size=2)
+    for label, replicas in (("chỉ primary", None), ("có replica", args.replica)):
+        reader_db = connect(args, pool_size=args.readers, replicas=replicas)
+        reads_per_s, read_p95, write_p95 = run_load(reader_db, writer_db, args, student_id)
+        print(f"{label:<12} {reads_per_s:8.1f} lượt đọc/s | đọc p95 {read_p95:8.1f} ms | ghi p95 {write_p95:8.1f} ms")
+        if replicas:
+            print(reader_db.replica_metrics())
+        reader_db.close()
+    writer_db.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
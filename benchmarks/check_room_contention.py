@@ -0,0 +1,103 @@
+"""
+Kiểm tra tranh chấp khi nhiều quầy cùng xếp sinh viên vào một phòng.
+Nhiều luồng (mỗi luồng một kết nối trong pool) cùng gọi vào một phòng có sức chứa nhỏ:
+    - add_student: thêm sinh viên mới vào phòng;
+    - update_student: chuyển sinh viên từ một phòng khác sang phòng đó.
+Mỗi vòng phải có đúng 'capacity' lượt thành công, phần còn lại nhận thông báo "đã đầy"
+(không có lỗi CSDL như deadlock 1213), và occupied/status cuối cùng phải khớp.
+
+    python -m benchmarks.check_room_contention --threads 16 --capacity 4
+
+Trả về mã thoát 1 nếu kết quả sai.
+"""
+import sys
+import threading
+from datetime import date
+
+from benchmarks.common import make_parser, connect
+from seed_data import seed_database
+
+
+def student(student_id, i, room_no):
+    return {
+        'student_id': student_id, 'name': f"Contention {i}", 'gender': "Male",
+        'age': 20, 'email': f"{student_id.lower()}@example.com", 'contact': "0",
+        'admission_date': date.today(), 'room_no': room_no,
+    }
+
+
+def run_concurrently(calls):
+    """Chạy các hàm cùng lúc (mỗi hàm một luồng, xuất phát cùng một barrier); trả về kết quả theo thứ tự."""
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def worker(i):
+        barrier.wait() # Tất cả luồng bắt đầu cùng lúc
+        results[i] = calls[i]()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(calls))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def check_round(db, label, room_no, results, capacity):
+    succeeded = sum(1 for success, _ in results if success)
+    errors = [message for success, message in results if not success and "đã đầy" not in message]
+    room = db.get_room_by_no(room_no)
+    round_ok = (succeeded == capacity and not errors
+                and room['occupied'] == capacity and room['status'] == 'Full')
+    print(f"[{'OK  ' if round_ok else 'FAIL'}] {label}: {succeeded}/{len(results)} thành công, "
+          f"occupied={room['occupied']}/{room['capacity']}, status={room['status']}")
+    for message in errors[:3]:
+        print(f"       lỗi: {message}")
+    return round_ok
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    db = connect(args, pool_size=args.threads)
+    seed_database(db, 0, rooms=1, attendance_days=0, payment_months=0) # Xóa dữ liệu của lần chạy trước
+    ok = True
+
+    for round_no in range(args.rounds):
+        room_no = f"CT{round_no:03d}"
+        db.add_room(room_no, "Contention", args.capacity, 1000, "Available")
+        results = run_concurrently([
+            lambda i=i: db.add_student(student(f"CT{round_no:03d}-{i:03d}", i, room_no))
+            for i in range(args.threads)
+        ])
+        ok &= check_round(db, f"add_student vòng {round_no}", room_no, results, args.capacity)
+
+    for round_no in range(args.rounds):
+        # Mỗi luồng chuyển một sinh viên khác nhau từ phòng nguồn (đủ chỗ) sang cùng một phòng nhỏ
+        source, room_no = f"CS{round_no:03d}", f"CM{round_no:03d}"
+        db.add_room(source, "Contention", args.threads, 1000, "Available")
+        db.add_room(room_no, "Contention", args.capacity, 1000, "Available")
+        moving = [student(f"CM{round_no:03d}-{i:03d}", i, source) for i in range(args.threads)]
+        for data in moving:
+            db.add_student(data)
+        results = run_concurrently([
+            lambda data=data: db.update_student(data['student_id'], dict(data, room_no=room_no), source)
+            for data in moving
+        ])
+        ok &= check_round(db, f"update_student vòng {round_no}", room_no, results, args.capacity)
+        left = db.get_room_by_no(source)
+        if left['occupied'] != args.threads - args.capacity:
+            ok = False
+            print(f"[FAIL] phòng nguồn {source}: occupied={left['occupied']}, cần {args.threads - args.capacity}")
+
+    print(db.pool_metrics())
+    db.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import statistics
+import time
+
+from database import DatabaseConnector
+
+
+def make_parser(description):
+    """Tạo ArgumentParser với các tham số kết nối chung cho mọi benchmark."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="hostel_bench",
+                        help="CSDL dùng để benchmark (dữ liệu sẽ bị xóa!)")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần lặp cho mỗi phép đo")
+    parser.add_argument("--skip-seed", action="store_true", help="Dùng lại dữ liệu đã tạo từ lần chạy trước")
+    return parser
+
+
+def connect(args, **kwargs):
+    db = DatabaseConnector(host=args.host, user=args.user, password=args.password,
+                           database=args.database, **kwargs)
+    if not db.is_connected():
+        raise SystemExit("Không thể kết nối CSDL benchmark.")
+    return db
+
+
+def time_call(fn, repeat=20, warmup=1, setup=None):
+    """Gọi fn() nhiều lần, trả về thống kê thời gian (ms). setup() (nếu có) chạy trước mỗi lần gọi, không tính giờ."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'min_ms': samples[0],
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max_ms': samples[-1],
+    }
+
+
+def per_call_us(fn, calls, repeat):
+    """Thời gian trung vị của một lời gọi (micro giây), đo trên 'calls' lời gọi liên tiếp."""
+    def batch():
+        for _ in range(calls):
+            fn()
+    return time_call(batch, repeat)['median_ms'] * 1000 / calls
+
+
+def print_result(label, result):
+    print(f"{label:<40} min {result['min_ms']:9.2f} ms | median {result['median_ms']:9.2f} ms | p95 {result['p95_ms']:9.2f} ms")
+
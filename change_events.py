@@ -0,0 +1,122 @@
+"""
+Sự kiện thay đổi dữ liệu do DatabaseConnector phát ra sau mỗi lần ghi đã commit.
+
+Các view đăng ký qua DBExecutor.listen(...) để nhận thay đổi trên thread giao diện,
+rồi chỉ cập nhật những dòng bị ảnh hưởng. Sự kiện đến dồn dập (nhập file, điểm danh
+theo lô, nhiều pop-up liên tiếp) được gom thành một ChangeBatch cho mỗi lượt vẽ.
+"""
+import threading
+
+# Loại dữ liệu (ChangeEvent.kind)
+STUDENT = 'student'
+ROOM = 'room'
+PAYMENT = 'payment'
+ATTENDANCE = 'attendance'
+USER = 'user'
+
+# Hành động (ChangeEvent.action)
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+class ChangeEvent:
+    """
+    Một thay đổi đã commit.
+
+    keys: khóa của các dòng bị ảnh hưởng (student_id, room_no, payment_id, id nhân viên,
+          (student_id, ngày) với điểm danh); None = không liệt kê được (vd: điểm danh cả ngày).
+    refs: khóa liên quan, vd: thanh toán -> {STUDENT: (student_id,)}, điểm danh -> {'date': (ngày,)}
+    """
+
+    __slots__ = ("kind", "action", "keys", "refs")
+
+    def __init__(self, kind, action, keys=None, refs=None):
+        self.kind = kind
+        self.action = action
+        self.keys = tuple(keys) if keys is not None else None
+        self.refs = {name: tuple(values) for name, values in (refs or {}).items()}
+
+    def __repr__(self):
+        return f"ChangeEvent({self.kind!r}, {self.action!r}, keys={self.keys!r}, refs={self.refs!r})"
+
+
+class ChangeBus:
+    """
+    Phát / đăng ký nhận ChangeEvent, an toàn đa luồng.
+    Callback chạy ngay trên thread phát sự kiện (thường là thread nền của DBExecutor),
+    nên giao diện phải nhận qua DBExecutor.listen thay vì đăng ký trực tiếp.
+    """
+
+    def __init__(self):
+        self._subscribers = {} # token -> (kinds, callback)
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, kinds=None):
+        """Đăng ký callback(event) cho các loại 'kinds' (None = tất cả). Trả về token để hủy."""
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = (frozenset(kinds) if kinds else None, callback)
+            return self._next_token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def publish(self, *events):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for event in events:
+            for kinds, callback in subscribers:
+                if kinds is not None and event.kind not in kinds:
+                    continue
+                try:
+                    callback(event)
+                except Exception as e:
+                    # Lỗi của người nhận không được làm hỏng thao tác ghi đã commit
+                    print(f"Lỗi khi xử lý sự kiện {event}: {e}")
+
+
+class ChangeBatch:
+    """Các sự kiện gom lại trong một lượt vẽ, tra cứu theo loại và hành động."""
+
+    def __init__(self, events=()):
+        self.events = []
+        self._keys = {} # (kind, action) -> set khóa
+        self._all = set() # Các loại có sự kiện không liệt kê khóa (keys=None)
+        for event in events:
+            self.add(event)
+
+    def add(self, event):
+        self.events.append(event)
+        if event.keys is None:
+            self._all.add(event.kind)
+        else:
+            self._keys.setdefault((event.kind, event.action), set()).update(event.keys)
+
+    def __contains__(self, kind):
+        return any(event.kind == kind for event in self.events)
+
+    def keys(self, kind, *actions):
+        """Tập khóa bị ảnh hưởng của 'kind' (lọc theo actions nếu có)."""
+        keys = set()
+        for action in actions or (INSERT, UPDATE, DELETE):
+            keys |= self._keys.get((kind, action), set())
+        return keys
+
+    def all_rows(self, kind):
+        """True nếu có sự kiện của 'kind' không liệt kê được khóa (cần tải lại toàn bộ)."""
+        return kind in self._all
+
+    def reshaped(self, kind):
+        """True nếu 'kind' có dòng được thêm / xóa (thứ tự, số dòng thay đổi) hoặc không rõ khóa."""
+        return self.all_rows(kind) or bool(self.keys(kind, INSERT, DELETE))
+
+    def refs(self, kind, name):
+        """Hợp các khóa liên quan 'name' trong các sự kiện của 'kind'."""
+        values = set()
+        for event in self.events:
+            if event.kind == kind:
+                values.update(event.refs.get(name, ()))
+        return values
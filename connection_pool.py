@@ -0,0 +1,131 @@
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """Hết thời gian chờ mượn kết nối từ pool."""
+
+
+class ConnectionPool:
+    """
+    Pool kết nối có giới hạn kích thước.
+    Kết nối được tạo dần khi cần (tối đa 'size'), được mượn bằng acquire()
+    và trả lại bằng release(). Nếu pool đã đầy, acquire() chờ tối đa 'timeout' giây.
+    """
+
+    def __init__(self, connect, size=5, timeout=5.0):
+        if size < 1:
+            raise ValueError("Kích thước pool phải >= 1.")
+        self._connect = connect # Hàm tạo một kết nối mới
+        self.size = size
+        self.timeout = timeout
+
+        self._idle = [] # Các kết nối đang rảnh (LIFO để tái sử dụng kết nối "nóng")
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Số liệu thống kê của pool
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self, timeout=None):
+        """Mượn một kết nối. Ném PoolTimeoutError nếu chờ quá lâu."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Pool kết nối đã đóng.")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    # Giữ chỗ trước, tạo kết nối bên ngoài lock
+                    self._created += 1
+                    conn = None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(f"Không mượn được kết nối sau {timeout:.1f}s (pool size = {self.size}).")
+                self._cond.wait(remaining)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not conn.is_connected():
+                conn.reconnect(attempts=1)
+                self._reconnects += 1
+        except Exception:
+            self.discard()
+            raise
+
+        waited = time.perf_counter() - start
+        with self._cond:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def release(self, conn):
+        """Trả kết nối về pool (hủy giao dịch còn dang dở nếu có)."""
+        try:
+            if conn.is_connected() and conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._created -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def discard(self, conn=None):
+        """Bỏ một kết nối hỏng và nhường chỗ cho kết nối mới."""
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def metrics(self):
+        """Trả về dict số liệu hiện tại của pool."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': idle,
+                'in_use': self._created - idle,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'avg_wait_ms': (self._total_wait / self._checkouts * 1000) if self._checkouts else 0.0,
+                'max_wait_ms': self._max_wait * 1000,
+            }
+
+    def close(self):
+        """Đóng tất cả kết nối đang rảnh; kết nối đang mượn sẽ đóng khi được trả."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
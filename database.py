@@ -1,42 +1,332 @@
 import mysql.connector
 from mysql.connector import Error
 import hashlib
-from datetime import date 
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from datetime import date, timedelta
+from connection_pool import ConnectionPool, PoolTimeoutError
+from reference_cache import ReferenceCache
+from query_stats import QueryStats
+from sqlite_backend import SQLiteConnection
+from replica_router import Replica, ReplicaRouter
+from room_allocation import allocate, MIXED
+from change_events import ChangeBus, ChangeEvent, STUDENT, ROOM, PAYMENT, ATTENDANCE, USER, INSERT, UPDATE, DELETE
+
+
+def month_range(day=None):
+    """
+    Trả về (ngày đầu tháng, ngày đầu tháng sau) dạng ISO cho tháng chứa 'day'.
+    Dùng để lọc theo khoảng nửa mở [start, end) thay cho YEAR()/MONTH(),
+    giúp MySQL dùng được index trên cột ngày.
+    """
+    day = day or date.today()
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.isoformat(), end.isoformat()
+
+
+def _with_connection(method, read=False, replica=None):
+    """
+    Decorator: mỗi lời gọi được cấp một kết nối/cursor riêng trong suốt thời gian chạy.
+    Các lời gọi lồng nhau (vd: add_room -> get_room_by_no) dùng chung kết nối của lời gọi ngoài.
+    Khi bật đo đạc (self.query_stats), lời gọi ngoài cùng được ghi lại theo tên hàm.
+    read=True: lời gọi không ghi dữ liệu (không kéo dài khoảng đọc trên primary sau khi ghi);
+    replica (mặc định = read): được phép chạy trên replica.
+    """
+    name = method.__name__
+    replica = read if replica is None else replica
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        primary = kwargs.pop('primary', False) if read else False
+        on_replica = replica and not primary
+        if not self.query_stats.enabled or getattr(self._local, 'depth', 0):
+            with self._checkout(read=read, on_replica=on_replica):
+                return method(self, *args, **kwargs)
+        with self.query_stats.record(name) as trace, self._checkout(trace, read=read, on_replica=on_replica):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _read_only(method):
+    """
+    Decorator cho hàm chỉ đọc: như _with_connection, nhưng có thể chạy trên replica (xem replica_router).
+    Gọi với primary=True khi kết quả được dùng cho một lệnh ghi tiếp theo (vd: pop-up sửa đọc dòng
+    hiện tại), để không lấy dữ liệu cũ từ replica đang trễ.
+    """
+    return _with_connection(method, read=True)
+
+
+def _read_primary(method):
+    """Decorator cho hàm chỉ đọc phải luôn chạy trên primary (vd: validate_login) nhưng không phải lời gọi ghi."""
+    return _with_connection(method, read=True, replica=False)
+
 
 class DatabaseConnector:
     """
-    Quản lý tất cả các kết nối và truy vấn CSDL MySQL.
+    Quản lý tất cả các kết nối và truy vấn CSDL MySQL (hoặc SQLite, xem backend).
+
+    Mặc định dùng một kết nối duy nhất (các lời gọi được xếp hàng lần lượt).
+    Nếu truyền pool_size, mỗi lời gọi sẽ mượn một kết nối từ pool, cho phép
+    nhiều luồng (UI, làm mới nền, xuất báo cáo) truy vấn song song.
+
+    Mỗi hàm ghi phát ChangeEvent qua self.changes (change_events.ChangeBus) sau khi commit,
+    để các view khác cập nhật đúng những dòng bị ảnh hưởng.
+
+    Dữ liệu tham chiếu (phòng, loại phòng, phòng còn trống, tên sinh viên) được đọc qua
+    self.reference_cache; bộ đệm bị xóa theo sự kiện ghi của chính tiến trình này và theo
+    bảng data_versions (thay đổi từ máy / tiến trình khác).
+
+    instrument=True bật đo đạc (query_stats.QueryStats): độ trễ, số dòng, số lượt gửi
+    và số commit của từng hàm, cùng slow-query log cho câu lệnh / lời gọi chậm hơn
+    slow_query_ms. Xem query_metrics().
+
+    backend='sqlite' chạy cùng schema và cùng các câu lệnh trên một file SQLite (database là
+    đường dẫn file) qua sqlite_backend: không cần MySQL server, mỗi truy vấn chạy ngay trong
+    tiến trình. Dùng cho chi nhánh nhỏ chạy trên một máy; host / user / password bị bỏ qua.
+
+    replicas=["host:port", ...] (chỉ MySQL) tách đọc / ghi: các hàm @_read_only (get_*,
+    search_students) và stream_report chạy trên replica còn theo kịp (độ trễ <= max_replica_lag),
+    mọi hàm khác chạy trên primary. Sau mỗi lời gọi ghi, lời gọi đọc của connector này quay về
+    primary một lúc để luôn thấy dữ liệu vừa ghi. Tra cứu làm đầu vào cho lệnh ghi (vd: pop-up
+    sửa) gọi với primary=True. Xem replica_router và replica_metrics().
     """
+
+    BACKENDS = {'mysql': "MySQL", 'sqlite': "SQLite"}
+
+    # Các index phụ do create_tables quản lý: (bảng, tên index, danh sách cột)
+    INDEXES = [
+        ('payments', 'idx_payments_date_id', 'payment_date, payment_id'), # Phân trang lịch sử thanh toán
+        ('students', 'idx_students_room_name', 'room_no, name, student_id'), # Phân trang điểm danh
+        ('students', 'idx_students_name', 'name'), # Tìm kiếm theo tiền tố tên
+        ('payments', 'idx_payments_student_date_amount', 'student_id, payment_date, amount'), # Covering index cho công nợ tháng
+        ('attendance', 'idx_attendance_date_status', 'attendance_date, status'), # Đếm theo ngày, báo cáo theo khoảng ngày
+    ]
+
+    # Index FULLTEXT (parser ngram) cho tìm kiếm chuỗi con trong tên / mã sinh viên
+    FULLTEXT_INDEXES = [
+        ('students', 'ft_students_name_id', 'name, student_id'),
+    ]
+    NGRAM_SIZE = 2 # ngram_token_size mặc định của MySQL
+
+    # Công nợ tháng hiện tại; tham số: month_range() -> khoảng [đầu tháng, đầu tháng sau)
+    # Tách thành phần SELECT ... FROM và phần GROUP BY ... ORDER BY để get_due_summary chèn được WHERE
+    DUE_SUMMARY_SELECT = "SELECT s.student_id, s.name, s.email, r.room_no, r.rent, COALESCE(SUM(p.amount), 0) AS total_paid, (r.rent - COALESCE(SUM(p.amount), 0)) AS due_amount FROM students s JOIN rooms r ON s.room_no = r.room_no LEFT JOIN payments p ON s.student_id = p.student_id AND p.payment_date >= %s AND p.payment_date < %s"
+    DUE_SUMMARY_GROUP_BY = "GROUP BY s.student_id, s.name, s.email, r.room_no, r.rent ORDER BY due_amount DESC, s.name"
+    DUE_SUMMARY_QUERY = f"{DUE_SUMMARY_SELECT} {DUE_SUMMARY_GROUP_BY}"
+
+    # Các báo cáo xuất được theo luồng (stream_report): tên -> câu SELECT
+    REPORT_QUERIES = {
+        'students': "SELECT * FROM students ORDER BY student_id",
+        'rooms': "SELECT * FROM rooms ORDER BY room_no",
+        'room_occupancy': "SELECT room_no, room_type, capacity, occupied, status FROM rooms ORDER BY room_no",
+        'payments': "SELECT p.payment_id, s.name, p.amount, p.payment_date, p.method FROM payments p LEFT JOIN students s ON p.student_id = s.student_id ORDER BY p.payment_date DESC, p.payment_id DESC",
+        'due_summary': DUE_SUMMARY_QUERY, # Tham số: month_range()
+        'attendance': "SELECT s.student_id, s.name, s.room_no, a.attendance_date, a.status FROM attendance a JOIN students s ON s.student_id = a.student_id WHERE a.attendance_date BETWEEN %s AND %s ORDER BY a.attendance_date, s.name", # Tham số: (start_date, end_date)
+    }
+    # Kiểu khai báo của các cột trong báo cáo (theo CREATE TABLE; cột tính toán theo kiểu kết quả của MySQL).
+    # report_export dựng lược đồ Parquet / Feather từ đây thay vì đoán từ giá trị; cột không có ở đây là chuỗi.
+    REPORT_COLUMN_TYPES = {
+        'student_id': "VARCHAR(20)", 'name': "VARCHAR(100)", 'gender': "VARCHAR(10)", 'age': "INT",
+        'email': "VARCHAR(100)", 'contact': "VARCHAR(20)", 'admission_date': "DATE", 'room_no': "VARCHAR(10)",
+        'room_type': "VARCHAR(50)", 'capacity': "INT", 'occupied': "INT", 'rent': "DECIMAL(10, 2)",
+        'status': "VARCHAR(20)", 'payment_id': "INT", 'amount': "DECIMAL(10, 2)", 'payment_date': "DATE",
+        'method': "VARCHAR(10)", 'attendance_date': "DATE",
+        'total_paid': "DECIMAL(32, 2)", 'due_amount': "DECIMAL(33, 2)", # SUM(DECIMAL(10, 2)) / rent - SUM(...)
+    }
+    STREAM_CHUNK_SIZE = 5000
+    STREAM_WRITE_TIMEOUT = 600 # Giây; người đọc chậm (ghi file) không làm server ngắt kết nối
+
+    # Bảng gốc (tên trong data_versions) -> các nhóm trong reference_cache phụ thuộc vào bảng đó
+    REFERENCE_GROUPS = {
+        'rooms': ('rooms', 'room_types', 'available_rooms'),
+        'students': ('student_names',),
+    }
+    VERSION_CHECK_INTERVAL = 2.0 # Giây giữa hai lần đọc data_versions
+    ALLOCATION_CHUNK = 1000 # Số sinh viên mỗi lệnh UPDATE ... CASE khi ghi kết quả xếp phòng
+    REPLICA_POOL_SIZE = 2 # Số kết nối mỗi replica khi không truyền pool_size
     
-    def __init__(self, host='localhost', user='root', password='', database='hostel_v2'):
+    def __init__(self, host='localhost', user='root', password='', database='hostel_v2',
+                 pool_size=None, pool_timeout=5.0, instrument=False, slow_query_ms=None, slow_log_path=None,
+                 backend='mysql', replicas=None, max_replica_lag=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend không hỗ trợ: {backend!r} (chọn một trong {', '.join(self.BACKENDS)})")
+        if replicas and backend != 'mysql':
+            raise ValueError("Replica chỉ dùng được với backend MySQL.")
+        self.backend = backend
         self.host = host
         self.user = user
         self.password = password # <--- (Hãy chắc chắn bạn đã đặt mật khẩu ở đây)
         self.database = database
-        self.conn = None
-        self.cursor = None
+        self.pool = None
+        self.router = None
+        self._shared_conn = None
+        self._shared_cursor = None
+        self._shared_lock = threading.RLock()
+        self._local = threading.local()
+        self.query_stats = QueryStats(instrument, slow_query_ms, slow_log_path)
+        self.changes = ChangeBus()
+        self.reference_cache = ReferenceCache()
+        self._versions = {} # data_versions đã thấy lần trước
+        self._versions_checked = 0.0
+        self.changes.subscribe(self._invalidate_reference, kinds=(ROOM, STUDENT))
 
         try:
-            self.conn = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            if self.conn.is_connected():
-                print("Kết nối MySQL thành công!")
-                self.cursor = self.conn.cursor(dictionary=True)
-                self.create_tables() 
+            if pool_size:
+                self.pool = ConnectionPool(self._connect, size=pool_size, timeout=pool_timeout)
+                self.pool.release(self.pool.acquire()) # Kiểm tra kết nối ngay từ đầu
+                print(f"Kết nối {self.BACKENDS[backend]} thành công! (pool size = {pool_size})")
+                self.create_tables()
+            else:
+                self._shared_conn = self._connect()
+                if self._shared_conn.is_connected():
+                    print(f"Kết nối {self.BACKENDS[backend]} thành công!")
+                    self._shared_cursor = self._shared_conn.cursor(dictionary=True)
+                    self.create_tables() 
+            if replicas and self.is_connected():
+                self.router = ReplicaRouter([self._make_replica(spec, pool_size, pool_timeout) for spec in replicas],
+                                            max_lag=max_replica_lag)
+                self.router.start() # Kiểm tra độ trễ trên luồng nền; tới lúc đó mọi lời gọi đọc chạy trên primary
+                print(f"Đọc từ {len(replicas)} replica: {', '.join(r.name for r in self.router.replicas)}")
                 
-        except Error as e:
-            print(f"Lỗi khi kết nối MySQL: {e}")
-            self.conn = None 
+        except (Error, PoolTimeoutError) as e:
+            print(f"Lỗi khi kết nối {self.BACKENDS[backend]}: {e}")
+            if self.pool:
+                self.pool.close()
+            self.pool = None
+            self._shared_conn = None 
+
+    def _connect(self, host=None, port=None):
+        if self.backend == 'sqlite':
+            return SQLiteConnection(self.database)
+        params = dict(host=host or self.host, user=self.user, password=self.password, database=self.database)
+        if port:
+            params['port'] = port
+        return mysql.connector.connect(**params)
+
+    def _make_replica(self, spec, pool_size, pool_timeout):
+        """Tạo Replica (pool kết nối riêng, mở dần khi cần) từ "host" hoặc "host:port"."""
+        host, _, port = spec.partition(":")
+        port = int(port) if port else None
+        pool = ConnectionPool(lambda: self._connect(host, port), size=pool_size or self.REPLICA_POOL_SIZE,
+                              timeout=pool_timeout)
+        return Replica(spec, pool)
+
+    # --- Quản lý kết nối cho từng lời gọi ---
+
+    @property
+    def conn(self):
+        """Kết nối của lời gọi hiện tại (hoặc kết nối dùng chung khi không ở trong lời gọi nào)."""
+        if getattr(self._local, 'depth', 0):
+            return self._local.conn
+        return self._shared_conn
+
+    @property
+    def cursor(self):
+        if getattr(self._local, 'depth', 0):
+            return self._local.cursor
+        return self._shared_cursor
+
+    @contextmanager
+    def _checkout(self, trace=None, read=False, on_replica=False):
+        """
+        Mượn kết nối cho một lời gọi. on_replica=True: chạy trên replica nếu router cho phép;
+        read=False: lời gọi có ghi dữ liệu, bắt đầu khoảng đọc-được-ghi-của-mình (router.note_write).
+        """
+        local = self._local
+        if getattr(local, 'depth', 0):
+            # Lời gọi lồng nhau: dùng lại kết nối đang mượn
+            local.depth += 1
+            try:
+                yield
+            finally:
+                local.depth -= 1
+            return
+
+        pool, conn, cursor = None, None, None
+        replica = self.router.pick() if on_replica and self.router is not None else None
+        if replica is not None:
+            conn, cursor = self._acquire(replica.pool)
+            if conn is None:
+                self.router.failed(replica) # Đọc trên primary
+            else:
+                pool = replica.pool
+
+        if pool is None and self.pool is None:
+            # Chế độ một kết nối: các luồng phải chờ nhau
+            with self._shared_lock:
+                local.conn, local.cursor, local.depth = self._shared_conn, self._shared_cursor, 1
+                if trace is not None and local.conn is not None:
+                    local.conn, local.cursor = trace.wrap(local.conn, local.cursor)
+                try:
+                    yield
+                finally:
+                    local.conn, local.cursor, local.depth = None, None, 0
+                    if not read and self.router is not None:
+                        self.router.note_write()
+            return
+
+        if pool is None:
+            pool = self.pool
+            conn, cursor = self._acquire(pool)
+
+        local.conn, local.cursor, local.depth = conn, cursor, 1
+        if trace is not None and conn is not None:
+            local.conn, local.cursor = trace.wrap(conn, cursor)
+        try:
+            yield
+        finally:
+            local.conn, local.cursor, local.depth = None, None, 0
+            if conn is not None:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+                pool.release(conn)
+            if not read and self.router is not None:
+                self.router.note_write()
+
+    def _acquire(self, pool):
+        """Mượn (kết nối, cursor) từ pool; (None, None) nếu lỗi."""
+        conn = None
+        try:
+            conn = pool.acquire()
+            return conn, conn.cursor(dictionary=True)
+        except (Error, PoolTimeoutError) as e:
+            print(f"Lỗi khi mượn kết nối từ pool: {e}")
+            if conn is not None:
+                pool.release(conn)
+            return None, None
+
+    def is_connected(self):
+        if self.pool is not None:
+            return True
+        return self._shared_conn is not None and self._shared_conn.is_connected()
+
+    def pool_metrics(self):
+        """Số liệu của pool (None nếu đang dùng một kết nối duy nhất)."""
+        return self.pool.metrics() if self.pool else None
+
+    def replica_metrics(self):
+        """Số liệu định tuyến đọc / ghi (None nếu không cấu hình replica), xem ReplicaRouter.metrics."""
+        return self.router.metrics() if self.router else None
+
+    def query_metrics(self):
+        """Số liệu đo đạc theo từng hàm (xem query_stats.QueryStats.snapshot)."""
+        return self.query_stats.snapshot()
+
+    def _publish(self, *events):
+        """Phát sự kiện thay đổi (chỉ gọi sau khi commit thành công)."""
+        self.changes.publish(*events)
 
     def _hash_password(self, password):
         sha256 = hashlib.sha256()
         sha256.update(password.encode('utf-8'))
         return sha256.hexdigest()
 
+    @_with_connection
     def create_tables(self):
         if not self.conn:
             return
@@ -103,14 +393,94 @@ class DatabaseConnector:
                     FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE
                 )
             """)
-            
+
+            # 6. Bảng tổng hợp cho Dashboard (được cập nhật cùng giao dịch với các thao tác ghi)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS hostel_stats (
+                    id TINYINT PRIMARY KEY,
+                    total_students INT NOT NULL DEFAULT 0,
+                    total_staff INT NOT NULL DEFAULT 0,
+                    total_rooms INT NOT NULL DEFAULT 0,
+                    occupied_rooms INT NOT NULL DEFAULT 0,
+                    available_rooms INT NOT NULL DEFAULT 0,
+                    full_rooms INT NOT NULL DEFAULT 0,
+                    total_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+                    total_payments INT NOT NULL DEFAULT 0
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS hostel_stats_monthly (
+                    month_start DATE PRIMARY KEY,
+                    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS hostel_stats_daily (
+                    stat_date DATE PRIMARY KEY,
+                    present INT NOT NULL DEFAULT 0,
+                    absent INT NOT NULL DEFAULT 0
+                )
+            """)
+
+            # 7. Phiên bản dữ liệu: tăng cùng giao dịch với mỗi thao tác ghi vào bảng tương ứng,
+            #    để các tiến trình khác biết bộ đệm dữ liệu tham chiếu đã cũ
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    name VARCHAR(20) PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 0
+                )
+            """)
+
+            for table, index_name, columns in self.INDEXES:
+                self._ensure_index(table, index_name, columns)
+            for table, index_name, columns in self.FULLTEXT_INDEXES:
+                self._ensure_index(table, index_name, columns, fulltext=True)
+            added = self._ensure_column('hostel_stats', 'total_payments', "INT NOT NULL DEFAULT 0")
+
             self.conn.commit()
             print("Tất cả các bảng đã được kiểm tra/tạo thành công.")
+
+            # Lần chạy đầu tiên (hoặc CSDL cũ chưa có bảng / cột tổng hợp): tính lại từ dữ liệu gốc
+            self.cursor.execute("SELECT id FROM hostel_stats WHERE id = 1")
+            if not self.cursor.fetchone() or added:
+                self.rebuild_stats()
         except Error as e:
             print(f"Lỗi khi tạo bảng: {e}")
 
+    def _ensure_index(self, table, index_name, columns, fulltext=False):
+        """Tạo index nếu chưa có (CREATE TABLE IF NOT EXISTS không thêm index cho bảng cũ)."""
+        if self.backend == 'sqlite':
+            # SQLite không có FULLTEXT ngram: search_students quét LIKE '%...%' thay thế
+            if not fulltext:
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+            return
+        self.cursor.execute(
+            "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (table, index_name)
+        )
+        if not self.cursor.fetchone():
+            if fulltext:
+                self.cursor.execute(f"CREATE FULLTEXT INDEX {index_name} ON {table} ({columns}) WITH PARSER ngram")
+            else:
+                self.cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+
+    def _ensure_column(self, table, column, definition):
+        """Thêm cột nếu bảng cũ chưa có (CREATE TABLE IF NOT EXISTS không sửa bảng đã tồn tại); True nếu vừa thêm."""
+        if self.backend == 'sqlite':
+            self.cursor.execute("SELECT 1 FROM pragma_table_info(%s) WHERE name = %s LIMIT 1", (table, column))
+        else:
+            self.cursor.execute(
+                "SELECT 1 FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+                (table, column)
+            )
+        if self.cursor.fetchone():
+            return False
+        self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+
     # --- Các hàm User (Login/Register) ---
 
+    @_with_connection
     def register_user(self, username, email, password):
         if not self.conn:
             return False, "Kết nối CSDL thất bại."
@@ -126,12 +496,16 @@ class DatabaseConnector:
             insert_query = "INSERT INTO users (username, email, password, role) VALUES (%s, %s, %s, %s)"
             values = (username, email, hashed_password, 'staff')
             self.cursor.execute(insert_query, values)
+            user_id = self.cursor.lastrowid
+            self._bump_stats(total_staff=1)
             self.conn.commit()
+            self._publish(ChangeEvent(USER, INSERT, (user_id,)))
             return True, "Đăng ký thành công!"
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi đăng ký: {e}"
 
+    @_read_primary
     def validate_login(self, username, password):
         if not self.conn:
             return False, "Kết nối CSDL thất bại."
@@ -149,6 +523,7 @@ class DatabaseConnector:
 
     # --- Hàm Dashboard ---
 
+    @_read_only
     def get_dashboard_stats(self):
         if not self.conn:
             return None
@@ -159,38 +534,153 @@ class DatabaseConnector:
             'present_today': 0, 'absent_today': 0
         }
         try:
-            self.cursor.execute("SELECT COUNT(*) as count FROM students")
-            stats['total_students'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM users WHERE role = 'staff'")
-            stats['total_staff'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM rooms")
-            stats['total_rooms'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM rooms WHERE occupied > 0")
-            stats['occupied_rooms'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM rooms WHERE status = 'Available'")
-            stats['available_rooms'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM rooms WHERE status = 'Full'")
-            stats['full_rooms'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT SUM(amount) as total FROM payments")
-            total_rev = self.cursor.fetchone()['total']
-            stats['total_revenue'] = total_rev if total_rev else 0.00
-            self.cursor.execute(
-                "SELECT SUM(amount) as total FROM payments WHERE YEAR(payment_date) = YEAR(CURDATE()) AND MONTH(payment_date) = MONTH(CURDATE())"
-            )
-            monthly_rev = self.cursor.fetchone()['total']
-            stats['monthly_revenue'] = monthly_rev if monthly_rev else 0.00
-            today = date.today().isoformat()
-            self.cursor.execute("SELECT COUNT(*) as count FROM attendance WHERE attendance_date = %s AND status = 'Present'", (today,))
-            stats['present_today'] = self.cursor.fetchone()['count']
-            self.cursor.execute("SELECT COUNT(*) as count FROM attendance WHERE attendance_date = %s AND status = 'Absent'", (today,))
-            stats['absent_today'] = self.cursor.fetchone()['count']
+            # Đọc từ các bảng tổng hợp: 3 lần tra khóa chính, không phụ thuộc kích thước dữ liệu
+            query = """
+                SELECT s.total_students, s.total_staff, s.total_rooms, s.occupied_rooms,
+                       s.available_rooms, s.full_rooms, s.total_revenue,
+                       m.revenue AS monthly_revenue,
+                       COALESCE(d.present, 0) AS present_today,
+                       COALESCE(d.absent, 0) AS absent_today
+                FROM hostel_stats s
+                LEFT JOIN hostel_stats_monthly m ON m.month_start = %s
+                LEFT JOIN hostel_stats_daily d ON d.stat_date = %s
+                WHERE s.id = 1
+            """
+            today = date.today()
+            self.cursor.execute(query, (month_range(today)[0], today.isoformat()))
+            row = self.cursor.fetchone()
+            if not row:
+                return stats
+            for key in ('total_students', 'total_staff', 'total_rooms', 'occupied_rooms',
+                        'available_rooms', 'full_rooms', 'present_today', 'absent_today'):
+                stats[key] = int(row[key])
+            stats['total_revenue'] = row['total_revenue'] if row['total_revenue'] else 0.00
+            stats['monthly_revenue'] = row['monthly_revenue'] if row['monthly_revenue'] else 0.00
             return stats
         except Error as e:
             print(f"Lỗi khi lấy số liệu Dashboard: {e}")
             return stats 
 
+    @_with_connection
+    def rebuild_stats(self):
+        """
+        Tính lại toàn bộ bảng tổng hợp từ dữ liệu gốc (lệnh đối soát).
+        Dùng khi khởi tạo lần đầu hoặc khi nghi ngờ số liệu bị lệch.
+        """
+        if not self.conn: return False, "Kết nối CSDL thất bại."
+        try:
+            self.cursor.execute("""
+                REPLACE INTO hostel_stats (id, total_students, total_staff, total_rooms, occupied_rooms,
+                                           available_rooms, full_rooms, total_revenue, total_payments)
+                SELECT 1,
+                       (SELECT COUNT(*) FROM students),
+                       (SELECT COUNT(*) FROM users WHERE role = 'staff'),
+                       r.total_rooms, r.occupied_rooms, r.available_rooms, r.full_rooms,
+                       (SELECT COALESCE(SUM(amount), 0) FROM payments),
+                       (SELECT COUNT(*) FROM payments)
+                FROM (
+                    SELECT COUNT(*) AS total_rooms,
+                           COALESCE(SUM(occupied > 0), 0) AS occupied_rooms,
+                           COALESCE(SUM(status = 'Available'), 0) AS available_rooms,
+                           COALESCE(SUM(status = 'Full'), 0) AS full_rooms
+                    FROM rooms
+                ) r
+            """)
+            self.cursor.execute("DELETE FROM hostel_stats_monthly")
+            self.cursor.execute("""
+                INSERT INTO hostel_stats_monthly (month_start, revenue)
+                SELECT LAST_DAY(payment_date - INTERVAL 1 MONTH) + INTERVAL 1 DAY AS month_start, SUM(amount)
+                FROM payments
+                GROUP BY month_start
+            """)
+            self.cursor.execute("DELETE FROM hostel_stats_daily")
+            self.cursor.execute("""
+                INSERT INTO hostel_stats_daily (stat_date, present, absent)
+                SELECT attendance_date, SUM(status = 'Present'), SUM(status = 'Absent')
+                FROM attendance
+                GROUP BY attendance_date
+            """)
+            self.conn.commit()
+            return True, "Đã tính lại số liệu tổng hợp."
+        except Error as e:
+            self.conn.rollback()
+            return False, f"Lỗi CSDL khi tính lại số liệu tổng hợp: {e}"
+
+    def _bump_stats(self, **deltas):
+        """Cộng dồn các bộ đếm trong hostel_stats (không commit, nằm trong giao dịch của hàm gọi)."""
+        deltas = {col: val for col, val in deltas.items() if val}
+        if not deltas:
+            return
+        assignments = ", ".join(f"{col} = {col} + %s" for col in deltas)
+        self.cursor.execute(f"UPDATE hostel_stats SET {assignments} WHERE id = 1", tuple(deltas.values()))
+
+    def _bump_version(self, *tables):
+        """Tăng phiên bản dữ liệu của các bảng (không commit, nằm trong giao dịch của hàm gọi)."""
+        values_sql = ", ".join(["(%s, 1)"] * len(tables))
+        self.cursor.execute(
+            f"INSERT INTO data_versions (name, version) VALUES {values_sql} ON DUPLICATE KEY UPDATE version = version + 1",
+            tables
+        )
+
+    # --- Bộ đệm dữ liệu tham chiếu ---
+
+    def _invalidate_reference(self, event):
+        table = 'rooms' if event.kind == ROOM else 'students'
+        self.reference_cache.invalidate(*self.REFERENCE_GROUPS[table])
+
+    def _check_versions(self):
+        """
+        Đọc data_versions (tối đa mỗi VERSION_CHECK_INTERVAL giây) và xóa bộ đệm của
+        các bảng đã bị ghi ở nơi khác. Chỉ là một lần đọc bảng vài dòng theo khóa chính.
+        """
+        now = time.monotonic()
+        if now - self._versions_checked < self.VERSION_CHECK_INTERVAL:
+            return
+        self._versions_checked = now
+        try:
+            self.cursor.execute("SELECT name, version FROM data_versions")
+            versions = {row['name']: row['version'] for row in self.cursor.fetchall()}
+        except Error as e:
+            print(f"Lỗi khi kiểm tra phiên bản dữ liệu: {e}")
+            return
+        changed = [name for name, version in versions.items() if self._versions.get(name) != version]
+        self._versions = versions
+        for name in changed:
+            self.reference_cache.invalidate(*self.REFERENCE_GROUPS.get(name, ()))
+
+    def _cached(self, key, loader):
+        """Đọc dữ liệu tham chiếu qua reference_cache. Trả về bản sao list để người gọi sửa thoải mái."""
+        self._check_versions()
+        return list(self.reference_cache.get(key, loader))
+
+    @staticmethod
+    def _room_stats_delta(before, after):
+        """Chênh lệch bộ đếm phòng giữa trạng thái trước/sau thay đổi (None = không tồn tại)."""
+        def counters(room):
+            if not room:
+                return (0, 0, 0, 0)
+            return (1, int(room['occupied'] > 0), int(room['status'] == 'Available'), int(room['status'] == 'Full'))
+        delta = [a - b for a, b in zip(counters(after), counters(before))]
+        return dict(total_rooms=delta[0], occupied_rooms=delta[1], available_rooms=delta[2], full_rooms=delta[3])
+
+    def _bump_room_stats(self, before, after):
+        """Cập nhật bộ đếm phòng theo trạng thái phòng trước/sau thay đổi."""
+        self._bump_stats(**self._room_stats_delta(before, after))
+
+    def _bump_daily_stats(self, attendance_date, status, rowcount):
+        """Cập nhật số có mặt/vắng của một ngày sau một lệnh upsert điểm danh."""
+        if rowcount not in (1, 2):
+            return
+        present = 1 if status == 'Present' else -1 if rowcount == 2 else 0
+        absent = 1 if status == 'Absent' else -1 if rowcount == 2 else 0
+        self.cursor.execute("""
+            INSERT INTO hostel_stats_daily (stat_date, present, absent) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE present = present + VALUES(present), absent = absent + VALUES(absent)
+        """, (attendance_date, present, absent))
+
     # --- Các hàm Staff Management ---
 
+    @_read_only
     def get_all_users(self):
         if not self.conn: return []
         try:
@@ -201,6 +691,7 @@ class DatabaseConnector:
             print(f"Lỗi khi lấy danh sách nhân viên: {e}")
             return []
 
+    @_with_connection
     def delete_user(self, user_id):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
@@ -211,8 +702,12 @@ class DatabaseConnector:
                 return False, "Không thể xóa tài khoản Admin."
             delete_query = "DELETE FROM users WHERE id = %s"
             self.cursor.execute(delete_query, (user_id,))
+            deleted = self.cursor.rowcount
+            if deleted > 0 and user and user['role'] == 'staff':
+                self._bump_stats(total_staff=-1)
             self.conn.commit()
-            if self.cursor.rowcount > 0:
+            if deleted > 0:
+                self._publish(ChangeEvent(USER, DELETE, (user_id,)))
                 return True, "Nhân viên đã được xóa."
             else:
                 return False, "Không tìm thấy nhân viên."
@@ -220,6 +715,7 @@ class DatabaseConnector:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi xóa: {e}"
 
+    @_with_connection
     def reset_user_password(self, user_id, new_password):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
@@ -234,30 +730,39 @@ class DatabaseConnector:
 
     # --- Các hàm Room Management ---
 
+    @_read_only
     def get_room_types(self):
         if not self.conn: return []
         try:
-            query = "SELECT DISTINCT room_type FROM rooms ORDER BY room_type"
-            self.cursor.execute(query)
-            return [row['room_type'] for row in self.cursor.fetchall()]
+            def load():
+                query = "SELECT DISTINCT room_type FROM rooms ORDER BY room_type"
+                self.cursor.execute(query)
+                return [row['room_type'] for row in self.cursor.fetchall()]
+            return self._cached(('room_types',), load)
         except Error as e:
             print(f"Lỗi khi lấy loại phòng: {e}")
             return []
 
+    @_read_only
     def get_all_rooms(self, filter_type=None):
         if not self.conn: return []
         try:
-            if filter_type and filter_type != "All":
-                query = "SELECT * FROM rooms WHERE room_type = %s ORDER BY room_no"
-                self.cursor.execute(query, (filter_type,))
-            else:
-                query = "SELECT * FROM rooms ORDER BY room_no"
-                self.cursor.execute(query)
-            return self.cursor.fetchall()
+            if filter_type == "All":
+                filter_type = None
+            def load():
+                if filter_type:
+                    query = "SELECT * FROM rooms WHERE room_type = %s ORDER BY room_no"
+                    self.cursor.execute(query, (filter_type,))
+                else:
+                    query = "SELECT * FROM rooms ORDER BY room_no"
+                    self.cursor.execute(query)
+                return self.cursor.fetchall()
+            return self._cached(('rooms', filter_type), load)
         except Error as e:
             print(f"Lỗi khi lấy danh sách phòng: {e}")
             return []
 
+    @_read_only
     def get_room_by_no(self, room_no):
         if not self.conn: return None
         try:
@@ -268,6 +773,20 @@ class DatabaseConnector:
             print(f"Lỗi khi lấy phòng: {e}")
             return None
 
+    @_read_only
+    def get_rooms_by_no(self, room_nos):
+        """Lấy nhiều phòng theo room_no (dùng để cập nhật từng dòng theo sự kiện thay đổi)."""
+        if not self.conn or not room_nos: return []
+        try:
+            room_nos = list(room_nos)
+            placeholders = ", ".join(["%s"] * len(room_nos))
+            self.cursor.execute(f"SELECT * FROM rooms WHERE room_no IN ({placeholders}) ORDER BY room_no", room_nos)
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy phòng: {e}")
+            return []
+
+    @_with_connection
     def add_room(self, room_no, room_type, capacity, rent, status):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
@@ -275,23 +794,33 @@ class DatabaseConnector:
                 return False, f"Số phòng '{room_no}' đã tồn tại."
             query = "INSERT INTO rooms (room_no, room_type, capacity, rent, status, occupied) VALUES (%s, %s, %s, %s, %s, 0)"
             self.cursor.execute(query, (room_no, room_type, capacity, rent, status))
+            self._bump_room_stats(None, {'occupied': 0, 'status': status})
+            self._bump_version('rooms')
             self.conn.commit()
+            self._publish(ChangeEvent(ROOM, INSERT, (room_no,)))
             return True, "Phòng đã được thêm thành công."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi thêm phòng: {e}"
 
+    @_with_connection
     def update_room(self, room_no, room_type, capacity, rent, status):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
+            before = self.get_room_by_no(room_no)
             query = "UPDATE rooms SET room_type = %s, capacity = %s, rent = %s, status = %s WHERE room_no = %s"
             self.cursor.execute(query, (room_type, capacity, rent, status, room_no))
+            if before:
+                self._bump_room_stats(before, dict(before, status=status))
+            self._bump_version('rooms')
             self.conn.commit()
+            self._publish(ChangeEvent(ROOM, UPDATE, (room_no,)))
             return True, "Thông tin phòng đã được cập nhật."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi cập nhật: {e}"
 
+    @_with_connection
     def delete_room(self, room_no):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
@@ -300,8 +829,13 @@ class DatabaseConnector:
                 return False, "Không thể xóa phòng đang có sinh viên."
             query = "DELETE FROM rooms WHERE room_no = %s"
             self.cursor.execute(query, (room_no,))
+            deleted = self.cursor.rowcount
+            if deleted > 0:
+                self._bump_room_stats(room, None)
+                self._bump_version('rooms')
             self.conn.commit()
-            if self.cursor.rowcount > 0:
+            if deleted > 0:
+                self._publish(ChangeEvent(ROOM, DELETE, (room_no,)))
                 return True, "Phòng đã được xóa."
             else:
                 return False, "Không tìm thấy phòng."
@@ -311,51 +845,160 @@ class DatabaseConnector:
 
     # --- Các hàm Student Management ---
 
+    @_read_only
     def get_available_rooms(self):
         if not self.conn: return []
         try:
-            query = "SELECT room_no FROM rooms WHERE status = 'Available' ORDER BY room_no"
-            self.cursor.execute(query)
-            return [row['room_no'] for row in self.cursor.fetchall()]
+            def load():
+                query = "SELECT room_no FROM rooms WHERE status = 'Available' ORDER BY room_no"
+                self.cursor.execute(query)
+                return [row['room_no'] for row in self.cursor.fetchall()]
+            return self._cached(('available_rooms',), load)
         except Error as e:
             print(f"Lỗi khi lấy phòng còn trống: {e}")
             return []
 
     def _update_room_occupancy(self, room_no, change):
-        if not room_no: return
-        try:
-            query_update = "UPDATE rooms SET occupied = occupied + (%s) WHERE room_no = %s"
-            self.cursor.execute(query_update, (change, room_no))
-            room = self.get_room_by_no(room_no)
-            if not room: return
-            new_status = room['status']
-            if room['occupied'] >= room['capacity']:
-                new_status = 'Full'
-            elif room['occupied'] < room['capacity']:
-                if room['status'] != 'Maintenance':
-                    new_status = 'Available'
-            query_status = "UPDATE rooms SET status = %s WHERE room_no = %s"
-            self.cursor.execute(query_status, (new_status, room_no))
-            self.conn.commit()
-        except Error as e:
-            print(f"Lỗi khi cập nhật số lượng phòng: {e}")
-            self.conn.rollback()
+        """
+        Cập nhật số người ở và trạng thái phòng bằng MỘT lệnh UPDATE có điều kiện
+        (không commit, nằm trong giao dịch của hàm gọi).
+        Điều kiện đảm bảo occupied không vượt quá capacity (và không âm) kể cả khi
+        nhiều quầy cùng xếp phòng. Trả về True nếu đã cập nhật, False nếu phòng đã đầy,
+        None nếu phòng không tồn tại.
+        """
+        if not room_no: return True
+        # Khóa dòng phòng để lấy trạng thái trước khi đổi (cho bảng tổng hợp hostel_stats)
+        self.cursor.execute("SELECT occupied, capacity, status FROM rooms WHERE room_no = %s FOR UPDATE", (room_no,))
+        before = self.cursor.fetchone()
+        if not before: return None
+        # status được gán trước occupied nên cả hai đều tính trên giá trị cũ
+        query = """
+            UPDATE rooms
+            SET status = CASE
+                    WHEN occupied + %s >= capacity THEN 'Full'
+                    WHEN status = 'Maintenance' THEN 'Maintenance'
+                    ELSE 'Available'
+                END,
+                occupied = occupied + %s
+            WHERE room_no = %s AND occupied + %s >= 0 AND (%s <= 0 OR occupied + %s <= capacity)
+        """
+        self.cursor.execute(query, (change, change, room_no, change, change, change))
+        if self.cursor.rowcount == 0:
+            return False
+        occupied = before['occupied'] + change
+        if occupied >= before['capacity']:
+            new_status = 'Full'
+        elif before['status'] == 'Maintenance':
+            new_status = 'Maintenance'
+        else:
+            new_status = 'Available'
+        self._bump_room_stats(before, {'occupied': occupied, 'status': new_status})
+        self._bump_version('rooms')
+        return True
 
+    @_read_only
     def get_all_students(self, search_term=None):
         if not self.conn: return []
         try:
             if search_term:
-                query = "SELECT * FROM students WHERE name LIKE %s OR student_id LIKE %s ORDER BY student_id"
-                like_term = f"%{search_term}%"
-                self.cursor.execute(query, (like_term, like_term))
+                return self.search_students(search_term, limit=None)
+            query = "SELECT * FROM students ORDER BY student_id"
+            self.cursor.execute(query)
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy danh sách sinh viên: {e}")
+            return []
+
+    @_read_only
+    def get_students_page(self, after_id=None, limit=200, offset=0):
+        """
+        Lấy một trang sinh viên theo kiểu keyset (dựa trên khóa chính student_id).
+        after_id: student_id cuối cùng của trang trước (None = trang đầu).
+        offset: chỉ dùng khi after_id là None, để nhảy thẳng tới một vị trí (vd: kéo thanh cuộn).
+        """
+        if not self.conn: return []
+        try:
+            if after_id is None:
+                self.cursor.execute("SELECT * FROM students ORDER BY student_id LIMIT %s OFFSET %s", (limit, offset))
             else:
-                query = "SELECT * FROM students ORDER BY student_id"
-                self.cursor.execute(query)
+                self.cursor.execute("SELECT * FROM students WHERE student_id > %s ORDER BY student_id LIMIT %s", (after_id, limit))
             return self.cursor.fetchall()
         except Error as e:
             print(f"Lỗi khi lấy danh sách sinh viên: {e}")
             return []
 
+    @_read_only
+    def get_student_count(self):
+        """Tổng số sinh viên (đọc từ bảng tổng hợp, không quét bảng students)."""
+        if not self.conn: return 0
+        try:
+            self.cursor.execute("SELECT total_students FROM hostel_stats WHERE id = 1")
+            row = self.cursor.fetchone()
+            return int(row['total_students']) if row else 0
+        except Error as e:
+            print(f"Lỗi khi đếm sinh viên: {e}")
+            return 0
+
+    @_read_only
+    def search_students(self, search_term, limit=200, timeout_ms=500):
+        """
+        Tìm sinh viên theo tên hoặc mã, dùng index thay cho LIKE '%...%':
+          1. Khớp tiền tố (student_id, name) qua index B-tree.
+          2. Khớp chuỗi con qua index FULLTEXT ngram (khi từ khóa đủ dài; SQLite: LIKE '%...%').
+        Kết quả tiền tố xếp trước; limit=None để lấy tất cả.
+        timeout_ms: giới hạn thời gian chạy trên server để truy vấn cũ không chiếm kết nối.
+        """
+        if not self.conn: return []
+        term = (search_term or "").strip()
+        if not term:
+            return []
+        hint = f"/*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */" if timeout_ms else ""
+        limit_sql = "LIMIT %s" if limit else ""
+        limit_params = (limit,) if limit else ()
+        try:
+            results, seen = [], set()
+
+            def collect(rows):
+                for row in rows:
+                    if row['student_id'] not in seen:
+                        seen.add(row['student_id'])
+                        results.append(row)
+
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            prefix = escaped + "%"
+            self.cursor.execute(
+                f"SELECT {hint} * FROM students WHERE student_id LIKE %s ORDER BY student_id {limit_sql}",
+                (prefix, *limit_params)
+            )
+            collect(self.cursor.fetchall())
+            self.cursor.execute(
+                f"SELECT {hint} * FROM students WHERE name LIKE %s ORDER BY name, student_id {limit_sql}",
+                (prefix, *limit_params)
+            )
+            collect(self.cursor.fetchall())
+
+            if self.backend == 'sqlite' and (not limit or len(results) < limit):
+                # SQLite không có FULLTEXT ngram: quét chuỗi con (dữ liệu chi nhánh nhỏ)
+                pattern = "%" + escaped + "%"
+                self.cursor.execute(
+                    f"SELECT * FROM students WHERE name LIKE %s OR student_id LIKE %s ORDER BY student_id {limit_sql}",
+                    (pattern, pattern, *limit_params)
+                )
+                collect(self.cursor.fetchall())
+            elif len(term) >= self.NGRAM_SIZE and (not limit or len(results) < limit):
+                phrase = '"' + term.replace('"', ' ') + '"'
+                self.cursor.execute(
+                    f"SELECT {hint} * FROM students WHERE MATCH(name, student_id) AGAINST (%s IN BOOLEAN MODE) ORDER BY student_id {limit_sql}",
+                    (phrase, *limit_params)
+                )
+                collect(self.cursor.fetchall())
+
+            return results[:limit] if limit else results
+        except Error as e:
+            print(f"Lỗi khi tìm kiếm sinh viên: {e}")
+            return []
+
+    @_read_only
     def get_student_by_id(self, student_id):
         if not self.conn: return None
         try:
@@ -366,36 +1009,285 @@ class DatabaseConnector:
             print(f"Lỗi khi lấy sinh viên: {e}")
             return None
 
+    @_read_only
+    def get_students_by_ids(self, student_ids):
+        """Lấy nhiều sinh viên theo student_id (dùng để cập nhật từng dòng theo sự kiện thay đổi)."""
+        if not self.conn or not student_ids: return []
+        try:
+            student_ids = list(student_ids)
+            placeholders = ", ".join(["%s"] * len(student_ids))
+            self.cursor.execute(f"SELECT * FROM students WHERE student_id IN ({placeholders}) ORDER BY student_id", student_ids)
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy sinh viên: {e}")
+            return []
+
+    @_with_connection
     def add_student(self, data):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
             if self.get_student_by_id(data['student_id']):
                 return False, f"ID sinh viên '{data['student_id']}' đã tồn tại."
+            updated = self._update_room_occupancy(data['room_no'], change=1)
+            if not updated:
+                self.conn.rollback()
+                if updated is None:
+                    return False, f"Không tìm thấy phòng '{data['room_no']}'."
+                return False, f"Phòng '{data['room_no']}' đã đầy."
             query = "INSERT INTO students (student_id, name, gender, age, email, contact, admission_date, room_no) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
             self.cursor.execute(query, (data['student_id'], data['name'], data['gender'], data['age'], data['email'], data['contact'], data['admission_date'], data['room_no']))
-            self._update_room_occupancy(data['room_no'], change=1)
+            self._bump_stats(total_students=1)
+            self._bump_version('students')
+            self.conn.commit()
+            self._publish(ChangeEvent(STUDENT, INSERT, (data['student_id'],)),
+                          ChangeEvent(ROOM, UPDATE, [data['room_no']] if data['room_no'] else ()))
             return True, "Thêm sinh viên thành công."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi thêm sinh viên: {e}"
 
+    @_with_connection
+    def add_students_bulk(self, students):
+        """
+        Thêm nhiều sinh viên trong MỘT giao dịch (dùng cho nhập file).
+        students: list dict cùng khóa như add_student.
+        Dòng bị trùng mã/email hoặc vượt sức chứa phòng sẽ bị loại, các dòng còn lại vẫn được thêm.
+        Trả về (số dòng đã thêm, [(vị trí trong list, lý do), ...]).
+        """
+        if not self.conn: return 0, [(i, "Kết nối CSDL thất bại.") for i in range(len(students))]
+        if not students: return 0, []
+        rejected = []
+        try:
+            def in_list(values):
+                return ", ".join(["%s"] * len(values))
+
+            ids = list({s['student_id'] for s in students})
+            self.cursor.execute(f"SELECT student_id FROM students WHERE student_id IN ({in_list(ids)})", ids)
+            taken_ids = {row['student_id'] for row in self.cursor.fetchall()}
+            emails = list({s['email'] for s in students if s.get('email')})
+            taken_emails = set()
+            if emails:
+                self.cursor.execute(f"SELECT email FROM students WHERE email IN ({in_list(emails)})", emails)
+                taken_emails = {row['email'] for row in self.cursor.fetchall()}
+
+            # Khóa các phòng liên quan (theo thứ tự room_no) và tính chỗ trống còn lại
+            room_nos = sorted({s['room_no'] for s in students if s.get('room_no')})
+            rooms = {}
+            if room_nos:
+                self.cursor.execute(
+                    f"SELECT room_no, capacity, occupied, status FROM rooms WHERE room_no IN ({in_list(room_nos)}) ORDER BY room_no FOR UPDATE",
+                    room_nos
+                )
+                rooms = {row['room_no']: row for row in self.cursor.fetchall()}
+            free = {room_no: room['capacity'] - room['occupied'] for room_no, room in rooms.items()}
+
+            accepted = []
+            for i, s in enumerate(students):
+                room_no = s.get('room_no')
+                if s['student_id'] in taken_ids:
+                    rejected.append((i, f"ID sinh viên '{s['student_id']}' đã tồn tại."))
+                elif s.get('email') and s['email'] in taken_emails:
+                    rejected.append((i, f"Email '{s['email']}' đã tồn tại."))
+                elif room_no and room_no not in rooms:
+                    rejected.append((i, f"Không tìm thấy phòng '{room_no}'."))
+                elif room_no and free[room_no] <= 0:
+                    rejected.append((i, f"Phòng '{room_no}' đã đầy."))
+                else:
+                    taken_ids.add(s['student_id'])
+                    if s.get('email'):
+                        taken_emails.add(s['email'])
+                    if room_no:
+                        free[room_no] -= 1
+                    accepted.append(s)
+
+            if accepted:
+                query = "INSERT INTO students (student_id, name, gender, age, email, contact, admission_date, room_no) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+                self.cursor.executemany(query, [
+                    (s['student_id'], s['name'], s.get('gender'), s.get('age'), s.get('email') or None,
+                     s.get('contact'), s.get('admission_date'), s.get('room_no'))
+                    for s in accepted
+                ])
+
+                # Tính lại occupied/status một lần cho cả lô bằng một truy vấn tập hợp
+                touched = sorted({s['room_no'] for s in accepted if s.get('room_no')})
+                self._recount_rooms({room_no: rooms[room_no] for room_no in touched})
+                self._bump_stats(total_students=len(accepted))
+                self._bump_version('students')
+
+            self.conn.commit()
+            if accepted:
+                self._publish(ChangeEvent(STUDENT, INSERT, [s['student_id'] for s in accepted]),
+                              ChangeEvent(ROOM, UPDATE, {s['room_no'] for s in accepted if s.get('room_no')}))
+            return len(accepted), rejected
+        except Error as e:
+            self.conn.rollback()
+            already = {i for i, _ in rejected}
+            return 0, rejected + [(i, f"Lỗi CSDL khi thêm sinh viên: {e}") for i in range(len(students)) if i not in already]
+
+    @_with_connection
+    def allocate_rooms(self, requests=None, room_type=None, max_rent=None, separate_genders=True):
+        """
+        Xếp phòng hàng loạt (room_allocation.allocate) và ghi toàn bộ trong MỘT giao dịch.
+        requests: list dict {student_id, room_type?, max_rent?} của các sinh viên cần xếp;
+                  None = mọi sinh viên chưa có phòng (theo ngày nhập học), dùng room_type / max_rent chung.
+        separate_genders: chỉ xếp vào phòng trống hoặc phòng đang có người cùng giới tính.
+        Trả về (placements [(student_id, room_no)], unplaced [(student_id, lý do)]).
+        """
+        if not self.conn: return [], [(req['student_id'], "Kết nối CSDL thất bại.") for req in requests or []]
+        def in_list(values):
+            return ", ".join(["%s"] * len(values))
+
+        wanted, unplaced = [], []
+        try:
+            # Khóa sinh viên trước rồi mới khóa phòng (cùng thứ tự với update_student)
+            if requests is None:
+                self.cursor.execute("SELECT student_id, gender, room_no FROM students WHERE room_no IS NULL ORDER BY admission_date, student_id FOR UPDATE")
+                wanted = [dict(student, room_type=room_type, max_rent=max_rent) for student in self.cursor.fetchall()]
+            elif requests:
+                ids = [req['student_id'] for req in requests]
+                self.cursor.execute(f"SELECT student_id, gender, room_no FROM students WHERE student_id IN ({in_list(ids)}) FOR UPDATE", ids)
+                found = {row['student_id']: row for row in self.cursor.fetchall()}
+                for req in requests:
+                    student = found.get(req['student_id'])
+                    if student is None:
+                        unplaced.append((req['student_id'], "Không tìm thấy sinh viên."))
+                    elif student['room_no']:
+                        unplaced.append((req['student_id'], f"Sinh viên đã ở phòng '{student['room_no']}'."))
+                    else:
+                        wanted.append(dict(student, room_type=req.get('room_type', room_type), max_rent=req.get('max_rent', max_rent)))
+            if not wanted:
+                self.conn.rollback() # Nhả khóa
+                return [], unplaced
+
+            # Khóa các phòng còn chỗ theo thứ tự room_no (như add_students_bulk)
+            types = {student['room_type'] for student in wanted}
+            type_filter, params = "", []
+            if None not in types:
+                type_filter = f"AND room_type IN ({in_list(types)})"
+                params = sorted(types)
+            self.cursor.execute(
+                f"SELECT room_no, room_type, capacity, occupied, rent, status FROM rooms WHERE status = 'Available' AND occupied < capacity {type_filter} ORDER BY room_no FOR UPDATE",
+                params
+            )
+            rooms = self.cursor.fetchall()
+            occupied = [room['room_no'] for room in rooms if room['occupied'] > 0]
+            if separate_genders and occupied:
+                self.cursor.execute(
+                    f"SELECT room_no, MIN(gender) AS first, MAX(gender) AS last FROM students WHERE room_no IN ({in_list(occupied)}) GROUP BY room_no",
+                    occupied
+                )
+                genders = {row['room_no']: row['first'] if row['first'] == row['last'] else MIXED for row in self.cursor.fetchall()}
+                for room in rooms:
+                    room['gender'] = genders.get(room['room_no'])
+
+            placements, rejected = allocate(rooms, wanted, separate_genders)
+            unplaced += rejected
+            if placements:
+                for start in range(0, len(placements), self.ALLOCATION_CHUNK):
+                    part = placements[start:start + self.ALLOCATION_CHUNK]
+                    cases = " ".join(["WHEN %s THEN %s"] * len(part))
+                    self.cursor.execute(
+                        f"UPDATE students SET room_no = CASE student_id {cases} END WHERE student_id IN ({in_list(part)})",
+                        [value for placement in part for value in placement] + [student_id for student_id, _ in part]
+                    )
+                touched = {room_no for _, room_no in placements}
+                self._recount_rooms({room['room_no']: room for room in rooms if room['room_no'] in touched})
+                self._bump_version('students')
+            self.conn.commit()
+            if placements:
+                self._publish(ChangeEvent(STUDENT, UPDATE, [student_id for student_id, _ in placements]),
+                              ChangeEvent(ROOM, UPDATE, touched))
+            return placements, unplaced
+        except Error as e:
+            self.conn.rollback()
+            return [], unplaced + [(student['student_id'], f"Lỗi CSDL khi xếp phòng: {e}") for student in wanted]
+
+    def _recount_rooms(self, before):
+        """
+        Tính lại occupied/status của các phòng bằng một truy vấn tập hợp, rồi cập nhật hostel_stats
+        (không commit, nằm trong giao dịch của hàm gọi).
+        before: room_no -> dòng phòng (occupied, status) đã khóa FOR UPDATE trước khi thay đổi.
+        """
+        if not before:
+            return
+        touched = sorted(before)
+        placeholders = ", ".join(["%s"] * len(touched))
+        # Truy vấn con tương quan thay cho UPDATE ... JOIN: chạy được trên cả MySQL và SQLite,
+        # mỗi phòng là một lần đếm trên index (room_no, name, student_id)
+        self.cursor.execute(f"""
+            UPDATE rooms
+            SET status = CASE
+                    WHEN (SELECT COUNT(*) FROM students s WHERE s.room_no = rooms.room_no) >= capacity THEN 'Full'
+                    WHEN status = 'Maintenance' THEN 'Maintenance'
+                    ELSE 'Available'
+                END,
+                occupied = (SELECT COUNT(*) FROM students s WHERE s.room_no = rooms.room_no)
+            WHERE room_no IN ({placeholders})
+        """, touched)
+        self.cursor.execute(f"SELECT room_no, occupied, status FROM rooms WHERE room_no IN ({placeholders})", touched)
+        deltas = {}
+        for after in self.cursor.fetchall():
+            for key, value in self._room_stats_delta(before[after['room_no']], after).items():
+                deltas[key] = deltas.get(key, 0) + value
+        self._bump_stats(**deltas)
+        self._bump_version('rooms')
+
+    @_with_connection
     def update_student(self, old_student_id, data, old_room_no):
+        """
+        Sửa thông tin sinh viên (kể cả đổi mã / đổi phòng) trong MỘT giao dịch.
+        old_room_no: phòng màn hình đang hiển thị; phòng cũ thực tế được đọc lại từ dòng đã khóa.
+        """
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
             if old_student_id != data['student_id']:
                 if self.get_student_by_id(data['student_id']):
                     return False, f"ID sinh viên mới '{data['student_id']}' đã tồn tại."
+            # Khóa sinh viên trước rồi mới khóa phòng (cùng thứ tự với allocate_rooms);
+            # phòng cũ đọc lại trong giao dịch thay vì tin giá trị màn hình đã hiển thị
+            self.cursor.execute("SELECT room_no FROM students WHERE student_id = %s FOR UPDATE", (old_student_id,))
+            student = self.cursor.fetchone()
+            if not student:
+                self.conn.rollback()
+                return False, "Không tìm thấy sinh viên."
+            old_room_no, new_room_no = student['room_no'], data['room_no']
+            if old_room_no != new_room_no:
+                # Khóa cả hai phòng theo thứ tự room_no TRƯỚC khi sửa dòng sinh viên: kiểm tra khóa ngoại
+                # của lệnh UPDATE students giữ khóa chia sẻ trên phòng mới, hai quầy cùng chuyển vào một
+                # phòng rồi cùng nâng lên khóa ghi sẽ bị InnoDB hủy một bên (deadlock 1213)
+                room_nos = sorted(room for room in (old_room_no, new_room_no) if room)
+                placeholders = ", ".join(["%s"] * len(room_nos))
+                self.cursor.execute(f"SELECT room_no FROM rooms WHERE room_no IN ({placeholders}) ORDER BY room_no FOR UPDATE", room_nos)
+                locked = {row['room_no'] for row in self.cursor.fetchall()}
+                if new_room_no and new_room_no not in locked:
+                    self.conn.rollback()
+                    return False, f"Không tìm thấy phòng '{new_room_no}'."
+                moves = sorted([(old_room_no, -1), (new_room_no, 1)], key=lambda move: move[0] or "")
+                for room_no, change in moves:
+                    updated = self._update_room_occupancy(room_no, change)
+                    if not updated and change > 0:
+                        self.conn.rollback()
+                        if updated is None:
+                            return False, f"Không tìm thấy phòng '{new_room_no}'."
+                        return False, f"Phòng '{new_room_no}' đã đầy."
             query = "UPDATE students SET student_id = %s, name = %s, gender = %s, age = %s, email = %s, contact = %s, admission_date = %s, room_no = %s WHERE student_id = %s"
-            self.cursor.execute(query, (data['student_id'], data['name'], data['gender'], data['age'], data['email'], data['contact'], data['admission_date'], data['room_no'], old_student_id))
-            new_room_no = data['room_no']
+            self.cursor.execute(query, (data['student_id'], data['name'], data['gender'], data['age'], data['email'], data['contact'], data['admission_date'], new_room_no, old_student_id))
+            self._bump_version('students')
+            self.conn.commit()
+            if old_student_id != data['student_id']:
+                # Đổi mã: vị trí của dòng trong bảng (sắp theo mã) cũng đổi
+                events = [ChangeEvent(STUDENT, DELETE, (old_student_id,)), ChangeEvent(STUDENT, INSERT, (data['student_id'],))]
+            else:
+                events = [ChangeEvent(STUDENT, UPDATE, (old_student_id,))]
             if old_room_no != new_room_no:
-                self._update_room_occupancy(old_room_no, change=-1)
-                self._update_room_occupancy(new_room_no, change=1)
+                events.append(ChangeEvent(ROOM, UPDATE, [room for room in (old_room_no, new_room_no) if room]))
+            self._publish(*events)
             return True, "Cập nhật sinh viên thành công."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi cập nhật sinh viên: {e}"
 
+    @_with_connection
     def delete_student(self, student_id):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
@@ -403,9 +1295,23 @@ class DatabaseConnector:
             if not student:
                 return False, "Không tìm thấy sinh viên."
             room_no = student['room_no']
+            # Điểm danh của sinh viên sẽ bị xóa theo (ON DELETE CASCADE): trừ khỏi số liệu theo ngày
+            self.cursor.execute("""
+                UPDATE hostel_stats_daily
+                SET present = present - (SELECT COUNT(*) FROM attendance a WHERE a.student_id = %s
+                                         AND a.attendance_date = hostel_stats_daily.stat_date AND a.status = 'Present'),
+                    absent = absent - (SELECT COUNT(*) FROM attendance a WHERE a.student_id = %s
+                                       AND a.attendance_date = hostel_stats_daily.stat_date AND a.status = 'Absent')
+                WHERE stat_date IN (SELECT attendance_date FROM attendance WHERE student_id = %s)
+            """, (student_id, student_id, student_id))
             query = "DELETE FROM students WHERE student_id = %s"
             self.cursor.execute(query, (student_id,))
             self._update_room_occupancy(room_no, change=-1)
+            self._bump_stats(total_students=-1)
+            self._bump_version('students')
+            self.conn.commit()
+            self._publish(ChangeEvent(STUDENT, DELETE, (student_id,)),
+                          ChangeEvent(ROOM, UPDATE, [room_no] if room_no else ()))
             return True, "Xóa sinh viên thành công."
         except Error as e:
             self.conn.rollback()
@@ -415,49 +1321,166 @@ class DatabaseConnector:
 
     # --- Các hàm Payment Management ---
 
+    @_read_only
     def get_student_list_for_payments(self):
         if not self.conn: return []
         try:
-            query = "SELECT student_id, name FROM students ORDER BY name"
-            self.cursor.execute(query)
-            return self.cursor.fetchall() 
+            def load():
+                query = "SELECT student_id, name FROM students ORDER BY name"
+                self.cursor.execute(query)
+                return self.cursor.fetchall()
+            return self._cached(('student_names',), load)
         except Error as e:
             print(f"Lỗi khi lấy danh sách sinh viên: {e}")
             return []
 
+    @_with_connection
     def add_payment(self, student_id, amount, payment_date, method):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
             query = "INSERT INTO payments (student_id, amount, payment_date, method) VALUES (%s, %s, %s, %s)"
             self.cursor.execute(query, (student_id, amount, payment_date, method))
+            payment_id = self.cursor.lastrowid
+            self._bump_stats(total_revenue=amount, total_payments=1)
+            self.cursor.execute("""
+                INSERT INTO hostel_stats_monthly (month_start, revenue)
+                VALUES (LAST_DAY(%s - INTERVAL 1 MONTH) + INTERVAL 1 DAY, %s)
+                ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue)
+            """, (payment_date, amount))
             self.conn.commit()
+            self._publish(ChangeEvent(PAYMENT, INSERT, (payment_id,), refs={STUDENT: (student_id,)}))
             return True, "Thêm thanh toán thành công."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi thêm thanh toán: {e}"
 
+    @_read_only
     def get_all_payments(self):
         if not self.conn: return []
         try:
-            query = "SELECT p.payment_id, s.name, p.amount, p.payment_date, p.method FROM payments p JOIN students s ON p.student_id = s.student_id ORDER BY p.payment_date DESC, p.payment_id DESC"
-            self.cursor.execute(query)
+            self.cursor.execute(self.REPORT_QUERIES['payments'])
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy lịch sử thanh toán: {e}")
+            return []
+
+    @_read_only
+    def get_payments_page(self, after=None, limit=200, offset=0):
+        """
+        Lấy một trang lịch sử thanh toán (mới nhất trước) theo kiểu keyset.
+        after: (payment_date, payment_id) của dòng cuối trang trước (None = trang đầu).
+        offset: chỉ dùng khi after là None, để nhảy thẳng tới một vị trí (vd: kéo thanh cuộn).
+        """
+        if not self.conn: return []
+        try:
+            if after is None and offset:
+                # Deferred join: bỏ qua 'offset' dòng chỉ trên index (payment_date, payment_id),
+                # rồi mới đọc dữ liệu đầy đủ cho đúng một trang
+                query = """
+                    SELECT p.payment_id, s.name, p.amount, p.payment_date, p.method
+                    FROM (SELECT payment_id FROM payments ORDER BY payment_date DESC, payment_id DESC LIMIT %s OFFSET %s) page
+                    JOIN payments p ON p.payment_id = page.payment_id
+                    LEFT JOIN students s ON p.student_id = s.student_id
+                    ORDER BY p.payment_date DESC, p.payment_id DESC
+                """
+                self.cursor.execute(query, (limit, offset))
+                return self.cursor.fetchall()
+            where, params = "", ()
+            if after is not None:
+                last_date, last_id = after
+                where = "WHERE p.payment_date < %s OR (p.payment_date = %s AND p.payment_id < %s)"
+                params = (last_date, last_date, last_id)
+            query = f"SELECT p.payment_id, s.name, p.amount, p.payment_date, p.method FROM payments p LEFT JOIN students s ON p.student_id = s.student_id {where} ORDER BY p.payment_date DESC, p.payment_id DESC LIMIT %s"
+            self.cursor.execute(query, (*params, limit))
             return self.cursor.fetchall()
         except Error as e:
             print(f"Lỗi khi lấy lịch sử thanh toán: {e}")
             return []
+
+    @_read_only
+    def get_payment_count(self):
+        """Tổng số thanh toán, đọc từ bộ đếm hostel_stats (khớp với số dòng của get_payments_page)."""
+        if not self.conn: return 0
+        try:
+            self.cursor.execute("SELECT total_payments FROM hostel_stats WHERE id = 1")
+            row = self.cursor.fetchone()
+            return int(row['total_payments']) if row else 0
+        except Error as e:
+            print(f"Lỗi khi đếm thanh toán: {e}")
+            return 0
             
-    def get_due_summary(self):
+    @_read_only
+    def get_due_summary(self, student_ids=None, room_nos=None):
+        """
+        Công nợ tháng hiện tại của mọi sinh viên đang ở phòng.
+        student_ids / room_nos: chỉ lấy dòng của các sinh viên / phòng này (cập nhật theo sự kiện thay đổi).
+        """
         if not self.conn: return []
         try:
-            query = "SELECT s.student_id, s.name, s.email, r.room_no, r.rent, COALESCE(SUM(p.amount), 0) AS total_paid, (r.rent - COALESCE(SUM(p.amount), 0)) AS due_amount FROM students s JOIN rooms r ON s.room_no = r.room_no LEFT JOIN payments p ON s.student_id = p.student_id AND YEAR(p.payment_date) = YEAR(CURDATE()) AND MONTH(p.payment_date) = MONTH(CURDATE()) GROUP BY s.student_id, s.name, s.email, r.room_no, r.rent ORDER BY due_amount DESC, s.name"
-            self.cursor.execute(query)
+            where, params = "", list(month_range())
+            if student_ids is not None or room_nos is not None:
+                column, values = ('s.student_id', list(student_ids)) if student_ids is not None else ('r.room_no', list(room_nos))
+                if not values:
+                    return []
+                placeholders = ", ".join(["%s"] * len(values))
+                where = f"WHERE {column} IN ({placeholders})"
+                params += values
+            query = f"{self.DUE_SUMMARY_SELECT} {where} {self.DUE_SUMMARY_GROUP_BY}"
+            self.cursor.execute(query, params)
             return self.cursor.fetchall()
         except Error as e:
             print(f"Lỗi khi lấy tóm tắt công nợ: {e}")
             return []
 
+    @_read_only
+    def get_due_summary_page(self, after=None, limit=200, offset=0):
+        """
+        Lấy một trang công nợ tháng hiện tại, sắp xếp theo (room_no, name, student_id) như bảng điểm danh.
+        after: (room_no, name, student_id) của dòng cuối trang trước (None = trang đầu).
+        offset: chỉ dùng khi after là None, để nhảy thẳng tới một vị trí (vd: kéo thanh cuộn).
+        Chỉ các sinh viên của trang được cộng tiền đã trả (không GROUP BY trên cả bảng).
+        """
+        if not self.conn: return []
+        try:
+            where, params = "", ()
+            if after is not None:
+                last_room, last_name, last_id = after
+                where = "AND (room_no > %s OR (room_no = %s AND (name > %s OR (name = %s AND student_id > %s))))"
+                params = (last_room, last_room, last_name, last_name, last_id)
+                offset = 0
+            # Deferred join trên index (room_no, name, student_id), rồi cộng thanh toán của đúng trang đó
+            # qua covering index (student_id, payment_date, amount)
+            query = f"""
+                SELECT s.student_id, s.name, s.email, r.room_no, r.rent,
+                       COALESCE(SUM(p.amount), 0) AS total_paid, (r.rent - COALESCE(SUM(p.amount), 0)) AS due_amount
+                FROM (SELECT student_id FROM students WHERE room_no IS NOT NULL {where}
+                      ORDER BY room_no, name, student_id LIMIT %s OFFSET %s) page
+                JOIN students s ON s.student_id = page.student_id
+                JOIN rooms r ON r.room_no = s.room_no
+                LEFT JOIN payments p ON p.student_id = s.student_id AND p.payment_date >= %s AND p.payment_date < %s
+                GROUP BY s.student_id, s.name, s.email, r.room_no, r.rent
+                ORDER BY r.room_no, s.name, s.student_id
+            """
+            self.cursor.execute(query, (*params, limit, offset, *month_range()))
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy tóm tắt công nợ: {e}")
+            return []
+
+    @_read_only
+    def get_due_count(self):
+        """Số dòng của bảng công nợ (sinh viên đang ở phòng) = tổng occupied, đếm trên bảng rooms."""
+        if not self.conn: return 0
+        try:
+            self.cursor.execute("SELECT COALESCE(SUM(occupied), 0) AS total FROM rooms")
+            return int(self.cursor.fetchone()['total'])
+        except Error as e:
+            print(f"Lỗi khi đếm công nợ: {e}")
+            return 0
+
     # --- Các hàm Attendance Management ---
 
+    @_read_only
     def get_attendance_for_date(self, attendance_date):
         if not self.conn: return []
         try:
@@ -468,50 +1491,281 @@ class DatabaseConnector:
             print(f"Lỗi khi lấy dữ liệu điểm danh: {e}")
             return []
 
+    @_read_only
+    def get_attendance_for_students(self, attendance_date, student_ids):
+        """Điểm danh của một ngày cho các sinh viên cho trước (cập nhật theo sự kiện thay đổi)."""
+        if not self.conn or not student_ids: return []
+        try:
+            student_ids = list(student_ids)
+            placeholders = ", ".join(["%s"] * len(student_ids))
+            query = f"SELECT s.student_id, s.name, s.room_no, a.status FROM students s LEFT JOIN attendance a ON s.student_id = a.student_id AND a.attendance_date = %s WHERE s.student_id IN ({placeholders})"
+            self.cursor.execute(query, (attendance_date, *student_ids))
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy dữ liệu điểm danh: {e}")
+            return []
+
+    @_read_only
+    def get_attendance_page(self, attendance_date, after=None, limit=200, offset=0):
+        """
+        Lấy một trang điểm danh của một ngày, sắp xếp theo (room_no, name, student_id).
+        after: (room_no, name, student_id) của dòng cuối trang trước (None = trang đầu).
+        offset: chỉ dùng khi after là None, để nhảy thẳng tới một vị trí (vd: kéo thanh cuộn).
+        """
+        if not self.conn: return []
+        try:
+            if after is None and offset:
+                # Deferred join trên index (room_no, name, student_id), như get_payments_page
+                query = """
+                    SELECT s.student_id, s.name, s.room_no, a.status
+                    FROM (SELECT student_id FROM students ORDER BY room_no, name, student_id LIMIT %s OFFSET %s) page
+                    JOIN students s ON s.student_id = page.student_id
+                    LEFT JOIN attendance a ON s.student_id = a.student_id AND a.attendance_date = %s
+                    ORDER BY s.room_no, s.name, s.student_id
+                """
+                self.cursor.execute(query, (limit, offset, attendance_date))
+                return self.cursor.fetchall()
+            where, params = "", ()
+            if after is not None:
+                last_room, last_name, last_id = after
+                tail = "(s.name > %s OR (s.name = %s AND s.student_id > %s))"
+                if last_room is None:
+                    # NULL đứng đầu khi sắp xếp tăng dần
+                    where = f"WHERE (s.room_no IS NULL AND {tail}) OR s.room_no IS NOT NULL"
+                    params = (last_name, last_name, last_id)
+                else:
+                    where = f"WHERE s.room_no > %s OR (s.room_no = %s AND {tail})"
+                    params = (last_room, last_room, last_name, last_name, last_id)
+            query = f"SELECT s.student_id, s.name, s.room_no, a.status FROM students s LEFT JOIN attendance a ON s.student_id = a.student_id AND a.attendance_date = %s {where} ORDER BY s.room_no, s.name, s.student_id LIMIT %s"
+            self.cursor.execute(query, (attendance_date, *params, limit))
+            return self.cursor.fetchall()
+        except Error as e:
+            print(f"Lỗi khi lấy dữ liệu điểm danh: {e}")
+            return []
+
+    @_with_connection
     def mark_attendance(self, student_id, attendance_date, status):
         if not self.conn: return False, "Kết nối CSDL thất bại."
         try:
-            query = "INSERT INTO attendance (student_id, attendance_date, status) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE status = %s"
-            self.cursor.execute(query, (student_id, attendance_date, status, status))
+            query = "INSERT INTO attendance (student_id, attendance_date, status) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE status = VALUES(status)"
+            self.cursor.execute(query, (student_id, attendance_date, status))
+            # rowcount: 1 = dòng mới, 2 = đổi trạng thái (Present <-> Absent), 0 = không đổi
+            self._bump_daily_stats(attendance_date, status, self.cursor.rowcount)
             self.conn.commit()
+            self._publish(ChangeEvent(ATTENDANCE, UPDATE, [(student_id, str(attendance_date))], refs={'date': [str(attendance_date)]}))
             return True, "Đã cập nhật điểm danh."
         except Error as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi điểm danh: {e}"
 
-    def mark_all_present(self, attendance_date):
+    @_with_connection
+    def mark_attendance_bulk(self, entries):
+        """
+        Ghi nhiều lượt điểm danh bằng một lệnh upsert nhiều dòng, trong một giao dịch.
+        entries: list (student_id, attendance_date, status); cùng (student_id, ngày) thì lượt sau cùng được giữ.
+        Số liệu theo ngày được cộng theo từng dòng (trạng thái cũ -> mới) như _bump_daily_stats,
+        nên chi phí mỗi lần ghi tỷ lệ với số dòng ghi, không phải số lượt điểm danh của cả ngày.
+        """
         if not self.conn: return False, "Kết nối CSDL thất bại."
+        if not entries: return True, "Không có thay đổi."
         try:
-            self.cursor.execute("SELECT student_id FROM students")
-            students = self.cursor.fetchall()
-            if not students:
-                return True, "Không có sinh viên nào để điểm danh."
-            query = "REPLACE INTO attendance (student_id, attendance_date, status) VALUES (%s, %s, %s)"
-            data_to_insert = [(student['student_id'], attendance_date, 'Present') for student in students]
-            self.cursor.executemany(query, data_to_insert)
+            latest = {(student_id, str(day)): status for student_id, day, status in entries}
+            dates = sorted({day for _, day in latest})
+
+            # Khóa và đọc trạng thái hiện tại của các dòng sắp ghi (mỗi ngày một lệnh, trên khóa unique)
+            old = {}
+            for day in dates:
+                ids = [student_id for student_id, entry_day in latest if entry_day == day]
+                placeholders = ", ".join(["%s"] * len(ids))
+                self.cursor.execute(
+                    f"SELECT student_id, status FROM attendance WHERE student_id IN ({placeholders}) AND attendance_date = %s FOR UPDATE",
+                    (*ids, day)
+                )
+                old.update(((row['student_id'], day), row['status']) for row in self.cursor.fetchall())
+
+            changed = [(student_id, day, status) for (student_id, day), status in latest.items() if old.get((student_id, day)) != status]
+            if changed:
+                values_sql = ", ".join(["(%s, %s, %s)"] * len(changed))
+                params = [value for entry in changed for value in entry]
+                query = f"INSERT INTO attendance (student_id, attendance_date, status) VALUES {values_sql} ON DUPLICATE KEY UPDATE status = VALUES(status)"
+                self.cursor.execute(query, params)
+
+                deltas = {} # ngày -> [present, absent]
+                for student_id, day, status in changed:
+                    delta = deltas.setdefault(day, [0, 0])
+                    delta[status == 'Absent'] += 1
+                    before = old.get((student_id, day))
+                    if before is not None:
+                        delta[before == 'Absent'] -= 1
+                deltas = [(day, present, absent) for day, (present, absent) in sorted(deltas.items()) if present or absent]
+                if deltas:
+                    values_sql = ", ".join(["(%s, %s, %s)"] * len(deltas))
+                    self.cursor.execute(f"""
+                        INSERT INTO hostel_stats_daily (stat_date, present, absent) VALUES {values_sql}
+                        ON DUPLICATE KEY UPDATE present = present + VALUES(present), absent = absent + VALUES(absent)
+                    """, [value for delta in deltas for value in delta])
             self.conn.commit()
-            return True, f"Đã điểm danh 'Present' cho {len(students)} sinh viên."
+            self._publish(ChangeEvent(ATTENDANCE, UPDATE, [(entry[0], str(entry[1])) for entry in entries], refs={'date': dates}))
+            return True, f"Đã lưu {len(entries)} lượt điểm danh."
         except Error as e:
+            self.conn.rollback()
+            return False, f"Lỗi CSDL khi điểm danh: {e}"
+
+    @_with_connection
+    def mark_all_present(self, attendance_date, end_date=None, room_no=None, room_type=None):
+        """
+        Điểm danh 'Present' hàng loạt bằng một lệnh INSERT ... SELECT ... ON DUPLICATE KEY UPDATE
+        (không kéo danh sách sinh viên về Python, không dùng REPLACE xóa-rồi-chèn).
+        end_date: điểm danh cho cả khoảng [attendance_date, end_date].
+        room_no / room_type: chỉ điểm danh sinh viên của một phòng / một loại phòng.
+        """
+        if not self.conn: return False, "Kết nối CSDL thất bại."
+        try:
+            first = date.fromisoformat(str(attendance_date))
+            last = date.fromisoformat(str(end_date)) if end_date else first
+            if last < first:
+                return False, "Ngày kết thúc phải sau ngày bắt đầu."
+            dates = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+            join, conditions, params = "", [], []
+            if room_type:
+                join = "JOIN rooms r ON r.room_no = s.room_no"
+                conditions.append("r.room_type = %s")
+                params.append(room_type)
+            if room_no:
+                conditions.append("s.room_no = %s")
+                params.append(room_no)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            self.cursor.execute(f"SELECT COUNT(*) AS count FROM students s {join} {where}", params)
+            count = self.cursor.fetchone()['count']
+            if not count:
+                return True, "Không có sinh viên nào để điểm danh."
+
+            dates_sql = " UNION ALL ".join(["SELECT %s AS d"] * len(dates))
+            query = f"""
+                INSERT INTO attendance (student_id, attendance_date, status)
+                SELECT s.student_id, dates.d, 'Present'
+                FROM students s {join}
+                CROSS JOIN ({dates_sql}) dates
+                {where}
+                ON DUPLICATE KEY UPDATE status = 'Present'
+            """
+            self.cursor.execute(query, (*dates, *params))
+            self._refresh_daily_stats(dates)
+            self.conn.commit()
+            # Không liệt kê từng sinh viên: các view tải lại những ngày bị ảnh hưởng
+            self._publish(ChangeEvent(ATTENDANCE, UPDATE, None, refs={'date': dates}))
+            if len(dates) > 1:
+                return True, f"Đã điểm danh 'Present' cho {count} sinh viên trong {len(dates)} ngày."
+            return True, f"Đã điểm danh 'Present' cho {count} sinh viên."
+        except (Error, ValueError) as e:
             self.conn.rollback()
             return False, f"Lỗi CSDL khi điểm danh hàng loạt: {e}"
 
+    def _refresh_daily_stats(self, dates):
+        """Đếm lại số có mặt/vắng của các ngày (quét index attendance_date, không quét toàn bảng)."""
+        placeholders = ", ".join(["%s"] * len(dates))
+        self.cursor.execute(f"""
+            INSERT INTO hostel_stats_daily (stat_date, present, absent)
+            SELECT attendance_date, SUM(status = 'Present'), SUM(status = 'Absent')
+            FROM attendance
+            WHERE attendance_date IN ({placeholders})
+            GROUP BY attendance_date
+            ON DUPLICATE KEY UPDATE present = VALUES(present), absent = VALUES(absent)
+        """, dates)
+
     # --- Các hàm Report ---
 
+    @_read_only
     def get_attendance_report(self, start_date, end_date):
         if not self.conn: return []
         try:
-            query = "SELECT s.student_id, s.name, s.room_no, a.attendance_date, a.status FROM attendance a JOIN students s ON s.student_id = a.student_id WHERE a.attendance_date BETWEEN %s AND %s ORDER BY a.attendance_date, s.name"
-            self.cursor.execute(query, (start_date, end_date))
+            self.cursor.execute(self.REPORT_QUERIES['attendance'], (start_date, end_date))
             return self.cursor.fetchall()
         except Error as e:
             print(f"Lỗi khi lấy báo cáo điểm danh: {e}")
             return []
 
+    @contextmanager
+    def stream_report(self, name, params=(), chunk_size=None):
+        """
+        Đọc một báo cáo lớn theo luồng, không nạp toàn bộ vào bộ nhớ:
+
+            with db.stream_report('payments') as (columns, chunks):
+                for rows in chunks: # mỗi khối là list các tuple, tối đa chunk_size dòng
+                    ...
+
+        Dùng cursor không đệm (unbuffered) trên một kết nối riêng (mượn từ pool của replica,
+        của primary, hoặc mở mới), nên các truy vấn khác của giao diện không phải chờ.
+        Khi bật đo đạc, cả lần đọc được ghi lại là "stream_report(<tên>)" (thời gian tính tới khi
+        ra khỏi khối with, gồm cả thời gian ghi file của người đọc; câu lệnh chỉ tính execute + fetch).
+        """
+        query = self.REPORT_QUERIES[name]
+        if name == 'due_summary' and not params:
+            params = month_range()
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+
+        pool, conn = self.pool, None
+        replica = self.router.pick() if self.router is not None else None
+        if replica is not None:
+            try:
+                conn = replica.pool.acquire()
+                pool = replica.pool
+            except (Error, PoolTimeoutError) as e:
+                self.router.failed(replica, e)
+        if conn is None:
+            conn = pool.acquire() if pool is not None else self._connect()
+        cursor = None
+        finished = False
+        recording = self.query_stats.record(f"stream_report({name})") if self.query_stats.enabled else nullcontext()
+        try:
+            with recording as trace:
+                cursor = conn.cursor()
+                traced = trace.wrap(conn, cursor)[1] if trace is not None else cursor
+                traced.execute(f"SET SESSION net_write_timeout = {int(self.STREAM_WRITE_TIMEOUT)}")
+                traced.execute(query, params)
+                columns = tuple(column[0] for column in cursor.description)
+
+                def chunks():
+                    nonlocal finished
+                    while True:
+                        rows = traced.fetchmany(chunk_size)
+                        if not rows:
+                            finished = True
+                            return
+                        yield rows
+
+                yield columns, chunks()
+        finally:
+            if finished:
+                cursor.close()
+                if pool is not None:
+                    pool.release(conn)
+                else:
+                    conn.close()
+            elif pool is not None:
+                # Còn dữ liệu chưa đọc (lỗi hoặc dừng giữa chừng): bỏ kết nối thay vì đọc hết
+                pool.discard(conn)
+            else:
+                try:
+                    conn.close()
+                except Error:
+                    pass
+
     # --- HÀM ĐÓNG (NGUYÊN NHÂN GÂY LỖI 2) ---
     
     def close(self):
         """Đóng kết nối CSDL."""
-        if self.conn and self.conn.is_connected():
-            self.cursor.close()
-            self.conn.close()
-            print("Kết nối MySQL đã đóng.")
\ No newline at end of file
+        self.query_stats.close()
+        if self.router is not None:
+            self.router.close()
+            self.router = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+            print(f"Pool kết nối {self.BACKENDS[self.backend]} đã đóng.")
+        elif self._shared_conn and self._shared_conn.is_connected():
+            self._shared_cursor.close()
+            self._shared_conn.close()
+            print(f"Kết nối {self.BACKENDS[self.backend]} đã đóng.")
\ No newline at end of file
@@ -0,0 +1,188 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from change_events import ChangeBatch
+
+DEFAULT_WORKERS = 3 # Số thread chạy truy vấn nền (nên nhỏ hơn pool_size của DatabaseConnector)
+
+
+class DBTask:
+    """Một công việc đã gửi cho DBExecutor (dùng để hủy hoặc kiểm tra trạng thái)."""
+
+    def __init__(self, key, on_done, on_error, indicator):
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.indicator = indicator
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Bỏ qua kết quả của task (nếu chưa chạy thì hủy luôn)."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class DBExecutor:
+    """
+    Chạy các lời gọi CSDL trên thread nền để mainloop của Tk không bị treo.
+
+    Kết quả được đẩy vào một hàng đợi và được lấy ra bằng after() trên thread
+    giao diện, nên on_done/on_error luôn chạy trên thread của Tk.
+    Các task cùng 'key' thay thế nhau: gửi task mới sẽ hủy task cũ chưa xong
+    (vd: gõ tìm kiếm liên tục chỉ hiển thị kết quả của lần gõ cuối).
+
+    listen() chuyển sự kiện thay đổi CSDL (change_events) về thread giao diện theo
+    cùng cơ chế, gom các sự kiện của một chu kỳ POLL_MS thành một lần gọi.
+    """
+
+    POLL_MS = 30 # Chu kỳ kiểm tra hàng đợi kết quả
+
+    def __init__(self, widget, max_workers=DEFAULT_WORKERS):
+        self.widget = widget
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._results = queue.Queue()
+        self._latest = {} # key -> task mới nhất
+        self._outstanding = 0
+        self._poll_job = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._ui_thread = threading.current_thread()
+        self._events = queue.Queue() # (on_changes, ChangeEvent) chờ chuyển về thread giao diện
+        self._subscriptions = [] # (bus, token)
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, indicator=None, **kwargs):
+        """
+        Gửi fn(*args, **kwargs) chạy nền. Trả về DBTask.
+        indicator (utils.LoadingIndicator) được bật cho đến khi task kết thúc hoặc bị hủy.
+        """
+        if self._closed:
+            raise RuntimeError("DBExecutor đã đóng.")
+        task = DBTask(key, on_done, on_error, indicator)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = task
+        if indicator is not None:
+            indicator.begin()
+
+        with self._lock:
+            self._outstanding += 1
+        task.future = self._pool.submit(self._run, task, fn, args, kwargs)
+        task.future.add_done_callback(self._on_future_done(task))
+        self._schedule_poll()
+        return task
+
+    def listen(self, bus, on_changes, kinds=None):
+        """
+        Đăng ký nhận sự kiện từ 'bus' (change_events.ChangeBus) cho các loại 'kinds'.
+        on_changes(batch) chạy trên thread giao diện, tối đa một lần mỗi chu kỳ POLL_MS,
+        với mọi sự kiện đến trong chu kỳ đó gom thành một ChangeBatch.
+        """
+        def on_event(event):
+            self._events.put((on_changes, event))
+            # Thread nền: vòng _poll đang chạy vì task ghi chưa xong, sự kiện sẽ được lấy cùng kết quả
+            if threading.current_thread() is self._ui_thread:
+                self._schedule_poll()
+
+        self._subscriptions.append((bus, bus.subscribe(on_event, kinds)))
+
+    def cancel(self, key):
+        """Hủy task đang chờ theo key (nếu có)."""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def _on_future_done(self, task):
+        def callback(future):
+            # Task bị hủy trước khi chạy: _run không được gọi nên tự báo kết thúc
+            if future.cancelled():
+                self._results.put((task, None, None))
+        return callback
+
+    def _run(self, task, fn, args, kwargs):
+        if task.cancelled:
+            self._results.put((task, None, None))
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._results.put((task, None, e))
+        else:
+            self._results.put((task, result, None))
+
+    def _schedule_poll(self):
+        if self._poll_job is None and not self._closed:
+            self._poll_job = self.widget.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        """Lấy hết kết quả đã xong và gọi callback trên thread giao diện."""
+        self._poll_job = None
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._outstanding -= 1
+            self._finish(task, result, error)
+        self._dispatch_events()
+
+        with self._lock:
+            busy = self._outstanding > 0
+        if busy or not self._events.empty():
+            self._schedule_poll()
+
+    def _dispatch_events(self):
+        batches = {} # on_changes -> ChangeBatch (giữ thứ tự đăng ký)
+        while True:
+            try:
+                on_changes, event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            batches.setdefault(on_changes, ChangeBatch()).add(event)
+        if self._closed:
+            return
+        for on_changes, batch in batches.items():
+            try:
+                on_changes(batch)
+            except Exception as e:
+                print(f"Lỗi khi xử lý thay đổi dữ liệu: {e}")
+
+    def _finish(self, task, result, error):
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        if task.indicator is not None:
+            task.indicator.end()
+        if task.cancelled or self._closed:
+            return # Kết quả đã lỗi thời
+        try:
+            if error is not None:
+                if task.on_error:
+                    task.on_error(error)
+                else:
+                    print(f"Lỗi khi chạy task nền ({task.key}): {error}")
+            elif task.on_done:
+                task.on_done(result)
+        except Exception as e:
+            # Không để lỗi trong callback làm dừng vòng lặp lấy kết quả
+            print(f"Lỗi trong callback của task ({task.key}): {e}")
+
+    def shutdown(self, wait=False):
+        """Hủy các task chưa chạy và dừng việc lấy kết quả."""
+        self._closed = True
+        for bus, token in self._subscriptions:
+            bus.unsubscribe(token)
+        self._subscriptions.clear()
+        for task in list(self._latest.values()):
+            task.cancel()
+        self._latest.clear()
+        if self._poll_job is not None:
+            try:
+                self.widget.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -1,8 +1,24 @@
+import os
 import customtkinter as ctk
 from login_view import LoginView
 from register_view import RegisterView
 from database import DatabaseConnector
-from main_app_view import MainAppView # Import file chính
+from db_executor import DEFAULT_WORKERS
+
+# "sqlite": chi nhánh nhỏ chạy trên một máy, dữ liệu nằm trong file SQLITE_PATH (không cần MySQL server)
+DB_BACKEND = "mysql"
+SQLITE_PATH = "hostel_v2.db"
+# Replica MySQL nhận các truy vấn chỉ đọc (màn hình công nợ, lịch sử thanh toán, báo cáo), vd: ["10.0.0.12:3306"]
+DB_REPLICAS = []
+# Đo đạc truy vấn (thống kê lời gọi + ghi câu lệnh chậm) chỉ bật khi đặt biến môi trường HOSTEL_INSTRUMENT=1
+INSTRUMENT = os.environ.get("HOSTEL_INSTRUMENT", "0").lower() in ("1", "true", "yes")
+
+def app_data_dir():
+    """Thư mục dữ liệu của ứng dụng (%APPDATA%/hostel trên Windows, ~/.local/share/hostel trên Linux/macOS)."""
+    base = os.environ.get("APPDATA") or os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base, "hostel")
+    os.makedirs(path, exist_ok=True)
+    return path
 
 class AppController:
     """
@@ -16,8 +32,14 @@ class AppController:
         ctk.set_default_color_theme("green")  # <--- (Tùy chọn) Đổi sang theme "green"
         
         # --- KẾT NỐI DATABASE ---
-        self.db = DatabaseConnector() 
-        if not self.db.conn:
+        # Dùng pool để các truy vấn nền (DBExecutor) không phải chờ nhau trên một kết nối.
+        # Khi bật đo đạc (HOSTEL_INSTRUMENT=1), câu lệnh chậm được ghi vào slow_queries.log trong app_data_dir()
+        database = SQLITE_PATH if DB_BACKEND == "sqlite" else "hostel_v2"
+        slow_log_path = os.path.join(app_data_dir(), "slow_queries.log") if INSTRUMENT else None
+        self.db = DatabaseConnector(database=database, backend=DB_BACKEND, pool_size=DEFAULT_WORKERS + 1,
+                                    instrument=INSTRUMENT, slow_log_path=slow_log_path,
+                                    replicas=DB_REPLICAS if DB_BACKEND == "mysql" else None) 
+        if not self.db.is_connected():
             print("KHÔNG THỂ KẾT NỐI CSDL. Thoát ứng dụng.")
             return 
         
@@ -55,7 +77,8 @@ class AppController:
         self.current_user = user_data 
         print(f"Login Successful! User: {self.current_user['username']}, Role: {self.current_user['role']}")
         
-        # Tạo MainAppView
+        # Tạo MainAppView (chỉ import sau khi đăng nhập để cửa sổ login mở nhanh hơn)
+        from main_app_view import MainAppView
         self.app = MainAppView(
             db=self.db, 
             user=self.current_user,
@@ -1,30 +1,43 @@
+import importlib
 import customtkinter as ctk
-# Import tất cả 7 view của chúng ta từ thư mục 'views'
-from views.dashboard_view import DashboardView 
-from views.staff_view import StaffView
-from views.room_view import RoomView 
-from views.student_view import StudentView
-from views.payment_view import PaymentView
-from views.attendance_view import AttendanceView
-from views.report_view import ReportView 
+from db_executor import DBExecutor
 
 class MainAppView(ctk.CTk):
     """
     Tạo cửa sổ ứng dụng chính sau khi đăng nhập thành công.
     Cửa sổ này chứa sidebar điều hướng và các frame nội dung.
+    Mỗi view chỉ được tạo khi được mở lần đầu (lazy=True); nếu prefetch=True,
+    các view còn lại được tạo dần sau khi Dashboard đã hiển thị.
     """
 
-    def __init__(self, db, user, on_logout=None):
+    PREFETCH_DELAY_MS = 300 # Khoảng nghỉ giữa hai lần tạo trước view ở chế độ lazy
+
+    # 7 view trong thư mục 'views': (module, class).
+    # Module chỉ được import khi view được tạo, nên tkcalendar/pandas... không làm chậm lúc mở cửa sổ.
+    VIEW_CLASSES = {
+        "Dashboard": ("views.dashboard_view", "DashboardView"),
+        "Staff": ("views.staff_view", "StaffView"),
+        "Rooms": ("views.room_view", "RoomView"),
+        "Students": ("views.student_view", "StudentView"),
+        "Payments": ("views.payment_view", "PaymentView"),
+        "Attendance": ("views.attendance_view", "AttendanceView"),
+        "Reports": ("views.report_view", "ReportView"),
+    }
+
+    def __init__(self, db, user, on_logout=None, lazy=True, prefetch=True):
         super().__init__()
 
         self.db = db
         self.current_user = user
         self.on_logout = on_logout # Callback function để hiển thị lại cửa sổ login
+        # Các view gửi truy vấn CSDL qua executor để cửa sổ không bị treo khi MySQL chậm
+        self.executor = DBExecutor(self)
 
         # --- Cấu hình cửa sổ ---
         self.title("Hostel Management System V2.0")
         self.geometry("1100x720") # Kích thước cửa sổ
         self.minsize(900, 600) # Kích thước tối thiểu
+        self.protocol("WM_DELETE_WINDOW", self.close_event) # Ghi hết dữ liệu đang chờ trước khi đóng
 
         # --- Cấu hình Layout (Sidebar + Main Content) ---
         self.grid_columnconfigure(1, weight=1)
@@ -85,61 +98,70 @@ class MainAppView(ctk.CTk):
         self.main_content_frame.grid_rowconfigure(0, weight=1)
         self.main_content_frame.grid_columnconfigure(0, weight=1)
 
-        # --- 3. Tạo và lưu trữ tất cả các Frame View ---
+        # --- 3. Các Frame View được tạo khi mở lần đầu (lazy) ---
+        self.nav_items = dict(nav_items)
         self.frames = {}
-        
-        for (name, emoji) in nav_items:
-            
-            if name == "Dashboard":
-                frame = DashboardView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-            
-            elif name == "Staff":
-                frame = StaffView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-
-            elif name == "Rooms":
-                frame = RoomView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-                
-            elif name == "Students":
-                frame = StudentView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-
-            elif name == "Payments":
-                frame = PaymentView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-            
-            elif name == "Attendance":
-                frame = AttendanceView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-
-            elif name == "Reports":
-                frame = ReportView(self.main_content_frame, self.db)
-                frame.grid(row=0, column=0, sticky="nsew")
-
-            else: 
-                frame = ctk.CTkFrame(self.main_content_frame, corner_radius=10, fg_color="transparent")
-                frame.grid(row=0, column=0, sticky="nsew")
-                frame.grid_rowconfigure(0, weight=1)
-                frame.grid_columnconfigure(0, weight=1)
-                label = ctk.CTkLabel(frame, text=f"{emoji} {name} View\n(Coming Soon)", 
-                                     font=ctk.CTkFont(size=24, weight="bold"))
-                label.grid(row=0, column=0, sticky="nsew")
-                
-            self.frames[name] = frame 
+        self.current_frame_name = None
 
+        if not lazy:
+            for name in self.nav_items:
+                self._get_frame(name)
 
         # --- 4. Hiển thị frame mặc định (Dashboard) ---
         self.show_frame("Dashboard")
 
+        # Sau khi Dashboard hiển thị, lần lượt tạo trước các view còn lại lúc rảnh
+        if lazy and prefetch:
+            self.after(self.PREFETCH_DELAY_MS, self._prefetch_next)
+
+    def _build_frame(self, name):
+        """Tạo frame cho một mục điều hướng."""
+        if name in self.VIEW_CLASSES:
+            module_name, class_name = self.VIEW_CLASSES[name]
+            view_class = getattr(importlib.import_module(module_name), class_name)
+            frame = view_class(self.main_content_frame, self.db, self.executor)
+            frame.grid(row=0, column=0, sticky="nsew")
+        else: 
+            frame = ctk.CTkFrame(self.main_content_frame, corner_radius=10, fg_color="transparent")
+            frame.grid(row=0, column=0, sticky="nsew")
+            frame.grid_rowconfigure(0, weight=1)
+            frame.grid_columnconfigure(0, weight=1)
+            label = ctk.CTkLabel(frame, text=f"{self.nav_items[name]} {name} View\n(Coming Soon)", 
+                                 font=ctk.CTkFont(size=24, weight="bold"))
+            label.grid(row=0, column=0, sticky="nsew")
+        return frame
+
+    def _get_frame(self, name):
+        """Trả về frame của view, tạo mới nếu chưa có."""
+        frame = self.frames.get(name)
+        if frame is None:
+            frame = self.frames[name] = self._build_frame(name)
+            if self.current_frame_name in self.frames:
+                # Frame mới được grid sau nên nằm trên cùng: đưa frame đang xem trở lại phía trước
+                self.frames[self.current_frame_name].tkraise()
+        return frame
+
+    def _prefetch_next(self):
+        """Tạo trước một view chưa được mở (mỗi lần một view để giao diện không bị khựng)."""
+        for name in self.nav_items:
+            if name not in self.frames:
+                self._get_frame(name)
+                self.after(self.PREFETCH_DELAY_MS, self._prefetch_next)
+                return
+
     def show_frame(self, frame_name):
         """
         Đưa frame được chọn lên trên cùng.
         (Đã xóa bỏ việc tải lại dữ liệu để tránh lag/crash)
         """
-        frame = self.frames[frame_name]
+        # Báo cho view đang hiển thị biết nó sắp bị ẩn (vd: ghi điểm danh đang chờ)
+        previous = self.frames.get(self.current_frame_name)
+        if previous is not None and frame_name != self.current_frame_name and hasattr(previous, "on_hide"):
+            previous.on_hide()
+
+        frame = self._get_frame(frame_name)
         frame.tkraise() # Đưa frame được chọn lên trên cùng
+        self.current_frame_name = frame_name
         
         # Cập nhật trạng thái nút
         for name, button in self.nav_buttons.items():
@@ -154,6 +176,24 @@ class MainAppView(ctk.CTk):
         (ĐÃ SỬA LỖI - XÓA self.destroy())
         """
         print("Logout event called")
+        if not self.flush_views():
+            return
         if self.on_logout:
             # self.destroy() # <--- ĐÃ XÓA DÒNG NÀY (NGUYÊN NHÂN GÂY LỖI 1)
-            self.on_logout() # Chỉ gọi callback, để main.py xử lý
\ No newline at end of file
+            self.on_logout() # Chỉ gọi callback, để main.py xử lý
+
+    def flush_views(self):
+        """Yêu cầu các view ghi hết dữ liệu đang chờ. Trả về False nếu người dùng hủy."""
+        for frame in self.frames.values():
+            if hasattr(frame, "flush_before_close") and not frame.flush_before_close():
+                return False
+        return True
+
+    def close_event(self):
+        if self.flush_views():
+            self.destroy()
+
+    def destroy(self):
+        # Bỏ các kết quả còn đang chờ: widget nhận chúng sắp bị hủy
+        self.executor.shutdown()
+        super().destroy()
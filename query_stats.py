@@ -0,0 +1,309 @@
+"""
+Đo đạc các lời gọi của DatabaseConnector (bật bằng DatabaseConnector(instrument=True)
+hoặc db.query_stats.enable()).
+
+Mỗi lời gọi ngoài cùng của một hàm có @_with_connection được ghi lại theo tên hàm:
+histogram độ trễ, số dòng đọc về, số lượt gửi tới server (execute / executemany /
+commit / rollback) và số lần commit. Lời gọi lồng nhau (vd: add_room -> get_room_by_no)
+được tính vào lời gọi ngoài cùng.
+
+Câu lệnh hoặc lời gọi chậm hơn slow_query_ms được ghi vào slow-query log (file xoay vòng
+nếu có slow_log_path, nếu không thì ra stderr qua logging). snapshot() trả về dict thuần
+(json.dumps được) cho công cụ đo / benchmark.
+
+Khi tắt, mỗi lời gọi chỉ tốn thêm một lần kiểm tra cờ 'enabled'
+(đo bằng benchmarks/bench_instrumentation.py).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# Cận trên (ms) của các ô histogram độ trễ; ô cuối cùng chứa các lời gọi chậm hơn
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+slow_log = logging.getLogger("hostel.slow_query")
+
+
+class MethodStats:
+    """Số liệu cộng dồn của một hàm DatabaseConnector."""
+
+    __slots__ = ("calls", "errors", "slow", "total_ms", "max_ms", "buckets",
+                 "rows", "round_trips", "max_round_trips", "commits", "rollbacks")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.rows = 0
+        self.round_trips = 0
+        self.max_round_trips = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def add(self, trace, elapsed_ms, error, slow):
+        self.calls += 1
+        self.errors += error
+        self.slow += slow
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS_MS) and elapsed_ms > LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.buckets[bucket] += 1
+        self.rows += trace.rows
+        self.round_trips += trace.round_trips
+        self.max_round_trips = max(self.max_round_trips, trace.round_trips)
+        self.commits += trace.commits
+        self.rollbacks += trace.rollbacks
+
+    def percentile(self, fraction):
+        """Ước lượng phân vị từ histogram: cận trên của ô chứa phân vị (không vượt quá max_ms)."""
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        calls = self.calls or 1
+        histogram = {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'slow': self.slow,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / calls, 3),
+            'p50_ms': round(self.percentile(0.50), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': histogram,
+            'rows': self.rows,
+            'avg_rows': round(self.rows / calls, 2),
+            'round_trips': self.round_trips,
+            'avg_round_trips': round(self.round_trips / calls, 2),
+            'max_round_trips': self.max_round_trips,
+            'commits': self.commits,
+            'rollbacks': self.rollbacks,
+        }
+
+
+class CallTrace:
+    """Bộ đếm của một lời gọi đang chạy (chỉ thread của lời gọi đó ghi vào)."""
+
+    __slots__ = ("method", "rows", "round_trips", "commits", "rollbacks", "cursors", "stats")
+
+    def __init__(self, method, stats):
+        self.method = method
+        self.stats = stats
+        self.rows = 0
+        self.round_trips = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.cursors = []
+
+    def wrap(self, conn, cursor):
+        """Bọc kết nối / cursor của lời gọi để đếm lượt gửi và số dòng."""
+        return TracedConnection(conn, self), TracedCursor(cursor, self)
+
+    def finish(self):
+        for cursor in self.cursors:
+            cursor.flush()
+
+
+class TracedCursor:
+    """
+    Bọc cursor của mysql.connector. Thời gian của một câu lệnh gồm execute() và các lần
+    fetch kết quả của nó (cursor không đệm nhận dòng trong lúc fetch), được chốt khi câu
+    lệnh tiếp theo bắt đầu hoặc lời gọi kết thúc.
+    """
+
+    def __init__(self, cursor, trace):
+        self._cursor = cursor
+        self._trace = trace
+        self._operation = None
+        self._elapsed = 0.0
+        trace.cursors.append(self)
+
+    def _timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def _begin(self, operation):
+        self.flush()
+        self._operation = operation
+        self._elapsed = 0.0
+        self._trace.round_trips += 1
+
+    def flush(self):
+        if self._operation is not None:
+            self._trace.stats.statement_done(self._trace, self._operation, self._elapsed * 1000)
+            self._operation = None
+
+    def execute(self, operation, *args, **kwargs):
+        self._begin(operation)
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        self._begin(operation)
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._trace.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed(self._cursor.fetchmany, *args, **kwargs)
+        self._trace.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._trace.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """Bọc kết nối của mysql.connector để đếm commit / rollback."""
+
+    def __init__(self, conn, trace):
+        self._conn = conn
+        self._trace = trace
+
+    def commit(self):
+        self._trace.round_trips += 1
+        self._trace.commits += 1
+        return self._conn.commit()
+
+    def rollback(self):
+        self._trace.round_trips += 1
+        self._trace.rollbacks += 1
+        return self._conn.rollback()
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs), self._trace)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class QueryStats:
+    """Số liệu đo đạc của một DatabaseConnector, an toàn đa luồng."""
+
+    SLOW_QUERY_MS = 200
+    LOG_MAX_BYTES = 5 * 1024 * 1024
+    LOG_BACKUP_COUNT = 3
+    MAX_SQL_CHARS = 500 # Câu lệnh dài (IN (...) hàng nghìn tham số) bị cắt khi ghi log
+
+    def __init__(self, enabled=False, slow_query_ms=None, slow_log_path=None):
+        self.enabled = enabled
+        self.slow_query_ms = self.SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        self._handler = None
+        self._lock = threading.Lock()
+        self.reset()
+        if slow_log_path:
+            self.set_slow_log(slow_log_path)
+
+    def enable(self, slow_query_ms=None, slow_log_path=None):
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if slow_log_path:
+            self.set_slow_log(slow_log_path)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def set_slow_log(self, path):
+        """Ghi slow-query log vào 'path' (xoay vòng theo LOG_MAX_BYTES, giữ LOG_BACKUP_COUNT file cũ)."""
+        handler = RotatingFileHandler(path, maxBytes=self.LOG_MAX_BYTES, backupCount=self.LOG_BACKUP_COUNT,
+                                      encoding='utf-8', delay=True) # Chỉ tạo file khi có dòng đầu tiên
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        if self._handler is not None:
+            slow_log.removeHandler(self._handler)
+            self._handler.close()
+        self._handler = handler
+        slow_log.addHandler(handler)
+
+    def close(self):
+        if self._handler is not None:
+            slow_log.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def reset(self):
+        with self._lock:
+            self._methods = {} # tên hàm -> MethodStats
+            self._statements = 0
+            self._slow_statements = 0
+            self._since = time.time()
+
+    @contextmanager
+    def record(self, method):
+        """Đo một lời gọi ngoài cùng của 'method'; trả về CallTrace để bọc kết nối / cursor."""
+        trace = CallTrace(method, self)
+        error = False
+        start = time.perf_counter()
+        try:
+            yield trace
+        except BaseException:
+            error = True
+            raise
+        finally:
+            trace.finish()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            slow = elapsed_ms >= self.slow_query_ms
+            with self._lock:
+                stats = self._methods.get(method)
+                if stats is None:
+                    stats = self._methods[method] = MethodStats()
+                stats.add(trace, elapsed_ms, error, slow)
+            if slow:
+                slow_log.warning("call %s %.1f ms round_trips=%d rows=%d commits=%d [%s]%s", method, elapsed_ms,
+                                 trace.round_trips, trace.rows, trace.commits,
+                                 threading.current_thread().name, " error" if error else "")
+
+    def statement_done(self, trace, operation, elapsed_ms):
+        slow = elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            self._statements += 1
+            self._slow_statements += slow
+        if slow:
+            if isinstance(operation, bytes):
+                operation = operation.decode('utf-8', 'replace')
+            sql = " ".join(str(operation).split())
+            if len(sql) > self.MAX_SQL_CHARS:
+                sql = sql[:self.MAX_SQL_CHARS] + "..."
+            slow_log.warning("statement %s %.1f ms [%s] %s", trace.method, elapsed_ms,
+                             threading.current_thread().name, sql)
+
+    def snapshot(self):
+        """Bản sao số liệu hiện tại (dict thuần), sắp xếp theo tổng thời gian giảm dần."""
+        with self._lock:
+            methods = sorted(self._methods.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {
+                'enabled': self.enabled,
+                'since': self._since,
+                'elapsed_s': round(time.time() - self._since, 3),
+                'slow_query_ms': self.slow_query_ms,
+                'calls': sum(stats.calls for _, stats in methods),
+                'statements': self._statements,
+                'slow_statements': self._slow_statements,
+                'methods': {name: stats.to_dict() for name, stats in methods},
+            }
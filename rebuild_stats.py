@@ -0,0 +1,16 @@
+"""
+Lệnh đối soát: tính lại các bảng tổng hợp của Dashboard (hostel_stats,
+hostel_stats_monthly, hostel_stats_daily) từ dữ liệu gốc.
+
+    python rebuild_stats.py
+"""
+from database import DatabaseConnector
+
+if __name__ == "__main__":
+    db = DatabaseConnector()
+    if not db.is_connected():
+        print("KHÔNG THỂ KẾT NỐI CSDL.")
+    else:
+        success, message = db.rebuild_stats()
+        print(message)
+        db.close()
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReferenceCache:
+    """
+    Bộ nhớ đệm cho dữ liệu tham chiếu ít thay đổi (danh sách phòng, loại phòng,
+    phòng còn trống, tên sinh viên cho pop-up thanh toán), an toàn đa luồng.
+
+    - Giới hạn số mục (LRU) và thời gian sống (TTL) của mỗi mục.
+    - Khóa là tuple, phần tử đầu là tên nhóm (vd: ('rooms', 'Single')); invalidate()
+      xóa theo tên nhóm.
+    - Giá trị đang được tải lại khi có invalidate() sẽ không được lưu (tránh lưu bản cũ).
+    """
+
+    MAX_ENTRIES = 32
+    TTL = 300 # Giây
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else self.TTL
+        self._entries = OrderedDict() # key -> (giá trị, thời điểm tải)
+        self._generation = 0 # Tăng mỗi lần invalidate
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """Trả về giá trị của 'key'; gọi loader() để tải nếu chưa có, đã hết hạn hoặc vừa bị xóa."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader() # Ngoài lock: truy vấn chậm không chặn các luồng đọc mục khác
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *groups):
+        """Xóa các mục thuộc các nhóm cho trước (không truyền gì = xóa hết)."""
+        with self._lock:
+            self._generation += 1
+            if not groups:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] in groups]:
+                del self._entries[key]
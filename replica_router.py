@@ -0,0 +1,167 @@
+"""
+Định tuyến lời gọi chỉ đọc của DatabaseConnector tới các replica MySQL
+(DatabaseConnector(replicas=[...])); mọi lệnh ghi vẫn chạy trên primary.
+
+Mỗi replica có pool kết nối riêng. Một replica chỉ nhận lời gọi đọc khi:
+    - lần kiểm tra gần nhất (SHOW REPLICA STATUS mỗi CHECK_INTERVAL giây, chạy trên luồng nền
+      của start() chứ không trong lời gọi đọc) thấy luồng sao chép đang chạy
+      và độ trễ Seconds_Behind_Source <= max_lag;
+    - đọc-được-ghi-của-mình: từ lần ghi gần nhất của connector này đã qua ít nhất
+      max(sticky_seconds, độ trễ đo được) giây. Trong khoảng đó lời gọi đọc chạy trên
+      primary để màn hình vừa ghi xong luôn thấy dữ liệu mới.
+Các replica hợp lệ được dùng lần lượt (round-robin). Replica lỗi kết nối bị bỏ qua tới
+lần kiểm tra sau RETRY_INTERVAL giây; khi không còn replica nào (hoặc chưa kiểm tra xong lần đầu),
+mọi lời gọi đọc về primary. Replica không kết nối được chỉ làm chậm luồng nền, không làm treo giao diện.
+
+Tài khoản kết nối cần quyền REPLICATION CLIENT trên replica để đọc SHOW REPLICA STATUS.
+"""
+import threading
+import time
+
+from mysql.connector import Error
+
+from connection_pool import PoolTimeoutError
+
+
+class Replica:
+    """Một endpoint replica: pool kết nối riêng và trạng thái của lần kiểm tra gần nhất."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = False
+        self.lag = None # Giây (None = chưa đo / luồng sao chép đang dừng)
+        self.error = None
+        self.next_check = 0.0 # time.monotonic() của lần kiểm tra tiếp theo
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Chọn replica cho lời gọi đọc theo độ trễ sao chép và lần ghi gần nhất (an toàn đa luồng)."""
+
+    MAX_LAG = 5.0 # Giây; replica trễ hơn bị bỏ qua
+    STICKY_SECONDS = 2.0 # Giây đọc trên primary sau mỗi lần ghi (tối thiểu)
+    CHECK_INTERVAL = 1.0 # Giây giữa hai lần đo độ trễ của một replica
+    RETRY_INTERVAL = 5.0 # Giây trước khi thử lại replica bị lỗi
+    STATUS_QUERIES = ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS") # MySQL >= 8.0.22 / bản cũ hơn
+    LAG_COLUMNS = ("Seconds_Behind_Source", "Seconds_Behind_Master")
+
+    def __init__(self, replicas, max_lag=None, sticky_seconds=None):
+        self.replicas = list(replicas)
+        self.max_lag = self.MAX_LAG if max_lag is None else max_lag
+        self.sticky_seconds = self.STICKY_SECONDS if sticky_seconds is None else sticky_seconds
+        self._last_write = float('-inf')
+        self._next = 0
+        self._status_query = self.STATUS_QUERIES[0]
+        self._lock = threading.Lock()
+        self._primary_reads = 0
+        self._sticky_reads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Bắt đầu kiểm tra độ trễ các replica trên một luồng nền (daemon)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._monitor, name="replica-monitor", daemon=True)
+            self._thread.start()
+
+    def _monitor(self):
+        while not self._stop.is_set():
+            for replica in self.replicas:
+                if time.monotonic() >= replica.next_check:
+                    self._check(replica)
+            wait = min((replica.next_check for replica in self.replicas), default=0.0) - time.monotonic()
+            self._stop.wait(min(max(wait, 0.05), self.CHECK_INTERVAL))
+
+    def note_write(self):
+        """Ghi nhận một lời gọi ghi vừa kết thúc trên primary (bắt đầu khoảng đọc-được-ghi-của-mình)."""
+        self._last_write = time.monotonic()
+
+    def pick(self):
+        """Replica cho một lời gọi đọc, hoặc None nếu lời gọi phải chạy trên primary (không chờ kết nối / kiểm tra)."""
+        since_write = time.monotonic() - self._last_write
+        with self._lock:
+            healthy = [r for r in self.replicas if r.healthy and r.lag <= self.max_lag]
+            ready = [r for r in healthy if since_write >= max(self.sticky_seconds, r.lag)]
+            if not ready:
+                self._primary_reads += 1
+                self._sticky_reads += bool(healthy)
+                return None
+            replica = ready[self._next % len(ready)]
+            self._next += 1
+            replica.reads += 1
+            return replica
+
+    def failed(self, replica, error=None):
+        """Đánh dấu replica lỗi (vd: không mượn được kết nối); thử lại sau RETRY_INTERVAL giây."""
+        with self._lock:
+            replica.healthy = False
+            replica.error = str(error) if error else "Không mượn được kết nối."
+            replica.next_check = time.monotonic() + self.RETRY_INTERVAL
+
+    def _check(self, replica):
+        """Đo độ trễ sao chép của replica (chỉ chạy trên luồng nền, xem start)."""
+        healthy, lag, error, interval = False, None, None, self.CHECK_INTERVAL
+        conn = None
+        try:
+            conn = replica.pool.acquire(timeout=0) # Pool đang bận hết: giữ kết quả cũ, đo lại lần sau
+            status = self._replica_status(conn)
+            if status is None:
+                error = "Không phải replica (SHOW REPLICA STATUS rỗng)."
+            else:
+                lag = next((status[c] for c in self.LAG_COLUMNS if c in status), None)
+                healthy = lag is not None
+                error = None if healthy else "Luồng sao chép đang dừng."
+        except PoolTimeoutError:
+            return
+        except Error as e:
+            error, interval = str(e), self.RETRY_INTERVAL
+            if conn is not None:
+                replica.pool.discard(conn)
+                conn = None
+        finally:
+            if conn is not None:
+                replica.pool.release(conn)
+        with self._lock:
+            replica.healthy, replica.lag, replica.error = healthy, lag, error
+            replica.next_check = time.monotonic() + interval
+
+    def _replica_status(self, conn):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute(self._status_query)
+            except Error as e:
+                if e.errno != 1064 or self._status_query == self.STATUS_QUERIES[-1]: # 1064: lỗi cú pháp
+                    raise
+                self._status_query = self.STATUS_QUERIES[-1] # Server cũ chưa có SHOW REPLICA STATUS
+                cursor.execute(self._status_query)
+            rows = cursor.fetchall()
+            return rows[0] if rows else None
+        finally:
+            cursor.close()
+
+    def metrics(self):
+        """Số liệu định tuyến: số lời gọi đọc trên primary (trong đó do vừa ghi) và trạng thái từng replica."""
+        with self._lock:
+            return {
+                'primary_reads': self._primary_reads,
+                'sticky_reads': self._sticky_reads,
+                'replicas': {
+                    replica.name: {
+                        'healthy': replica.healthy,
+                        'lag_s': replica.lag,
+                        'reads': replica.reads,
+                        'error': replica.error,
+                        'pool': replica.pool.metrics(),
+                    }
+                    for replica in self.replicas
+                },
+            }
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for replica in self.replicas:
+            replica.pool.close()
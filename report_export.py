@@ -0,0 +1,233 @@
+"""
+Xuất báo cáo lớn ra file với bộ nhớ gần như không đổi.
+
+Dữ liệu được đọc theo khối bằng DatabaseConnector.stream_report (cursor không đệm)
+và ghi ngay ra file, nên dù báo cáo có hàng triệu dòng thì bộ nhớ cũng chỉ cỡ một khối.
+Định dạng được chọn theo đuôi file:
+
+    .xlsx      Excel (workbook write_only; sang sheet mới khi vượt giới hạn dòng)
+    .csv       CSV UTF-8
+    .csv.gz    CSV nén gzip
+    .parquet   Parquet (cần pyarrow)
+    .feather   Feather v2 / Arrow IPC (cần pyarrow)
+
+    python report_export.py payments payments.xlsx
+    python report_export.py attendance attendance.parquet 2025-01-01 2025-06-30
+"""
+import csv
+import gzip
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+EXCEL_MAX_ROWS = 1048576 # Giới hạn số dòng của một sheet Excel (tính cả dòng tiêu đề)
+SHEET_TITLE_MAX = 31
+ARROW_ROW_GROUP_SIZE = 128 * 1024 # Số dòng gom lại trước khi ghi một row group / record batch
+
+REPORT_TITLES = {
+    'students': "Students",
+    'rooms': "Rooms",
+    'room_occupancy': "Room Occupancy",
+    'payments': "Payments",
+    'due_summary': "Due Summary",
+    'attendance': "Attendance",
+}
+
+
+def write_xlsx(path, columns, chunks, title="Report", types=None, max_rows=EXCEL_MAX_ROWS):
+    """
+    Ghi các khối dòng ra file .xlsx (workbook write_only). Trả về số dòng dữ liệu đã ghi.
+    Mỗi sheet chứa tối đa max_rows - 1 dòng dữ liệu; phần còn lại sang "title (2)", "title (3)"...
+    """
+    from openpyxl import Workbook # Chỉ nạp openpyxl khi thật sự xuất file
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheet_count, total = None, 0, 0, 0
+
+    def new_sheet():
+        nonlocal sheet, sheet_rows, sheet_count
+        sheet_count += 1
+        suffix = f" ({sheet_count})" if sheet_count > 1 else ""
+        sheet = workbook.create_sheet(title[:SHEET_TITLE_MAX - len(suffix)] + suffix)
+        sheet.append(columns)
+        sheet_rows = 1
+
+    new_sheet()
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows >= max_rows:
+                new_sheet()
+            sheet.append(row)
+            sheet_rows += 1
+        total += len(rows)
+
+    workbook.save(path)
+    return total
+
+
+def write_csv(path, columns, chunks, title=None, types=None):
+    """Ghi các khối dòng ra CSV (nén gzip nếu đuôi file là .gz). Trả về số dòng dữ liệu đã ghi."""
+    if path.lower().endswith(".gz"):
+        f = gzip.open(path, "wt", newline="", encoding="utf-8")
+    else:
+        f = open(path, "w", newline="", encoding="utf-8-sig") # BOM để Excel nhận đúng UTF-8
+    total = 0
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            total += len(rows)
+    return total
+
+
+def _arrow_type(sql_type):
+    """Kiểu Arrow của một cột theo kiểu khai báo SQL (vd: "DECIMAL(10, 2)", "DATE"; mặc định: chuỗi)."""
+    import pyarrow as pa
+    base, _, args = (sql_type or "").upper().partition("(")
+    base = base.strip()
+    if base == "DECIMAL":
+        precision, scale = (int(arg) for arg in args.rstrip(")").split(","))
+        return pa.decimal128(precision, scale)
+    if base in ("TINYINT", "SMALLINT", "INT", "INTEGER", "BIGINT"):
+        return pa.int64()
+    if base in ("FLOAT", "DOUBLE", "REAL"):
+        return pa.float64()
+    if base == "DATE":
+        return pa.date32()
+    if base in ("DATETIME", "TIMESTAMP"):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _arrow_coerce(arrow_type):
+    """
+    Hàm chuyển một giá trị khác None về đúng kiểu Python của arrow_type. Chỉ dùng khi khối dữ liệu
+    không khớp lược đồ, vd: SQLite trả float / int cho SUM(DECIMAL), chuỗi cho cột ngày tính toán.
+    """
+    import pyarrow as pa
+    if pa.types.is_decimal(arrow_type):
+        step = Decimal(1).scaleb(-arrow_type.scale)
+        return lambda value: Decimal(str(value)).quantize(step)
+    if pa.types.is_integer(arrow_type):
+        return int
+    if pa.types.is_floating(arrow_type):
+        return float
+    if pa.types.is_date(arrow_type):
+        return lambda value: (value.date() if isinstance(value, datetime)
+                              else value if isinstance(value, date) else date.fromisoformat(str(value)))
+    if pa.types.is_timestamp(arrow_type):
+        return lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return str
+
+
+def _arrow_batches(columns, chunks, types=None):
+    """
+    Chuyển các khối dòng thành RecordBatch (mỗi batch khoảng ARROW_ROW_GROUP_SIZE dòng).
+    Lược đồ lấy từ kiểu khai báo của cột (types, xem DatabaseConnector.REPORT_COLUMN_TYPES),
+    không đoán từ giá trị: cột toàn NULL ở đầu file hay Decimal khác số chữ số thập phân vẫn đúng kiểu.
+    """
+    import pyarrow as pa
+    types = types or [None] * len(columns)
+    schema = pa.schema([(name, _arrow_type(sql_type)) for name, sql_type in zip(columns, types)])
+    coerce = [_arrow_coerce(field.type) for field in schema]
+    pending, pending_rows = [], 0
+
+    def to_array(values, field, convert):
+        if pa.types.is_string(field.type):
+            return pa.array([None if v is None else str(v) for v in values], type=field.type)
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array([None if v is None else convert(v) for v in values], type=field.type)
+
+    def to_batch(rows):
+        arrays = [to_array([row[index] for row in rows], field, coerce[index]) for index, field in enumerate(schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def combined():
+        return pa.Table.from_batches(pending, schema=schema).combine_chunks().to_batches()[0]
+
+    yield schema
+    for rows in chunks:
+        pending.append(to_batch(rows))
+        pending_rows += len(rows)
+        if pending_rows >= ARROW_ROW_GROUP_SIZE:
+            yield combined()
+            pending, pending_rows = [], 0
+    if pending:
+        yield combined()
+
+
+def _write_arrow(path, columns, chunks, types, open_writer):
+    batches = _arrow_batches(columns, chunks, types)
+    writer = open_writer(path, next(batches))
+    total = 0
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            total += batch.num_rows
+    finally:
+        writer.close()
+    return total
+
+
+def write_parquet(path, columns, chunks, title=None, types=None):
+    """Ghi các khối dòng ra Parquet (nén snappy). Trả về số dòng dữ liệu đã ghi."""
+    import pyarrow.parquet as pq
+    return _write_arrow(path, columns, chunks, types,
+                        lambda p, schema: pq.ParquetWriter(p, schema, compression="snappy"))
+
+
+def write_feather(path, columns, chunks, title=None, types=None):
+    """Ghi các khối dòng ra Feather v2 (Arrow IPC, nén lz4). Trả về số dòng dữ liệu đã ghi."""
+    import pyarrow as pa
+    options = pa.ipc.IpcWriteOptions(compression="lz4")
+    return _write_arrow(path, columns, chunks, types,
+                        lambda p, schema: pa.ipc.new_file(p, schema, options=options))
+
+
+# Đuôi file -> hàm ghi (đuôi dài đứng trước để ".csv.gz" không bị nhận nhầm)
+WRITERS = {
+    ".csv.gz": write_csv,
+    ".xlsx": write_xlsx,
+    ".csv": write_csv,
+    ".parquet": write_parquet,
+    ".feather": write_feather,
+}
+
+
+def writer_for(path):
+    """Chọn hàm ghi theo đuôi file. Ném ValueError nếu không hỗ trợ."""
+    lower = path.lower()
+    for extension, writer in WRITERS.items():
+        if lower.endswith(extension):
+            return writer
+    raise ValueError(f"Định dạng không được hỗ trợ: '{path}' (hỗ trợ: {', '.join(WRITERS)}).")
+
+
+def export_report(db, name, path, params=(), chunk_size=None):
+    """
+    Xuất báo cáo 'name' (xem DatabaseConnector.REPORT_QUERIES) ra file,
+    định dạng theo đuôi file. Trả về số dòng.
+    """
+    writer = writer_for(path)
+    with db.stream_report(name, params, chunk_size) as (columns, chunks):
+        types = [db.REPORT_COLUMN_TYPES.get(column) for column in columns]
+        return writer(path, columns, chunks, REPORT_TITLES.get(name, "Report"), types)
+
+
+if __name__ == "__main__":
+    from database import DatabaseConnector
+
+    if len(sys.argv) < 3 or sys.argv[1] not in REPORT_TITLES:
+        print(f"Cách dùng: python report_export.py <{'|'.join(REPORT_TITLES)}> <file{'|'.join(WRITERS)}> [tham số...]")
+        sys.exit(2)
+
+    db = DatabaseConnector()
+    if not db.is_connected():
+        print("KHÔNG THỂ KẾT NỐI CSDL.")
+        sys.exit(1)
+    count = export_report(db, sys.argv[1], sys.argv[2], tuple(sys.argv[3:]))
+    print(f"Đã xuất {count} dòng ra {sys.argv[2]}")
+    db.close()
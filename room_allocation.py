@@ -0,0 +1,111 @@
+"""
+Xếp phòng hàng loạt cho sinh viên chưa có phòng (thuần Python, không truy cập CSDL).
+
+DatabaseConnector.allocate_rooms khóa phòng / sinh viên, gọi allocate() rồi ghi kết quả
+trong cùng một giao dịch. Quy tắc chọn phòng cho từng sinh viên (theo thứ tự trong lô):
+
+    1. Đúng loại phòng yêu cầu (nếu có) và tiền phòng <= max_rent (nếu có).
+    2. Ưu tiên phòng đã có người cùng giới tính còn chỗ (lấp đầy trước, giữ phòng trống
+       cho các lô sau), sau đó mới đến phòng trống.
+    3. Trong cùng nhóm: tiền phòng thấp nhất, rồi theo room_no.
+
+Mỗi lượt xếp chỉ tốn O(số loại phòng * log số phòng), nên 10k sinh viên vào 3k phòng
+chỉ mất vài chục mili giây.
+"""
+import heapq
+
+MIXED = "*mixed*" # Phòng đang có người khác giới tính: không nhận thêm khi tách giới tính
+ANYONE = "*" # Nhóm giới tính duy nhất khi không tách giới tính
+
+
+class RoomIndex:
+    """
+    Chỉ mục chỗ trống: mỗi nhóm (loại phòng, giới tính của người đang ở) là một heap
+    (tiền phòng, room_no) của các phòng còn chỗ. Phòng trống thuộc nhóm giới tính None
+    và chuyển sang nhóm của người đầu tiên được xếp vào.
+    Phần tử cũ trong heap (phòng đã đầy / đã chuyển nhóm) được bỏ qua khi lấy ra.
+    """
+
+    def __init__(self, rooms, separate_genders=True):
+        self.separate_genders = separate_genders
+        self._free = {} # room_no -> số chỗ còn trống
+        self._group = {} # room_no -> (loại phòng, giới tính) hiện tại
+        self._rent = {}
+        self._heaps = {} # (loại phòng, giới tính) -> heap [(tiền phòng, room_no)]
+        self.room_types = set()
+        for room in rooms:
+            free = room['capacity'] - room['occupied']
+            if free <= 0 or room.get('status') == 'Maintenance':
+                continue
+            gender = self.gender_key(room.get('gender')) if room['occupied'] > 0 else None
+            self._free[room['room_no']] = free
+            self._rent[room['room_no']] = room['rent']
+            self._move(room['room_no'], (room['room_type'], gender))
+            self.room_types.add(room['room_type'])
+
+    def gender_key(self, gender):
+        if not self.separate_genders:
+            return ANYONE
+        return (gender or "").strip().lower()
+
+    def _move(self, room_no, group):
+        self._group[room_no] = group
+        heapq.heappush(self._heaps.setdefault(group, []), (self._rent[room_no], room_no))
+
+    def _peek(self, group):
+        heap = self._heaps.get(group)
+        while heap:
+            rent, room_no = heap[0]
+            if self._group.get(room_no) == group and self._free[room_no] > 0:
+                return rent, room_no
+            heapq.heappop(heap)
+        return None
+
+    def place(self, gender, room_type=None, max_rent=None):
+        """Chọn và giữ một chỗ cho sinh viên. Trả về room_no, hoặc None nếu không có phòng phù hợp."""
+        key = self.gender_key(gender)
+        room_types = [room_type] if room_type else self.room_types
+        best = None
+        for occupant_gender in (key, None): # Phòng đã có người cùng giới trước, rồi phòng trống
+            for current_type in room_types:
+                top = self._peek((current_type, occupant_gender))
+                if top is None or (max_rent is not None and top[0] > max_rent):
+                    continue
+                if best is None or top < best[0]:
+                    best = (top, (current_type, occupant_gender))
+            if best is not None:
+                break
+        if best is None:
+            return None
+
+        (_, room_no), (current_type, occupant_gender) = best
+        self._free[room_no] -= 1
+        if self._free[room_no] == 0:
+            del self._group[room_no] # Phần tử trong heap trở thành cũ
+        elif occupant_gender is None:
+            self._move(room_no, (current_type, key)) # Phòng trống nhận người đầu tiên
+        return room_no
+
+
+def allocate(rooms, students, separate_genders=True):
+    """
+    Xếp phòng cho 'students' theo thứ tự trong list.
+
+    rooms:    list dict (room_no, room_type, capacity, occupied, rent, status, gender);
+              gender là giới tính của người đang ở (MIXED nếu có cả nam và nữ, bỏ qua nếu phòng trống).
+    students: list dict (student_id, gender, room_type, max_rent); room_type / max_rent có thể None.
+    Trả về (placements [(student_id, room_no)], unplaced [(student_id, lý do)]).
+    """
+    index = RoomIndex(rooms, separate_genders)
+    placements, unplaced = [], []
+    for student in students:
+        room_type = student.get('room_type')
+        if room_type and room_type not in index.room_types:
+            unplaced.append((student['student_id'], f"Không có phòng loại '{room_type}' còn chỗ."))
+            continue
+        room_no = index.place(student.get('gender'), room_type, student.get('max_rent'))
+        if room_no is None:
+            unplaced.append((student['student_id'], "Không còn phòng phù hợp (loại phòng / giới tính / tiền phòng)."))
+        else:
+            placements.append((student['student_id'], room_no))
+    return placements, unplaced
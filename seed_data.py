@@ -0,0 +1,353 @@
+"""
+Tạo dữ liệu giả lập lớn (phòng, sinh viên, thanh toán, điểm danh) để kiểm thử hiệu năng.
+
+Dữ liệu sinh từ một seed (cùng seed + cùng ngày mốc -> cùng dữ liệu) và nhất quán:
+sinh viên chỉ được xếp vào phòng còn chỗ, mỗi phòng chỉ có một giới tính,
+rooms.occupied / status khớp với số sinh viên, thanh toán và điểm danh chỉ có từ
+ngày nhập học của sinh viên đã có phòng.
+
+Dữ liệu được ghi thẳng vào CSDL, không qua add_student / add_payment:
+    infile      : LOAD DATA LOCAL INFILE theo từng khối (cần local_infile=ON trên server)
+    executemany : INSERT nhiều dòng theo lô (khi server không cho LOAD DATA LOCAL;
+                  luôn dùng với backend SQLite)
+Trong lúc nạp, các index phụ (DatabaseConnector.INDEXES / FULLTEXT_INDEXES) bị xóa và
+kiểm tra khóa ngoại / unique bị tắt; sau đó index được tạo lại một lần (create_tables),
+thống kê bảng và các bảng tổng hợp của Dashboard được tính lại.
+
+XÓA toàn bộ rooms / students / payments / attendance của CSDL chỉ định trước khi tạo.
+
+    python seed_data.py --database hostel_bench --students 1000000 --attendance-days 30
+    python seed_data.py --database hostel_bench --students 20000 --seed 7 --method executemany
+    python seed_data.py --backend sqlite --database hostel_bench.db --students 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+from datetime import date, timedelta
+from itertools import islice
+
+import mysql.connector
+from mysql.connector import Error
+
+from database import DatabaseConnector
+
+ROOM_TYPES = ( # (loại phòng, sức chứa, tiền phòng cơ bản, tỷ lệ)
+    ('Single', 1, 6000, 0.2),
+    ('Double', 2, 4500, 0.4),
+    ('Dorm', 6, 2500, 0.4),
+)
+SPARE_BEDS = 1.25 # Số giường / số sinh viên khi không truyền số phòng (bù cho các phòng chỉ lấp một phần)
+MAINTENANCE_RATE = 0.02
+PARTIAL_ROOM_RATE = 0.3 # Phòng chỉ được lấp một phần
+UNASSIGNED_RATE = 0.02 # Sinh viên chưa có phòng
+PAYMENT_RATE = 0.9 # Xác suất có thanh toán trong một tháng
+PARTIAL_PAYMENT_RATE = 0.2
+ABSENT_RATE = 0.07
+ADMISSION_DAYS = 730 # Ngày nhập học trong vòng 2 năm trước ngày mốc
+PAYMENT_METHODS = ('Cash', 'UPI', 'Card', 'Other')
+
+LAST_NAMES = ("Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương", "Lý")
+MIDDLE_NAMES = {'Male': ("Văn", "Hữu", "Đức", "Minh", "Quang", "Thành"), 'Female': ("Thị", "Ngọc", "Thu", "Minh", "Thanh", "Kim")}
+FIRST_NAMES = {
+    'Male': ("An", "Bình", "Cường", "Dũng", "Hải", "Hùng", "Khánh", "Long", "Nam", "Phong", "Quân", "Sơn", "Tài", "Tuấn", "Việt"),
+    'Female': ("Anh", "Chi", "Dung", "Giang", "Hà", "Hương", "Lan", "Linh", "Mai", "Ngân", "Nhung", "Phương", "Thảo", "Trang", "Vy"),
+}
+
+ROOM_COLUMNS = ("room_no", "room_type", "capacity", "occupied", "rent", "status")
+STUDENT_COLUMNS = ("student_id", "name", "gender", "age", "email", "contact", "admission_date", "room_no")
+PAYMENT_COLUMNS = ("student_id", "amount", "payment_date", "method")
+ATTENDANCE_COLUMNS = ("student_id", "attendance_date", "status")
+
+INFILE_ROWS = 500_000 # Số dòng mỗi file LOAD DATA (một giao dịch)
+BATCH_ROWS = 5_000 # Số dòng mỗi lệnh INSERT khi dùng executemany
+COMMIT_ROWS = 100_000 # Số dòng mỗi giao dịch khi dùng executemany
+NULL = r"\N"
+
+
+class HostelData:
+    """
+    Sinh dữ liệu theo seed. Các dòng được sinh dần (generator); mỗi sinh viên / phòng chỉ
+    giữ vài con số trong mảng (array), nên 1M sinh viên chỉ tốn vài chục MB.
+
+    students() phải được đọc hết trước rooms() / payments() / attendance(), vì việc xếp
+    phòng diễn ra trong lúc sinh sinh viên.
+    """
+
+    def __init__(self, students, rooms=None, attendance_days=30, payment_months=12, seed=42, anchor=None):
+        self.student_count = students
+        self.attendance_days = attendance_days
+        self.payment_months = payment_months
+        self.seed = seed
+        self.anchor = anchor or date.today()
+        self._dates = [(self.anchor - timedelta(days=back)).isoformat()
+                       for back in range(max(ADMISSION_DAYS, attendance_days) + 1)] # Theo số ngày trước ngày mốc
+
+        rng = random.Random(f"{seed}-rooms")
+        if rooms is None:
+            beds_per_room = sum(capacity * share for _, capacity, _, share in ROOM_TYPES)
+            rooms = max(1, round(students * SPARE_BEDS / beds_per_room))
+        self.room_count = rooms
+        self._room_width = max(6, len(str(rooms - 1)))
+        weights = [share for *_, share in ROOM_TYPES]
+        self.room_type = array('B', rng.choices(range(len(ROOM_TYPES)), weights, k=rooms))
+        self.rent = array('I', (ROOM_TYPES[t][2] + rng.randint(0, 4) * 250 for t in self.room_type))
+        self.maintenance = bytearray(rng.random() < MAINTENANCE_RATE for _ in range(rooms))
+        self.occupied = array('H', bytes(2 * rooms))
+
+        self.student_room = array('i', [-1]) * students # Chỉ số phòng của từng sinh viên (-1 = chưa có phòng)
+        self.admission = array('H', bytes(2 * students)) # Số ngày từ ngày nhập học đến ngày mốc
+
+    def room_no(self, index):
+        return f"R{index:0{self._room_width}d}"
+
+    @staticmethod
+    def student_id(index):
+        return f"S{index:08d}"
+
+    def students(self):
+        rng = random.Random(f"{self.seed}-students")
+        order = [room for room in range(self.room_count) if not self.maintenance[room]]
+        rng.shuffle(order)
+        free_rooms = iter(order)
+        current = {} # giới tính -> [phòng đang lấp, số chỗ còn định lấp]
+
+        def take_bed(gender):
+            slot = current.get(gender)
+            if slot is None or slot[1] == 0:
+                room = next(free_rooms, None)
+                if room is None:
+                    return -1
+                capacity = ROOM_TYPES[self.room_type[room]][1]
+                target = rng.randint(1, capacity) if rng.random() < PARTIAL_ROOM_RATE else capacity
+                slot = current[gender] = [room, target]
+            slot[1] -= 1
+            self.occupied[slot[0]] += 1
+            return slot[0]
+
+        for n in range(self.student_count):
+            gender = 'Male' if rng.random() < 0.5 else 'Female'
+            back = rng.randrange(ADMISSION_DAYS)
+            room = -1 if rng.random() < UNASSIGNED_RATE else take_bed(gender)
+            self.student_room[n] = room
+            self.admission[n] = back
+            student_id = self.student_id(n)
+            name = f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES[gender])} {rng.choice(FIRST_NAMES[gender])}"
+            yield (student_id, name, gender, str(rng.randint(18, 25)), f"{student_id.lower()}@student.example.edu",
+                   f"09{n:08d}", self._dates[back], self.room_no(room) if room >= 0 else None)
+
+    def rooms(self):
+        for room in range(self.room_count):
+            room_type, capacity, _, _ = ROOM_TYPES[self.room_type[room]]
+            occupied = self.occupied[room]
+            if self.maintenance[room]:
+                status = 'Maintenance'
+            else:
+                status = 'Full' if occupied >= capacity else 'Available'
+            yield (self.room_no(room), room_type, str(capacity), str(occupied), str(self.rent[room]), status)
+
+    def payments(self):
+        """Mỗi tháng (trong payment_months tháng gần nhất, từ tháng nhập học) tối đa một lần đóng tiền phòng."""
+        rng = random.Random(f"{self.seed}-payments")
+        months = []
+        month = self.anchor.replace(day=1)
+        for _ in range(self.payment_months):
+            months.append(month)
+            month = (month - timedelta(days=1)).replace(day=1)
+
+        for n in range(self.student_count):
+            room = self.student_room[n]
+            if room < 0:
+                continue
+            rent = self.rent[room]
+            admitted = self.anchor - timedelta(days=self.admission[n])
+            student_id = self.student_id(n)
+            for month in months:
+                if rng.random() >= PAYMENT_RATE:
+                    continue
+                paid_on = min(month.replace(day=rng.randint(1, 28)), self.anchor)
+                if paid_on < admitted:
+                    continue
+                amount = rent if rng.random() >= PARTIAL_PAYMENT_RATE else rent * rng.randint(3, 9) // 10
+                yield (student_id, str(amount), paid_on.isoformat(), rng.choice(PAYMENT_METHODS))
+
+    def attendance(self):
+        """Điểm danh attendance_days ngày gần nhất, theo thứ tự (student_id, ngày) để index unique được ghi tuần tự."""
+        rng = random.Random(f"{self.seed}-attendance")
+        draw = rng.random
+        days = [(back, self._dates[back]) for back in range(self.attendance_days - 1, -1, -1)]
+        for n in range(self.student_count):
+            if self.student_room[n] < 0:
+                continue
+            admitted = self.admission[n]
+            student_id = self.student_id(n)
+            for back, day in days:
+                if back <= admitted:
+                    yield (student_id, day, 'Absent' if draw() < ABSENT_RATE else 'Present')
+
+
+def _tsv(row):
+    try:
+        return "\t".join(row)
+    except TypeError: # Có giá trị NULL
+        return "\t".join(NULL if value is None else value for value in row)
+
+
+class BulkLoader:
+    """Ghi các dòng (tuple chuỗi, None = NULL) vào một bảng theo khối."""
+
+    def __init__(self, conn, method, workdir, on_progress=None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.method = method
+        self.workdir = workdir
+        self.on_progress = on_progress
+
+    def load(self, table, columns, rows):
+        """Nạp toàn bộ 'rows'; trả về số dòng đã ghi."""
+        size = INFILE_ROWS if self.method == 'infile' else BATCH_ROWS
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        total = uncommitted = 0
+        while True:
+            chunk = list(islice(rows, size))
+            if not chunk:
+                break
+            if self.method == 'infile':
+                self._load_file(table, columns, chunk)
+            else:
+                self.cursor.executemany(insert, chunk) # mysql.connector gộp thành một lệnh INSERT nhiều dòng
+            total += len(chunk)
+            uncommitted += len(chunk)
+            if uncommitted >= COMMIT_ROWS or self.method == 'infile':
+                self.conn.commit()
+                uncommitted = 0
+                if self.on_progress:
+                    self.on_progress(table, total)
+        self.conn.commit()
+        return total
+
+    def _load_file(self, table, columns, rows):
+        path = os.path.join(self.workdir, f"{table}.tsv")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(_tsv(row) + "\n" for row in rows)
+        self.cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+            (path,)
+        )
+
+
+def _resolve_method(cursor, method):
+    if method != 'auto':
+        return method
+    cursor.execute("SHOW VARIABLES LIKE 'local_infile'")
+    row = cursor.fetchone()
+    return 'infile' if row and str(row[1]).upper() in ('ON', '1') else 'executemany'
+
+
+def _drop_secondary_indexes(cursor, backend):
+    """Xóa các index phụ để nạp nhanh; index còn cần cho khóa ngoại được giữ lại."""
+    for table, index_name, _ in DatabaseConnector.INDEXES + DatabaseConnector.FULLTEXT_INDEXES:
+        if backend == 'mysql': # SQLite: DROP INDEX IF EXISTS (xem sqlite_backend.translate)
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+                (table, index_name)
+            )
+            if not cursor.fetchall():
+                continue
+        try:
+            cursor.execute(f"DROP INDEX {index_name} ON {table}")
+        except Error as e:
+            print(f"Giữ index {index_name}: {e.msg}")
+
+
+def seed_database(db, students, rooms=None, attendance_days=30, payment_months=12, seed=42, anchor=None,
+                  method='auto', on_progress=None):
+    """
+    Xóa và tạo lại dữ liệu giả lập trong CSDL của 'db'.
+    method: 'auto' (infile nếu server bật local_infile), 'infile' hoặc 'executemany'
+            (backend SQLite luôn dùng executemany).
+    on_progress(bảng, số dòng đã ghi) được gọi sau mỗi giao dịch.
+    Trả về dict {'method', 'seconds', 'rooms', 'students', 'payments', 'attendance'}.
+    """
+    started = time.perf_counter()
+    data = HostelData(students, rooms, attendance_days, payment_months, seed, anchor)
+    if db.backend == 'sqlite':
+        conn = db._connect()
+        method = 'executemany'
+    else:
+        conn = mysql.connector.connect(host=db.host, user=db.user, password=db.password,
+                                       database=db.database, allow_local_infile=True)
+    cursor = conn.cursor()
+    result = {}
+    try:
+        result['method'] = method = _resolve_method(cursor, method)
+        cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+        _drop_secondary_indexes(cursor, db.backend)
+        for table in ('attendance', 'payments', 'students', 'rooms'):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            loader = BulkLoader(conn, method, workdir, on_progress)
+            # Sinh viên trước: phòng chỉ biết occupied sau khi xếp xong (khóa ngoại đang tắt)
+            result['students'] = loader.load('students', STUDENT_COLUMNS, data.students())
+            result['rooms'] = loader.load('rooms', ROOM_COLUMNS, data.rooms())
+            result['payments'] = loader.load('payments', PAYMENT_COLUMNS, data.payments())
+            result['attendance'] = loader.load('attendance', ATTENDANCE_COLUMNS, data.attendance())
+
+        cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+        # Các tiến trình đang chạy xóa bộ đệm dữ liệu tham chiếu (xem DatabaseConnector._check_versions)
+        cursor.execute("INSERT INTO data_versions (name, version) VALUES ('rooms', 1), ('students', 1) "
+                       "ON DUPLICATE KEY UPDATE version = version + 1")
+        conn.commit()
+
+        db.create_tables() # Tạo lại các index phụ (mỗi index một lần sắp xếp, nhanh hơn cập nhật từng dòng)
+        cursor.execute("ANALYZE TABLE rooms, students, payments, attendance")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    db.rebuild_stats()
+    db.reference_cache.invalidate()
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", required=True, help="CSDL đích, hoặc file khi dùng SQLite (dữ liệu cũ sẽ bị xóa!)")
+    parser.add_argument("--backend", choices=tuple(DatabaseConnector.BACKENDS), default="mysql")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--rooms", type=int, default=None, help=f"Mặc định: đủ {SPARE_BEDS:.0%} số giường so với số sinh viên")
+    parser.add_argument("--attendance-days", type=int, default=30)
+    parser.add_argument("--payment-months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=None, help="Ngày mốc YYYY-MM-DD (mặc định: hôm nay)")
+    parser.add_argument("--method", choices=("auto", "infile", "executemany"), default="auto")
+    args = parser.parse_args()
+
+    db = DatabaseConnector(host=args.host, user=args.user, password=args.password, database=args.database,
+                           backend=args.backend)
+    if not db.is_connected():
+        print("KHÔNG THỂ KẾT NỐI CSDL.")
+        sys.exit(1)
+    try:
+        result = seed_database(db, args.students, args.rooms, args.attendance_days, args.payment_months,
+                               args.seed, args.anchor_date, args.method,
+                               on_progress=lambda table, rows: print(f"  {table}: {rows} dòng", flush=True))
+    except Error as e:
+        print(f"Lỗi CSDL khi tạo dữ liệu: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    total = sum(result[table] for table in ('rooms', 'students', 'payments', 'attendance'))
+    print(f"Đã tạo {result['rooms']} phòng, {result['students']} sinh viên, {result['payments']} thanh toán, "
+          f"{result['attendance']} lượt điểm danh bằng {result['method']} trong {result['seconds']:.1f}s "
+          f"({total / result['seconds']:,.0f} dòng/s).")
@@ -0,0 +1,346 @@
+"""
+Backend SQLite cho DatabaseConnector(backend='sqlite'): chi nhánh nhỏ chạy trên một máy,
+dữ liệu nằm trong một file, mỗi truy vấn chạy ngay trong tiến trình (không qua mạng / socket).
+
+SQLiteConnection / SQLiteCursor giả lập phần API của mysql.connector mà DatabaseConnector,
+ConnectionPool và seed_data dùng: cursor(dictionary=True), execute / executemany / fetch*,
+rowcount, lastrowid, description, commit / rollback, in_transaction, is_connected / reconnect.
+Lỗi sqlite3 được đổi sang lớp lỗi của mysql.connector (errno 1062 / 1451 / 1452 như MySQL),
+nên các khối 'except Error' hiện có không phải sửa.
+
+Câu lệnh viết cho MySQL được dịch một lần rồi lưu trong bộ đệm (translate):
+    %s                                  -> ?
+    INT AUTO_INCREMENT PRIMARY KEY      -> INTEGER PRIMARY KEY AUTOINCREMENT
+    col ENUM('a', 'b')                  -> col TEXT CHECK (col IN ('a', 'b'))
+    UNIQUE KEY (...)                    -> UNIQUE (...)
+    ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT (khóa) DO UPDATE SET c = excluded.c
+    LAST_DAY(x - INTERVAL 1 MONTH) + INTERVAL 1 DAY -> date(x, 'start of month')
+    LIKE ?                              -> LIKE ? ESCAPE '\\' (MySQL mặc định thoát bằng '\\')
+    SELECT ... FOR UPDATE               -> SELECT ... sau BEGIN IMMEDIATE (khóa ghi cả file)
+    TRUNCATE TABLE / DROP INDEX ... ON / ANALYZE TABLE / SET SESSION foreign_key_checks
+REPLACE INTO chạy nguyên dạng. Lọc theo tháng đã dùng khoảng ngày (month_range) thay cho
+YEAR()/MONTH() nên không cần dịch. Các SET SESSION khác (vd: net_write_timeout) bị bỏ qua.
+
+Giao dịch: kết nối chạy ở chế độ autocommit cho lệnh đọc; lệnh ghi đầu tiên (hoặc
+SELECT ... FOR UPDATE) mở BEGIN IMMEDIATE và giữ khóa ghi tới commit / rollback,
+tương đương khóa dòng của InnoDB nhưng ở mức cả CSDL. WAL cho phép các kết nối khác
+trong pool vẫn đọc song song trong lúc đó.
+"""
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errors
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL", # Người đọc không chặn người ghi
+    "PRAGMA synchronous = NORMAL", # Với WAL: chỉ fsync khi checkpoint, mất điện không làm hỏng file
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -65536", # 64 MB cache trang cho mỗi kết nối
+    "PRAGMA temp_store = MEMORY", # Bảng tạm của ORDER BY / GROUP BY lớn nằm trong RAM
+    "PRAGMA mmap_size = 268435456", # Đọc file qua mmap (256 MB), bớt một lần sao chép
+)
+BUSY_TIMEOUT = 5.0 # Giây chờ khóa ghi của kết nối khác trước khi báo lỗi (như pool_timeout)
+
+# Khóa unique dùng làm đích ON CONFLICT khi dịch ON DUPLICATE KEY UPDATE
+CONFLICT_KEYS = {
+    'attendance': ('student_id', 'attendance_date'),
+    'hostel_stats': ('id',),
+    'hostel_stats_daily': ('stat_date',),
+    'hostel_stats_monthly': ('month_start',),
+    'data_versions': ('name',),
+}
+
+_types_registered = False
+_types_lock = threading.Lock()
+
+
+def _register_types():
+    """
+    Để giá trị trả về cùng kiểu với mysql.connector (date / datetime / Decimal) theo kiểu khai báo
+    của cột. Bảng adapter / converter của sqlite3 là chung cho cả tiến trình, nên chỉ đăng ký khi
+    mở kết nối SQLite đầu tiên: import database.py với backend MySQL không đổi hành vi sqlite3.
+    """
+    global _types_registered
+    with _types_lock:
+        if _types_registered:
+            return
+        sqlite3.register_adapter(date, date.isoformat)
+        sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+        sqlite3.register_adapter(Decimal, str)
+        sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+        sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+        sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+        _types_registered = True
+
+# sql: câu lệnh SQLite (None = bỏ qua); begin: cần BEGIN IMMEDIATE trước khi chạy;
+# probe: (câu SELECT theo khóa, vị trí tham số) để tính rowcount kiểu MySQL cho upsert một dòng
+Statement = namedtuple('Statement', 'sql begin probe')
+
+_REWRITES = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), replacement) for pattern, replacement in (
+    (r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (r"\b(\w+)\s+ENUM\s*\(([^)]*)\)", r"\1 TEXT CHECK (\1 IN (\2))"),
+    (r"\bUNIQUE\s+KEY\s*\(", "UNIQUE ("),
+    (r"LAST_DAY\(\s*(\S+?)\s*-\s*INTERVAL\s+1\s+MONTH\s*\)\s*\+\s*INTERVAL\s+1\s+DAY", r"date(\1, 'start of month')"),
+    (r"\bLIKE\s+\?(?!\s*ESCAPE)", lambda match: "LIKE ? ESCAPE '\\'"),
+    (r"^TRUNCATE\s+TABLE\s+(\w+)", r"DELETE FROM \1"),
+    (r"^DROP\s+INDEX\s+(\w+)\s+ON\s+\w+", r"DROP INDEX IF EXISTS \1"),
+    (r"^ANALYZE\s+TABLE\b.*", "ANALYZE"),
+)]
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\s*$", re.IGNORECASE)
+_UPSERT = re.compile(r"(INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\))\s*(.*?)\s*ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(.*)$",
+                     re.IGNORECASE | re.DOTALL)
+_VALUES_REF = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+_FOREIGN_KEY_CHECKS = re.compile(r"\bforeign_key_checks\s*=\s*(\d)", re.IGNORECASE)
+_WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _split_top_level(text):
+    """Tách theo dấu phẩy không nằm trong ngoặc; None nếu ngoặc không cân."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == ',' and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return parts if depth == 0 else None
+
+
+def _translate_upsert(match):
+    insert, table, columns, body, updates = match.groups()
+    columns = [column.strip() for column in columns.split(',')]
+    keys = CONFLICT_KEYS.get(table)
+    assignments = []
+    for assignment in _split_top_level(updates) or [updates]:
+        column, expr = assignment.split('=', 1)
+        assignments.append((column.strip(), _VALUES_REF.sub(r"excluded.\1", expr.strip())))
+
+    if re.match(r"SELECT\b", body, re.IGNORECASE):
+        # INSERT ... SELECT ... ON CONFLICT: SQLite cần WHERE để không hiểu nhầm ON là điều kiện JOIN
+        body = f"SELECT * FROM ({body}) WHERE true"
+    target = f"({', '.join(keys)}) " if keys else ""
+    sql = f"{insert} {body} ON CONFLICT {target}DO UPDATE SET " + ", ".join(f"{c} = {e}" for c, e in assignments)
+    if not any('?' in expr for _, expr in assignments):
+        # Như MySQL: dòng đã có với giá trị không đổi thì không tính là bị ảnh hưởng
+        sql += " WHERE NOT (" + " AND ".join(f"{c} IS {e}" for c, e in assignments) + ")"
+
+    # Upsert một dòng: dò khóa trước để rowcount trả về 1 (thêm) / 2 (đổi) / 0 (không đổi)
+    probe = None
+    values = re.match(r"VALUES\s*\((.*)\)$", body, re.IGNORECASE | re.DOTALL)
+    items = _split_top_level(values.group(1)) if values else None
+    if keys and items and len(items) == len(columns) and all(key in columns for key in keys):
+        positions = [columns.index(key) for key in keys]
+        if all(items[i] == '?' for i in positions):
+            indexes = tuple(sum(item.count('?') for item in items[:i]) for i in positions)
+            where = " AND ".join(f"{key} = ?" for key in keys)
+            probe = (f"SELECT 1 FROM {table} WHERE {where}", indexes)
+    return sql, probe
+
+
+@lru_cache(maxsize=2048)
+def translate(operation):
+    """Dịch một câu lệnh MySQL của DatabaseConnector sang SQLite (kết quả được lưu trong bộ đệm)."""
+    sql = operation.strip()
+    if re.match(r"SET\s+SESSION\b", sql, re.IGNORECASE):
+        checks = _FOREIGN_KEY_CHECKS.search(sql)
+        if checks:
+            return Statement(f"PRAGMA foreign_keys = {'ON' if checks.group(1) == '1' else 'OFF'}", False, None)
+        return Statement(None, False, None)
+
+    sql = sql.replace("%s", "?").replace("%%", "%")
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    locking = _FOR_UPDATE.search(sql) is not None
+    if locking:
+        sql = _FOR_UPDATE.sub("", sql)
+    probe = None
+    upsert = _UPSERT.match(sql)
+    if upsert:
+        sql, probe = _translate_upsert(upsert)
+    verb = sql.split(None, 1)[0].upper() if sql else ""
+    return Statement(sql, locking or verb in _WRITE_VERBS, probe)
+
+
+def _mysql_error(error, sql=""):
+    """Đổi lỗi sqlite3 sang lỗi mysql.connector tương ứng."""
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        errno = None
+        if message.startswith("UNIQUE") or "PRIMARY KEY" in message:
+            errno = 1062 # ER_DUP_ENTRY
+        elif "FOREIGN KEY" in message:
+            # ER_ROW_IS_REFERENCED_2 khi xóa dòng cha, ER_NO_REFERENCED_ROW_2 khi ghi dòng con
+            errno = 1451 if sql.lstrip()[:6].upper() == 'DELETE' else 1452
+        return errors.IntegrityError(msg=message, errno=errno)
+    if isinstance(error, sqlite3.OperationalError):
+        return errors.OperationalError(msg=message)
+    if isinstance(error, sqlite3.ProgrammingError):
+        return errors.ProgrammingError(msg=message)
+    return errors.DatabaseError(msg=message)
+
+
+class SQLiteCursor:
+    """Cursor kiểu mysql.connector trên một cursor sqlite3 (dictionary=True: mỗi dòng là dict)."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._conn.cursor()
+        self._dictionary = dictionary
+        self._columns = None
+        self._rowcount = -1
+
+    @property
+    def rowcount(self):
+        return self._rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation, params=()):
+        statement = translate(operation)
+        if statement.sql is None:
+            self._columns, self._rowcount = None, 0
+            return
+        params = tuple(params) if params else ()
+        existed = None
+        try:
+            if statement.begin:
+                self._connection._begin()
+            if statement.probe:
+                probe_sql, indexes = statement.probe
+                existed = self._cursor.execute(probe_sql, [params[i] for i in indexes]).fetchone() is not None
+            self._cursor.execute(statement.sql, params)
+        except sqlite3.Error as e:
+            raise _mysql_error(e, statement.sql) from e
+        self._after_execute()
+        if existed is not None:
+            self._rowcount = (2 if self._rowcount else 0) if existed else 1
+
+    def executemany(self, operation, seq_params):
+        statement = translate(operation)
+        if statement.sql is None:
+            return
+        try:
+            if statement.begin:
+                self._connection._begin()
+            self._cursor.executemany(statement.sql, seq_params)
+        except sqlite3.Error as e:
+            raise _mysql_error(e, statement.sql) from e
+        self._after_execute()
+
+    def _after_execute(self):
+        description = self._cursor.description
+        self._columns = [column[0] for column in description] if description else None
+        self._rowcount = self._cursor.rowcount
+
+    def _rows(self, rows):
+        if not self._dictionary or self._columns is None:
+            return rows
+        columns = self._columns
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchone(self):
+        if self._columns is None:
+            return None
+        try:
+            row = self._cursor.fetchone()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self._columns, row))
+
+    def fetchmany(self, size=1):
+        if self._columns is None:
+            return []
+        try:
+            return self._rows(self._cursor.fetchmany(size))
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def fetchall(self):
+        if self._columns is None:
+            return []
+        try:
+            return self._rows(self._cursor.fetchall())
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Kết nối kiểu mysql.connector tới một file SQLite (WAL, các PRAGMA trong PRAGMAS)."""
+
+    def __init__(self, path, timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+        self.reconnect()
+
+    def reconnect(self, attempts=1, delay=0):
+        self.close()
+        _register_types()
+        try:
+            # isolation_level=None: tự quản lý BEGIN; check_same_thread=False: kết nối trong pool
+            # được mượn bởi nhiều luồng (mỗi lúc chỉ một luồng)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES,
+                                   cached_statements=512)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self._conn = conn
+
+    def is_connected(self):
+        return self._conn is not None
+
+    @property
+    def in_transaction(self):
+        return self._conn is not None and self._conn.in_transaction
+
+    def cursor(self, dictionary=False, **kwargs):
+        if self._conn is None:
+            raise errors.OperationalError(msg="SQLite connection is closed")
+        return SQLiteCursor(self, dictionary)
+
+    def _begin(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def rollback(self):
+        try:
+            self._conn.rollback()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def get_server_info(self):
+        return f"SQLite {sqlite3.sqlite_version}"
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
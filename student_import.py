@@ -0,0 +1,149 @@
+"""
+Nhập sinh viên hàng loạt từ file CSV hoặc Excel (.xlsx).
+
+File cần có dòng tiêu đề với các cột (giống file Student Report xuất ra):
+    student_id, name, gender, age, email, contact, admission_date, room_no
+
+File được đọc dần theo từng khối (không nạp toàn bộ vào bộ nhớ), mỗi khối được
+kiểm tra rồi ghi bằng DatabaseConnector.add_students_bulk trong một giao dịch.
+
+    python student_import.py students.csv
+"""
+import csv
+import os
+import sys
+from datetime import date, datetime
+
+COLUMNS = ("student_id", "name", "gender", "age", "email", "contact", "admission_date", "room_no")
+
+
+def read_rows(path):
+    """Sinh lần lượt (số dòng trong file, dict dữ liệu) từ file CSV/XLSX."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook # Chỉ nạp openpyxl khi thật sự cần
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h).strip().lower() if h is not None else "" for h in next(rows, ())]
+            for line_no, values in enumerate(rows, start=2):
+                if any(v not in (None, "") for v in values):
+                    yield line_no, dict(zip(header, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            reader.fieldnames = [h.strip().lower() for h in reader.fieldnames or []]
+            for row in reader:
+                if any((v or "").strip() for v in row.values() if isinstance(v, str)):
+                    yield reader.line_num, row
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value) # Excel lưu số dạng float (vd: 20.0)
+    return str(value).strip()
+
+
+def validate_row(row):
+    """Kiểm tra và chuẩn hóa một dòng. Trả về (data, None) hoặc (None, lý do)."""
+    data = {col: _text(row.get(col)) for col in COLUMNS}
+    if not data['student_id'] or not data['name']:
+        return None, "Thiếu student_id hoặc name."
+    if not data['room_no']:
+        return None, "Thiếu room_no."
+    try:
+        data['age'] = int(data['age'])
+        if data['age'] <= 0:
+            raise ValueError
+    except ValueError:
+        return None, f"Tuổi không hợp lệ: '{data['age']}'."
+
+    admission = row.get('admission_date')
+    if isinstance(admission, datetime):
+        data['admission_date'] = admission.date()
+    elif isinstance(admission, date):
+        data['admission_date'] = admission
+    elif data['admission_date']:
+        try:
+            data['admission_date'] = date.fromisoformat(data['admission_date'][:10])
+        except ValueError:
+            return None, f"Ngày nhập học không hợp lệ (cần YYYY-MM-DD): '{data['admission_date']}'."
+    else:
+        data['admission_date'] = date.today()
+
+    data['gender'] = data['gender'] or None
+    data['email'] = data['email'] or None
+    return data, None
+
+
+def import_students(db, path, chunk_size=1000, on_progress=None):
+    """
+    Nhập sinh viên từ file. Trả về dict:
+        {'imported': số dòng đã thêm, 'rejected': [(số dòng, lý do, dữ liệu gốc), ...]}
+    on_progress(imported, rejected_count) được gọi sau mỗi khối.
+    """
+    imported, rejected = 0, []
+    chunk = [] # (line_no, raw_row, data)
+
+    def flush():
+        nonlocal imported
+        if not chunk:
+            return
+        count, failures = db.add_students_bulk([data for _, _, data in chunk])
+        imported += count
+        for index, reason in failures:
+            line_no, raw, _ = chunk[index]
+            rejected.append((line_no, reason, raw))
+        chunk.clear()
+        if on_progress:
+            on_progress(imported, len(rejected))
+
+    for line_no, raw in read_rows(path):
+        data, error = validate_row(raw)
+        if error:
+            rejected.append((line_no, error, raw))
+            continue
+        chunk.append((line_no, raw, data))
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    rejected.sort(key=lambda item: item[0])
+    return {'imported': imported, 'rejected': rejected}
+
+
+def write_rejected_report(rejected, path):
+    """Ghi danh sách dòng bị loại ra file CSV (số dòng, lý do, dữ liệu gốc)."""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(("line", "reason") + COLUMNS)
+        for line_no, reason, raw in rejected:
+            writer.writerow((line_no, reason) + tuple(_text(raw.get(col)) for col in COLUMNS))
+
+
+def rejected_report_path(source_path):
+    base, _ = os.path.splitext(source_path)
+    return f"{base}_rejected.csv"
+
+
+if __name__ == "__main__":
+    from database import DatabaseConnector
+
+    if len(sys.argv) != 2:
+        print("Cách dùng: python student_import.py <file.csv|file.xlsx>")
+        sys.exit(2)
+
+    db = DatabaseConnector()
+    if not db.is_connected():
+        print("KHÔNG THỂ KẾT NỐI CSDL.")
+        sys.exit(1)
+    result = import_students(db, sys.argv[1], on_progress=lambda n, r: print(f"  đã thêm {n}, bị loại {r}"))
+    print(f"Đã thêm {result['imported']} sinh viên, {len(result['rejected'])} dòng bị loại.")
+    if result['rejected']:
+        report = rejected_report_path(sys.argv[1])
+        write_rejected_report(result['rejected'], report)
+        print(f"Danh sách dòng bị loại: {report}")
+    db.close()
@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from bisect import bisect_left
 from tkinter import ttk
 
 def apply_treeview_style():
@@ -53,4 +54,118 @@ def apply_treeview_style():
                         foreground="#1A1A1A",       # Chữ đen
                         font=('Calibri', 12, 'bold'),
                         bordercolor="#E0E0E0",
-                        borderwidth=0)
\ No newline at end of file
+                        borderwidth=0)
+
+
+class LoadingIndicator:
+    """
+    Hiển thị trạng thái "Loading..." trên một CTkLabel trong khi có task nền đang chạy.
+    Đếm số task nên có thể dùng chung cho nhiều lời gọi cùng lúc.
+    """
+
+    def __init__(self, label, text="Loading..."):
+        self.label = label
+        self.text = text
+        self._count = 0
+
+    def begin(self):
+        self._count += 1
+        if self._count == 1:
+            self.label.configure(text=self.text)
+
+    def end(self):
+        self._count = max(0, self._count - 1)
+        if self._count == 0 and self.label.winfo_exists():
+            self.label.configure(text="")
+
+    @property
+    def busy(self):
+        return self._count > 0
+
+
+class TreeviewSync:
+    """
+    Cập nhật ttk.Treeview cho khớp với danh sách dòng mới mà không xóa/chèn lại toàn bộ:
+    chỉ chèn dòng mới, sửa dòng đã thay đổi, xóa dòng không còn và đổi chỗ khi thứ tự khác.
+    iid của mỗi item là key_of(row) (vd: room_no, id nhân viên), nên dòng đang chọn
+    và vị trí cuộn được giữ nguyên sau khi tải lại.
+
+    values_of(row) -> (values, tags)
+    sort_key(row)  -> khóa sắp xếp, để patch() chèn dòng mới đúng chỗ (mặc định: key_of)
+    """
+
+    def __init__(self, tree, key_of, values_of, sort_key=None):
+        self.tree = tree
+        self.key_of = key_of
+        self.values_of = values_of
+        self.sort_key = sort_key or key_of
+        self._rendered = {} # iid -> (values, tags) đã ghi vào Treeview
+        self._sort_keys = {} # iid -> sort_key(row)
+        self._order = []
+
+    def sync(self, rows):
+        """Áp dụng danh sách dòng mới. Trả về (số dòng chèn, sửa, xóa)."""
+        rendered, order, sort_keys = {}, [], {}
+        for row in rows:
+            iid = str(self.key_of(row))
+            values, tags = self.values_of(row)
+            rendered[iid] = (tuple(values), tuple(tags))
+            sort_keys[iid] = self.sort_key(row)
+            order.append(iid)
+
+        removed = [iid for iid in self._order if iid not in rendered]
+        if removed:
+            self.tree.delete(*removed)
+
+        # Thứ tự các dòng cũ không đổi: chỉ cần chèn dòng mới đúng vị trí, không phải move
+        kept = [iid for iid in self._order if iid in rendered]
+        same_order = kept == [iid for iid in order if iid in self._rendered]
+
+        inserted = updated = 0
+        for index, iid in enumerate(order):
+            values, tags = rendered[iid]
+            previous = self._rendered.get(iid)
+            if previous is None:
+                self.tree.insert("", index, iid=iid, values=values, tags=tags)
+                inserted += 1
+                continue
+            if previous != rendered[iid]:
+                self.tree.item(iid, values=values, tags=tags)
+                updated += 1
+            if not same_order:
+                self.tree.move(iid, "", index)
+
+        self._rendered, self._order, self._sort_keys = rendered, order, sort_keys
+        return inserted, updated, len(removed)
+
+    def patch(self, rows=(), removed=()):
+        """
+        Chỉ cập nhật một số dòng (vd: theo sự kiện thay đổi) mà không cần danh sách đầy đủ.
+        Dòng đã có được sửa tại chỗ, dòng mới được chèn theo sort_key, 'removed' là các khóa cần xóa.
+        Trả về (số dòng chèn, sửa, xóa).
+        """
+        gone = [iid for iid in (str(key) for key in removed) if iid in self._rendered]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self._rendered[iid]
+                del self._sort_keys[iid]
+            self._order = [iid for iid in self._order if iid in self._rendered]
+
+        inserted = updated = 0
+        for row in rows:
+            iid = str(self.key_of(row))
+            values, tags = self.values_of(row)
+            item = (tuple(values), tuple(tags))
+            previous = self._rendered.get(iid)
+            if previous is None:
+                index = bisect_left([self._sort_keys[other] for other in self._order], self.sort_key(row))
+                self.tree.insert("", index, iid=iid, values=item[0], tags=item[1])
+                self._order.insert(index, iid)
+                inserted += 1
+            elif previous != item:
+                self.tree.item(iid, values=item[0], tags=item[1])
+                updated += 1
+            self._rendered[iid] = item
+            self._sort_keys[iid] = self.sort_key(row)
+        return inserted, updated, len(gone)
@@ -2,17 +2,25 @@ import customtkinter as ctk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
 from datetime import date
-from utils import apply_treeview_style # <--- IMPORT MỚI
+from utils import apply_treeview_style, LoadingIndicator # <--- IMPORT MỚI
+from virtual_grid import VirtualTreeview, QuerySource
+from attendance_buffer import AttendanceWriteBuffer
+from change_events import STUDENT, ATTENDANCE
 
 class AttendanceView(ctk.CTkFrame):
     """
     Giao diện Quản lý Điểm danh (Attendance Tracking).
     """
+
+    FLUSH_DELAY_MS = 1500 # Gom các lần nhấp đúp trong khoảng này thành một lần ghi
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn trên thread nền
         self.current_date = date.today().isoformat() 
+        self.buffer = AttendanceWriteBuffer(db)
+        self._flush_job = None
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1) 
@@ -23,11 +31,15 @@ class AttendanceView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="✅ Attendance Tracking", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
-        mark_all_button = ctk.CTkButton(header_frame, text="Mark All Present", command=self.mark_all_present)
-        mark_all_button.pack(side="right")
+        self.mark_all_button = ctk.CTkButton(header_frame, text="Mark All Present", command=self.mark_all_present)
+        self.mark_all_button.pack(side="right")
 
-        refresh_button = ctk.CTkButton(header_frame, text="Refresh", command=self.load_attendance)
+        refresh_button = ctk.CTkButton(header_frame, text="Refresh", command=self.refresh_attendance)
         refresh_button.pack(side="right", padx=10)
         
         self.date_entry = DateEntry(header_frame, date_pattern='yyyy-mm-dd', width=12)
@@ -52,8 +64,7 @@ class AttendanceView(ctk.CTkFrame):
         self.tree = ttk.Treeview(
             table_frame,
             columns=("ID", "Name", "Room", "Status"),
-            show="headings",
-            yscrollcommand=scrollbar.set
+            show="headings"
         )
         scrollbar.configure(command=self.tree.yview)
         
@@ -74,75 +85,166 @@ class AttendanceView(ctk.CTkFrame):
         self.tree.tag_configure('Present', foreground='#22c55e') # Màu xanh lá
         self.tree.tag_configure('Absent', foreground='#ef4444') # Màu đỏ
         self.tree.tag_configure('NotMarked', foreground='gray')
+        self.tree.tag_configure('Failed', foreground='#f97316') # Màu cam: chưa lưu được
         
         self.tree.bind('<Double-1>', self.toggle_attendance)
 
+        # Cuộn ảo: chỉ giữ các dòng đang hiển thị, dữ liệu được đọc theo trang khi cuộn tới
+        self.table = VirtualTreeview(
+            self.tree, scrollbar,
+            values_of=self.attendance_values,
+            key_of=lambda student: student['student_id'],
+            executor=self.executor,
+            indicator=self.loading
+        )
+
         self.load_attendance()
+        self.executor.listen(self.db.changes, self.on_changes, kinds=(STUDENT, ATTENDANCE))
 
     def on_date_change(self, event):
         self.current_date = self.date_entry.get_date().isoformat()
         self.load_attendance()
 
     def load_attendance(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.flush_pending()
+        self.current_date = attendance_date = self.date_entry.get_date().isoformat()
+        # Giữ ngày của lần tải này (trang sau vẫn đúng ngày dù người dùng đổi ngày giữa chừng)
+        self.table.set_source(QuerySource(
+            self.db.get_student_count,
+            lambda after, limit, offset: self.db.get_attendance_page(attendance_date, after, limit, offset),
+            cursor_of=lambda student: (student['room_no'], student['name'], student['student_id'])
+        ))
+
+    def refresh_attendance(self):
+        """Tải lại ngày đang xem, giữ vị trí cuộn và dòng đang chọn."""
+        self.flush_pending()
+        self.table.refresh()
+
+    def on_changes(self, batch):
+        """Cập nhật theo thay đổi từ nơi khác (quầy khác điểm danh, thêm / sửa sinh viên)."""
+        attendance_date = self.current_date
+        if batch.reshaped(STUDENT) or (batch.all_rows(ATTENDANCE) and attendance_date in batch.refs(ATTENDANCE, 'date')):
+            self.table.refresh()
+            return
+        student_ids = batch.keys(STUDENT) | {student_id for student_id, day in batch.keys(ATTENDANCE) if day == attendance_date}
+        if student_ids:
+            self.executor.submit(
+                self.db.get_attendance_for_students, attendance_date, student_ids,
+                on_done=lambda rows: self.table.patch(rows) if attendance_date == self.current_date else None
+            )
+
+    def _status_display(self, student_id, status):
+        """Trả về (chữ hiển thị, tags) của cột Status, kèm trạng thái chờ ghi / lỗi."""
+        if self.buffer.is_failed(student_id, self.current_date):
+            return f"{status} (not saved)", ('Failed',)
+        if self.buffer.is_pending(student_id, self.current_date):
+            return f"{status} (saving…)", (status,)
+        if status in ('Present', 'Absent'):
+            return status, (status,)
+        return "Not Marked", ('NotMarked',)
+
+    def attendance_values(self, student):
+        # Thay đổi chưa ghi xuống CSDL được ưu tiên hiển thị
+        status = self.buffer.status_of(student['student_id'], self.current_date) or student['status']
+        text, tags = self._status_display(student['student_id'], status)
             
-        self.current_date = self.date_entry.get_date().isoformat()
-        attendance_list = self.db.get_attendance_for_date(self.current_date)
-        
-        for student in attendance_list:
-            status = student['status']
-            if status == 'Present':
-                tags = ('Present',)
-            elif status == 'Absent':
-                tags = ('Absent',)
-            else:
-                status = "Not Marked" 
-                tags = ('NotMarked',)
-                
-            self.tree.insert("", "end", iid=student['student_id'], values=(
-                student['student_id'],
-                student['name'],
-                student['room_no'],
-                status
-            ), tags=tags)
+        return (
+            student['student_id'],
+            student['name'],
+            student['room_no'],
+            text
+        ), tags
 
     def toggle_attendance(self, event):
-        selected_item_id = self.tree.focus() 
-        if not selected_item_id:
+        student = self.table.selected_row()
+        if not student:
             return
             
-        student_id = selected_item_id
-        current_values = self.tree.item(selected_item_id, 'values')
-        current_status = current_values[3] 
+        student_id = student['student_id']
+        current_status = self.buffer.status_of(student_id, self.current_date) or student['status']
         
         new_status = 'Present'
         if current_status == 'Present':
             new_status = 'Absent'
         
-        success, message = self.db.mark_attendance(student_id, self.current_date, new_status)
-        
+        # Cập nhật giao diện ngay, ghi xuống CSDL sau (theo lô)
+        self.buffer.put(student_id, self.current_date, new_status)
+        student['status'] = new_status # Dòng trong bộ đệm của bảng giữ giá trị mới sau khi đã ghi xong
+        self.table.redraw()
+        if self._flush_job is None:
+            self._flush_job = self.after(self.FLUSH_DELAY_MS, self.flush_pending)
+
+    def _cancel_flush_job(self):
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+
+    def flush_pending(self):
+        """Ghi các thay đổi điểm danh đang chờ trên thread nền."""
+        self._cancel_flush_job()
+        if self.buffer.has_pending():
+            self.executor.submit(self.buffer.flush, indicator=self.loading, on_done=self._on_background_flushed)
+
+    def _on_flushed(self, result):
+        """Cập nhật các dòng vừa được ghi (hoặc ghi lỗi). Trả về (success, message)."""
+        success, message, saved, failed = result
+        if saved or failed:
+            self.table.redraw()
+        return success, message
+
+    def _on_background_flushed(self, result):
+        """Sau một lần ghi nền bị lỗi: hẹn thử lại, chờ lâu dần (buffer.retry_delay) khi CSDL vẫn lỗi."""
+        success, _ = self._on_flushed(result)
+        if not success and self._flush_job is None and self.buffer.has_pending():
+            self._flush_job = self.after(self.buffer.retry_delay(self.FLUSH_DELAY_MS), self.flush_pending)
+
+    def on_hide(self):
+        """Được MainAppView gọi khi chuyển sang màn hình khác."""
+        self.flush_pending()
+
+    def flush_before_close(self):
+        """Ghi hết thay đổi trước khi đăng xuất / đóng ứng dụng. Trả về False nếu người dùng muốn ở lại."""
+        self._cancel_flush_job()
+        # Ghi đồng bộ: cửa sổ sắp đóng nên cần biết kết quả ngay (chờ cả lần flush nền đang chạy)
+        success, message = self._on_flushed(self.buffer.flush())
         if success:
-            new_tags = (new_status,)
-            self.tree.item(selected_item_id, values=(
-                current_values[0],
-                current_values[1],
-                current_values[2],
-                new_status
-            ), tags=new_tags)
-        else:
-            messagebox.showerror("Error", message)
+            return True
+        if messagebox.askyesno(
+            "Unsaved Attendance",
+            f"Some attendance changes could not be saved:\n{message}\n\nDiscard them and continue?"
+        ):
+            self.buffer.discard() # Không để lần thử lại nền ghi chúng sau khi đã đóng
+            return True
+        self._flush_job = self.after(self.buffer.retry_delay(self.FLUSH_DELAY_MS), self.flush_pending)
+        return False
 
     def mark_all_present(self):
         self.current_date = self.date_entry.get_date().isoformat()
         
         if not messagebox.askyesno("Confirm", f"This will mark ALL students as 'Present' for {self.current_date}.\nThis will overwrite any 'Absent' marks.\n\nContinue?"):
             return
-            
-        success, message = self.db.mark_all_present(self.current_date)
+
+        self._cancel_flush_job()
+        self.mark_all_button.configure(state="disabled")
+        self.executor.submit(
+            self._flush_and_mark_all, self.current_date,
+            indicator=self.loading, on_done=self._on_marked_all, on_error=self._on_marked_all_error
+        )
+
+    def _flush_and_mark_all(self, attendance_date):
+        # Chạy nền: ghi các thay đổi đang chờ trước, để "Mark All Present" (bấm sau) được ưu tiên
+        self.buffer.flush()
+        return self.db.mark_all_present(attendance_date)
+
+    def _on_marked_all_error(self, error):
+        self.mark_all_button.configure(state="normal")
+        messagebox.showerror("Error", f"Failed to mark attendance: {error}")
+
+    def _on_marked_all(self, result):
+        self.mark_all_button.configure(state="normal")
+        success, message = result
         
         if success:
-            messagebox.showinfo("Success", message)
-            self.load_attendance() 
+            messagebox.showinfo("Success", message) # Bảng tự tải lại theo sự kiện thay đổi
         else:
             messagebox.showerror("Error", message)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from utils import LoadingIndicator
 
 class DashboardView(ctk.CTkFrame):
     """
@@ -6,10 +7,11 @@ class DashboardView(ctk.CTkFrame):
     It features a main "Key Metrics" list and secondary "Mini-Cards".
     """
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         
         self.db = db
+        self.executor = executor # Runs queries off the Tk thread
         self.stats = {} # To hold the stat values
 
         # --- Configure Main Grid (1 row, 2 columns) ---
@@ -27,6 +29,10 @@ class DashboardView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="📊 Dashboard Overview", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
         refresh_button = ctk.CTkButton(header_frame, text="Refresh", command=self.load_stats)
         refresh_button.pack(side="right")
@@ -82,6 +88,8 @@ class DashboardView(ctk.CTkFrame):
 
         # Load data for the first time
         self.load_stats()
+        # Any committed change (students, rooms, payments, ...) reloads the cards; a burst of changes reloads once
+        self.executor.listen(self.db.changes, lambda batch: self.load_stats())
 
     def _create_key_metric_row(self, parent, emoji, title, row):
         """Helper to create a row in the Key Metrics frame."""
@@ -119,10 +127,14 @@ class DashboardView(ctk.CTkFrame):
 
     def load_stats(self):
         """
-        Fetch data from the database and update all 10 card labels.
+        Fetch data from the database in the background, then update all 10 card labels.
         """
         print("Loading dashboard statistics...")
-        self.stats = self.db.get_dashboard_stats()
+        self.executor.submit(self.db.get_dashboard_stats, key="dashboard", indicator=self.loading, on_done=self.show_stats)
+
+    def show_stats(self, stats):
+        """Update the card labels with freshly loaded stats (runs on the Tk thread)."""
+        self.stats = stats
         
         if not self.stats:
             print("Failed to load statistics.")
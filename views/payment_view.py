@@ -1,16 +1,18 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from tkcalendar import DateEntry 
-from utils import apply_treeview_style # <--- IMPORT MỚI
+from utils import apply_treeview_style, LoadingIndicator # <--- IMPORT MỚI
+from virtual_grid import VirtualTreeview, QuerySource
+from change_events import STUDENT, ROOM, PAYMENT
 
 class PaymentView(ctk.CTkFrame):
     """
     Giao diện Quản lý Thanh toán (Payment Management).
     """
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn trên thread nền
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(2, weight=1) 
@@ -22,11 +24,15 @@ class PaymentView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="💳 Payment Management", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
         add_button = ctk.CTkButton(header_frame, text="+ Add Payment", command=self.open_add_payment_popup)
         add_button.pack(side="right")
         
-        refresh_button = ctk.CTkButton(header_frame, text="Refresh", command=self.load_payments)
+        refresh_button = ctk.CTkButton(header_frame, text="Refresh", command=self.refresh_payments)
         refresh_button.pack(side="right", padx=10)
 
         # --- 2. Bảng Tóm tắt Công nợ (Due Summary) ---
@@ -57,7 +63,26 @@ class PaymentView(ctk.CTkFrame):
         self.tree_payments.column("Amount", width=100, anchor="e")
         self.tree_payments.column("Method", width=100, anchor="center")
 
+        # Cả hai bảng cuộn ảo, đọc theo trang khi cuộn tới: chỉ giữ các dòng đang hiển thị
+        self.tree_due.tag_configure('due', foreground='red')
+        self.due_table = VirtualTreeview(
+            self.tree_due, self.tree_due.scrollbar,
+            values_of=self.due_values,
+            key_of=lambda item: item['student_id'],
+            executor=self.executor,
+            indicator=self.loading
+        )
+        # Lịch sử thanh toán đọc theo trang (mới nhất trước) khi cuộn tới
+        self.payments_table = VirtualTreeview(
+            self.tree_payments, self.tree_payments.scrollbar,
+            values_of=self.payment_values,
+            key_of=lambda item: item['payment_id'],
+            executor=self.executor,
+            indicator=self.loading
+        )
+
         self.load_payments()
+        self.executor.listen(self.db.changes, self.on_changes, kinds=(PAYMENT, STUDENT, ROOM))
 
     def create_treeview(self, columns, headings):
         """Hàm trợ giúp tạo Treeview với style."""
@@ -85,50 +110,70 @@ class PaymentView(ctk.CTkFrame):
 
         scrollbar.pack(side="right", fill="y")
         tree.pack(side="left", fill="both", expand=True)
+        tree.scrollbar = scrollbar
         
         return table_frame, tree 
 
     def load_payments(self):
-        """Tải và tải lại tất cả dữ liệu cho cả hai bảng."""
-        for item in self.tree_due.get_children():
-            self.tree_due.delete(item)
-            
-        due_list = self.db.get_due_summary()
-        for item in due_list:
-            due_amount = item['due_amount']
-            tags = ()
-            if due_amount > 0:
-                tags = ('due',)
-                
-            self.tree_due.insert("", "end", values=(
-                item['name'],
-                item['room_no'],
-                f"{item['rent']:.2f}",
-                f"{item['total_paid']:.2f}",
-                f"{due_amount:.2f}",
-                item['email']
-            ), tags=tags)
-        
-        self.tree_due.tag_configure('due', foreground='red')
+        """Tải và tải lại tất cả dữ liệu cho cả hai bảng (chạy nền)."""
+        # Công nợ sắp theo phòng (index room_no, name, student_id) để đọc theo trang; dòng còn nợ tô đỏ
+        self.due_table.set_source(QuerySource(
+            self.db.get_due_count, self.db.get_due_summary_page,
+            cursor_of=lambda item: (item['room_no'], item['name'], item['student_id'])
+        ))
+        self.payments_table.set_source(QuerySource(
+            self.db.get_payment_count, self.db.get_payments_page,
+            cursor_of=lambda item: (item['payment_date'], item['payment_id'])
+        ))
+
+    def refresh_payments(self):
+        """Tải lại hai bảng, giữ vị trí cuộn và dòng đang chọn; chỉ dòng thay đổi được vẽ lại."""
+        self.due_table.refresh()
+        self.payments_table.refresh()
 
-        for item in self.tree_payments.get_children():
-            self.tree_payments.delete(item)
+    def on_changes(self, batch):
+        """Cập nhật theo thay đổi từ pop-up hoặc view khác, chỉ đọc lại những dòng bị ảnh hưởng."""
+        if PAYMENT in batch or STUDENT in batch:
+            self.payments_table.refresh() # Thanh toán mới nằm ở đầu bảng; tên sinh viên có thể đã đổi
+        if STUDENT in batch:
+            # Thêm / xóa / đổi tên / đổi phòng làm đổi thứ tự: chỉ đọc lại các trang đang hiển thị
+            self.due_table.refresh()
+            return
+        # Công nợ đổi theo thanh toán của sinh viên, hoặc theo tiền phòng (mọi sinh viên trong phòng)
+        student_ids = batch.refs(PAYMENT, STUDENT)
+        if student_ids:
+            self.executor.submit(self.db.get_due_summary, student_ids, on_done=self.due_table.patch)
+        if batch.keys(ROOM):
+            self.executor.submit(self.db.get_due_summary, room_nos=batch.keys(ROOM), on_done=self.due_table.patch)
+
+    def due_values(self, item):
+        due_amount = item['due_amount']
+        tags = ()
+        if due_amount > 0:
+            tags = ('due',)
             
-        payment_list = self.db.get_all_payments()
-        for item in payment_list:
-            self.tree_payments.insert("", "end", values=(
-                f"PAY{item['payment_id']:04d}",
-                item['name'],
-                f"{item['amount']:.2f}",
-                item['payment_date'],
-                item['method']
-            ))
+        return (
+            item['name'],
+            item['room_no'],
+            f"{item['rent']:.2f}",
+            f"{item['total_paid']:.2f}",
+            f"{due_amount:.2f}",
+            item['email']
+        ), tags
+
+    def payment_values(self, item):
+        return (
+            f"PAY{item['payment_id']:04d}",
+            item['name'] or "(Deleted student)", # Sinh viên đã bị xóa (student_id = NULL)
+            f"{item['amount']:.2f}",
+            item['payment_date'],
+            item['method']
+        ), ()
 
     def open_add_payment_popup(self):
         """Mở pop-up để thêm thanh toán mới."""
         popup = AddPaymentPopup(self, self.db)
-        self.wait_window(popup)
-        self.load_payments() 
+        self.wait_window(popup) # Bảng tự cập nhật theo sự kiện thay đổi
 
 # (Class AddPaymentPopup giữ nguyên không đổi)
 # ... (Bạn có thể giữ nguyên class này như trong file cũ)
@@ -160,6 +205,7 @@ class AddPaymentPopup(ctk.CTkToplevel):
         self.amount_entry.grid(row=1, column=1, sticky="ew", padx=10, pady=10)
 
         ctk.CTkLabel(main_frame, text="Payment Date:").grid(row=2, column=0, sticky="w", padx=10, pady=10)
+        from tkcalendar import DateEntry # Chỉ nạp tkcalendar khi mở pop-up
         self.date_entry = DateEntry(main_frame, date_pattern='yyyy-mm-dd')
         self.date_entry.grid(row=2, column=1, sticky="w", padx=10, pady=10) 
 
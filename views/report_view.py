@@ -1,17 +1,28 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-from tkcalendar import DateEntry
-import pandas as pd
 from datetime import date
+import os
+from utils import LoadingIndicator
+import report_export
 
 class ReportView(ctk.CTkFrame):
     """
     Giao diện Báo cáo & Phân tích (Reports & Analytics).
     """
+
+    EXPORT_FILETYPES = [
+        ("Excel Files", "*.xlsx"),
+        ("CSV Files", "*.csv"),
+        ("Compressed CSV", "*.csv.gz"),
+        ("Parquet Files", "*.parquet"),
+        ("Feather Files", "*.feather"),
+        ("All Files", "*.*"),
+    ]
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn và ghi file trên thread nền
 
         # --- Cấu hình Grid ---
         # 2 cột, 3 hàng cho các nút
@@ -24,8 +35,12 @@ class ReportView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="📈 Reports & Analytics", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label, text="Working...")
         
-        info = ctk.CTkLabel(self, text="Click a button to generate and save an Excel (.xlsx) report.")
+        info = ctk.CTkLabel(self, text="Click a button to generate a report. Save as Excel (.xlsx), CSV (.csv / .csv.gz), Parquet or Feather.")
         info.grid(row=0, column=0, columnspan=2, sticky="ew", padx=10, pady=(40, 10))
 
         # --- 2. Các Nút Báo cáo ---
@@ -48,74 +63,57 @@ class ReportView(ctk.CTkFrame):
         button.grid(row=row, column=col, sticky="nsew", padx=15, pady=15)
         return button
 
-    def _save_to_excel(self, df, filename_prefix):
-        """Hàm trợ giúp chung để lưu DataFrame ra Excel."""
+    def _export(self, report_name, no_data_message, filename_prefix, params=()):
+        """
+        Hàm trợ giúp chung: hỏi nơi lưu rồi xuất báo cáo trên thread nền.
+        Định dạng (Excel/CSV/Parquet/Feather) được chọn theo đuôi file.
+        Dữ liệu được đọc và ghi theo khối (report_export), nên bộ nhớ không tăng theo kích thước báo cáo.
+        """
+        filename = filedialog.asksaveasfilename(
+            initialfile=f"{filename_prefix}_{date.today().isoformat()}.xlsx",
+            defaultextension=".xlsx",
+            filetypes=self.EXPORT_FILETYPES
+        )
+        
+        if not filename:
+            # Người dùng hủy
+            return
         try:
-            filename = filedialog.asksaveasfilename(
-                initialfile=f"{filename_prefix}_{date.today().isoformat()}.xlsx",
-                defaultextension=".xlsx",
-                filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")]
-            )
-            
-            if not filename:
-                # Người dùng hủy
-                return
-                
-            # Ghi ra file Excel
-            df.to_excel(filename, index=False, engine='openpyxl')
-            messagebox.showinfo("Success", f"Report saved successfully to:\n{filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save report: {e}")
+            report_export.writer_for(filename)
+        except ValueError:
+            messagebox.showerror("Error", "Unsupported file type. Use .xlsx, .csv, .csv.gz, .parquet or .feather.")
+            return
+
+        def on_done(count):
+            if count == 0:
+                os.remove(filename) # Không giữ file chỉ có dòng tiêu đề
+                messagebox.showinfo("No Data", no_data_message)
+            else:
+                messagebox.showinfo("Success", f"Report saved successfully to:\n{filename}\n({count:,} rows)")
+
+        self.executor.submit(
+            report_export.export_report, self.db, report_name, filename, params,
+            indicator=self.loading, on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save report: {e}")
+        )
 
     # --- Các hàm xuất báo cáo ---
 
     def export_student_report(self):
-        data = self.db.get_all_students()
-        if not data:
-            messagebox.showinfo("No Data", "No student data to export.")
-            return
-        
-        df = pd.DataFrame(data)
-        self._save_to_excel(df, "Student_Report")
+        self._export('students', "No student data to export.", "Student_Report")
 
     def export_room_report(self):
-        data = self.db.get_all_rooms()
-        if not data:
-            messagebox.showinfo("No Data", "No room data to export.")
-            return
-        
-        df = pd.DataFrame(data)
-        self._save_to_excel(df, "Room_List_Report")
+        self._export('rooms', "No room data to export.", "Room_List_Report")
         
     def export_payment_report(self):
-        data = self.db.get_all_payments()
-        if not data:
-            messagebox.showinfo("No Data", "No payment data to export.")
-            return
-        
-        df = pd.DataFrame(data)
-        self._save_to_excel(df, "Payment_History_Report")
+        self._export('payments', "No payment data to export.", "Payment_History_Report")
 
     def export_due_summary_report(self):
-        data = self.db.get_due_summary()
-        if not data:
-            messagebox.showinfo("No Data", "No due summary data to export.")
-            return
-        
-        df = pd.DataFrame(data)
-        self._save_to_excel(df, "Due_Summary_Report")
+        self._export('due_summary', "No due summary data to export.", "Due_Summary_Report")
 
     def export_room_occupancy_report(self):
-        data = self.db.get_all_rooms()
-        if not data:
-            messagebox.showinfo("No Data", "No room data to export.")
-            return
-        
         # Chỉ chọn các cột liên quan
-        df = pd.DataFrame(data)
-        df_filtered = df[["room_no", "room_type", "capacity", "occupied", "status"]]
-        self._save_to_excel(df_filtered, "Room_Occupancy_Report")
+        self._export('room_occupancy', "No room data to export.", "Room_Occupancy_Report")
 
     def open_date_range_popup(self):
         """Mở pop-up để chọn khoảng ngày cho Báo cáo Điểm danh."""
@@ -127,13 +125,12 @@ class ReportView(ctk.CTkFrame):
             self._run_attendance_report(start, end)
             
     def _run_attendance_report(self, start_date, end_date):
-        data = self.db.get_attendance_report(start_date, end_date)
-        if not data:
-            messagebox.showinfo("No Data", f"No attendance data found between {start_date} and {end_date}.")
-            return
-            
-        df = pd.DataFrame(data)
-        self._save_to_excel(df, f"Attendance_Report_{start_date}_to_{end_date}")
+        self._export(
+            'attendance',
+            f"No attendance data found between {start_date} and {end_date}.",
+            f"Attendance_Report_{start_date}_to_{end_date}",
+            params=(start_date, end_date)
+        )
 
 
 # --- Class Pop-up (Toplevel) cho Khoảng ngày ---
@@ -152,6 +149,7 @@ class DateRangePopup(ctk.CTkToplevel):
         main_frame = ctk.CTkFrame(self)
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
         main_frame.grid_columnconfigure(1, weight=1)
+        from tkcalendar import DateEntry # Chỉ nạp tkcalendar khi mở pop-up
         
         ctk.CTkLabel(main_frame, text="Start Date:").grid(row=0, column=0, sticky="w", padx=10, pady=10)
         self.start_date_entry = DateEntry(main_frame, date_pattern='yyyy-mm-dd')
@@ -1,15 +1,17 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from utils import apply_treeview_style # <--- IMPORT MỚI
+from utils import apply_treeview_style, LoadingIndicator, TreeviewSync # <--- IMPORT MỚI
+from change_events import ROOM
 
 class RoomView(ctk.CTkFrame):
     """
     Giao diện Quản lý Phòng (Room Management).
     """
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn trên thread nền
         self.selected_room_no = None
 
         self.grid_columnconfigure(0, weight=1)
@@ -21,6 +23,10 @@ class RoomView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="🚪 Room Management", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
         add_button = ctk.CTkButton(header_frame, text="+ Add Room", command=self.open_add_room_popup)
         add_button.pack(side="right")
@@ -74,6 +80,8 @@ class RoomView(ctk.CTkFrame):
         self.tree.pack(side="left", fill="both", expand=True)
 
         self.tree.bind('<<TreeviewSelect>>', self.on_row_select)
+        # Tải lại chỉ sửa các dòng thay đổi (iid = room_no), giữ dòng đang chọn và vị trí cuộn
+        self.rows = TreeviewSync(self.tree, key_of=lambda room: room['room_no'], values_of=self.room_values)
 
         # --- 3. Frame Nút bấm dưới ---
         bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -86,33 +94,55 @@ class RoomView(ctk.CTkFrame):
         self.delete_button.pack(side="left", padx=10)
 
         self.load_rooms()
-        self.update_filter_options()
+        # Thay đổi từ nơi khác (vd: thêm sinh viên làm đổi số người ở) được cập nhật ngay vào bảng
+        self.executor.listen(self.db.changes, self.on_changes, kinds=(ROOM,))
 
     def update_filter_options(self):
-        types = self.db.get_room_types()
-        self.filter_menu.configure(values=["All"] + types)
+        self.executor.submit(
+            self.db.get_room_types, key="room_types",
+            on_done=lambda types: self.filter_menu.configure(values=["All"] + types)
+        )
 
     def load_rooms(self, filter_choice=None):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         filter_type = self.filter_var.get()
-        room_list = self.db.get_all_rooms(filter_type)
-        
-        for room in room_list:
-            self.tree.insert("", "end", iid=room['room_no'], values=(
-                room['room_no'],
-                room['room_type'],
-                room['capacity'],
-                room['occupied'],
-                f"{room['rent']:.2f}", 
-                room['status']
-            ))
-        
-        self.on_row_select(None) 
+        # Đổi bộ lọc liên tục chỉ hiển thị kết quả của lần chọn cuối
+        self.executor.submit(
+            self.db.get_all_rooms, filter_type, key="rooms", indicator=self.loading,
+            on_done=self.show_rooms
+        )
         if filter_choice is None:
              self.update_filter_options()
 
+    def show_rooms(self, room_list):
+        self.rows.sync(room_list)
+        self.on_row_select(None) 
+
+    def on_changes(self, batch):
+        if batch.reshaped(ROOM):
+            self.load_rooms() # Phòng được thêm / xóa: tải lại danh sách (và danh sách loại phòng)
+            return
+        # Chỉ đọc lại các phòng bị ảnh hưởng; không dùng key để hai lượt cập nhật liên tiếp không hủy nhau
+        room_nos = batch.keys(ROOM)
+        if room_nos:
+            self.executor.submit(self.db.get_rooms_by_no, room_nos, on_done=self.patch_rooms)
+
+    def patch_rooms(self, rooms):
+        filter_type = self.filter_var.get()
+        matches = lambda room: not filter_type or filter_type == "All" or room['room_type'] == filter_type
+        self.rows.patch([room for room in rooms if matches(room)],
+                        removed=[room['room_no'] for room in rooms if not matches(room)])
+        self.on_row_select(None)
+
+    def room_values(self, room):
+        return (
+            room['room_no'],
+            room['room_type'],
+            room['capacity'],
+            room['occupied'],
+            f"{room['rent']:.2f}", 
+            room['status']
+        ), ()
+
     def on_row_select(self, event):
         selected_item = self.tree.focus()
         if selected_item:
@@ -127,20 +157,19 @@ class RoomView(ctk.CTkFrame):
     def open_add_room_popup(self):
         popup = RoomPopup(self, self.db, title="Add New Room")
         self.wait_window(popup)
-        self.load_rooms() 
 
     def open_edit_room_popup(self):
         if not self.selected_room_no:
             return
         
-        room_data = self.db.get_room_by_no(self.selected_room_no)
+        # Đọc trên primary: pop-up sửa ghi lại dữ liệu này, không được lấy bản cũ từ replica
+        room_data = self.db.get_room_by_no(self.selected_room_no, primary=True)
         if not room_data:
             messagebox.showerror("Error", "Room not found.")
             return
             
         popup = RoomPopup(self, self.db, title="Edit Room", room_data=room_data)
         self.wait_window(popup)
-        self.load_rooms() 
 
     def delete_selected_room(self):
         if not self.selected_room_no:
@@ -153,7 +182,6 @@ class RoomView(ctk.CTkFrame):
         
         if success:
             messagebox.showinfo("Success", message)
-            self.load_rooms()
         else:
             messagebox.showerror("Error", message)
 
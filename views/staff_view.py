@@ -1,15 +1,17 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from utils import apply_treeview_style # <--- IMPORT MỚI
+from utils import apply_treeview_style, LoadingIndicator, TreeviewSync # <--- IMPORT MỚI
+from change_events import USER
 
 class StaffView(ctk.CTkFrame):
     """
     Giao diện Quản lý Nhân viên (Staff Management).
     """
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn trên thread nền
         self.selected_user_id = None 
 
         self.grid_columnconfigure(0, weight=1)
@@ -21,6 +23,10 @@ class StaffView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="👥 Staff Management", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
         add_button = ctk.CTkButton(header_frame, text="+ Add Staff", command=self.open_add_staff_popup)
         add_button.pack(side="right")
@@ -63,6 +69,8 @@ class StaffView(ctk.CTkFrame):
         self.tree.pack(side="left", fill="both", expand=True)
 
         self.tree.bind('<<TreeviewSelect>>', self.on_row_select)
+        # Tải lại chỉ sửa các dòng thay đổi (iid = id), giữ dòng đang chọn và vị trí cuộn
+        self.rows = TreeviewSync(self.tree, key_of=lambda staff: staff['id'], values_of=self.staff_values)
 
         # --- 3. Frame Nút bấm dưới ---
         bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -75,28 +83,29 @@ class StaffView(ctk.CTkFrame):
         self.delete_button.pack(side="left", padx=10)
 
         self.load_staff()
+        # Danh sách nhỏ: tải lại khi có thay đổi, TreeviewSync chỉ sửa các dòng khác đi
+        self.executor.listen(self.db.changes, lambda batch: self.load_staff(), kinds=(USER,))
 
     def load_staff(self):
-        """Tải hoặc tải lại danh sách nhân viên từ CSDL."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        staff_list = self.db.get_all_users()
-        
-        for staff in staff_list:
-            id_prefix = "ADM" if staff['role'] == 'admin' else "STF"
-            display_id = f"{id_prefix}{staff['id']:03d}"
-            
-            self.tree.insert("", "end", iid=staff['id'], values=(
-                display_id,
-                staff['username'],
-                staff['email'],
-                staff['role'].capitalize(),
-                staff['created_at'].strftime("%Y-%m-%d %H:%M")
-            ))
-        
+        """Tải hoặc tải lại danh sách nhân viên từ CSDL (chạy nền)."""
+        self.executor.submit(self.db.get_all_users, key="staff", indicator=self.loading, on_done=self.show_staff)
+
+    def show_staff(self, staff_list):
+        self.rows.sync(staff_list)
         self.on_row_select(None)
 
+    def staff_values(self, staff):
+        id_prefix = "ADM" if staff['role'] == 'admin' else "STF"
+        display_id = f"{id_prefix}{staff['id']:03d}"
+        
+        return (
+            display_id,
+            staff['username'],
+            staff['email'],
+            staff['role'].capitalize(),
+            staff['created_at'].strftime("%Y-%m-%d %H:%M")
+        ), ()
+
     def on_row_select(self, event):
         """Được gọi khi một hàng trong bảng được chọn."""
         selected_item = self.tree.focus()
@@ -113,7 +122,6 @@ class StaffView(ctk.CTkFrame):
         """Mở cửa sổ Toplevel để thêm nhân viên mới."""
         popup = AddStaffPopup(self, self.db)
         self.wait_window(popup)
-        self.load_staff()
 
     def open_reset_password_popup(self):
         """Mở cửa sổ Toplevel để đặt lại mật khẩu."""
@@ -137,8 +145,7 @@ class StaffView(ctk.CTkFrame):
         success, message = self.db.delete_user(self.selected_user_id)
         
         if success:
-            messagebox.showinfo("Success", message)
-            self.load_staff() # Tải lại bảng
+            messagebox.showinfo("Success", message) # Bảng tự cập nhật theo sự kiện thay đổi
         else:
             messagebox.showerror("Error", message)
 
@@ -1,17 +1,25 @@
 import customtkinter as ctk
-from tkinter import ttk, messagebox
-from tkcalendar import DateEntry 
-from utils import apply_treeview_style # <--- IMPORT MỚI
+from tkinter import ttk, messagebox, filedialog
+from utils import apply_treeview_style, LoadingIndicator # <--- IMPORT MỚI
+from virtual_grid import VirtualTreeview, ListSource, QuerySource
+import student_import
+from change_events import STUDENT
 
 class StudentView(ctk.CTkFrame):
     """
     Giao diện Quản lý Sinh viên (Student Management).
     """
+
+    SEARCH_DELAY_MS = 250 # Chờ người dùng ngừng gõ rồi mới tìm kiếm
+    SEARCH_LIMIT = 1000 # Số kết quả tìm kiếm tối đa hiển thị (nhiều hơn thì báo người dùng thu hẹp từ khóa)
     
-    def __init__(self, master, db):
+    def __init__(self, master, db, executor):
         super().__init__(master, fg_color="transparent")
         self.db = db
+        self.executor = executor # Chạy truy vấn trên thread nền
         self.selected_student_id = None
+        self._search_job = None
+        self._last_search = None
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1) 
@@ -22,9 +30,19 @@ class StudentView(ctk.CTkFrame):
         
         title = ctk.CTkLabel(header_frame, text="🧑‍🎓 Student Management", font=ctk.CTkFont(size=20, weight="bold"))
         title.pack(side="left")
+
+        loading_label = ctk.CTkLabel(header_frame, text="", text_color="gray")
+        loading_label.pack(side="left", padx=10)
+        self.loading = LoadingIndicator(loading_label)
         
         add_button = ctk.CTkButton(header_frame, text="+ Add Student", command=self.open_add_student_popup)
         add_button.pack(side="right")
+
+        self.import_button = ctk.CTkButton(header_frame, text="Import CSV/Excel", command=self.import_students_file)
+        self.import_button.pack(side="right", padx=(10, 0))
+
+        self.assign_button = ctk.CTkButton(header_frame, text="Auto Assign Rooms", command=self.open_auto_assign_popup)
+        self.assign_button.pack(side="right", padx=(10, 0))
         
         self.search_entry = ctk.CTkEntry(header_frame, placeholder_text="Search by Name or ID...")
         self.search_entry.pack(side="right", padx=10, fill="x", expand=True)
@@ -46,8 +64,7 @@ class StudentView(ctk.CTkFrame):
         self.tree = ttk.Treeview(
             table_frame,
             columns=("ID", "Name", "Age", "Gender", "Room", "Admission", "Contact", "Email"),
-            show="headings",
-            yscrollcommand=scrollbar.set
+            show="headings"
         )
         scrollbar.configure(command=self.tree.yview)
         
@@ -72,7 +89,16 @@ class StudentView(ctk.CTkFrame):
         scrollbar.pack(side="right", fill="y")
         self.tree.pack(side="left", fill="both", expand=True)
 
-        self.tree.bind('<<TreeviewSelect>>', self.on_row_select)
+        # Cuộn ảo: chỉ giữ các dòng đang hiển thị, dữ liệu được đọc theo trang khi cuộn tới
+        self.table = VirtualTreeview(
+            self.tree, scrollbar,
+            values_of=self.student_values,
+            key_of=lambda student: student['student_id'],
+            executor=self.executor,
+            indicator=self.loading,
+            on_select=self.on_row_select,
+            on_count=self.on_count
+        )
 
         # --- 3. Frame Nút bấm dưới ---
         bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -84,36 +110,65 @@ class StudentView(ctk.CTkFrame):
         self.delete_button = ctk.CTkButton(bottom_frame, text="Delete", fg_color="#D2042D", hover_color="#FF0800", command=self.delete_selected_student, state="disabled")
         self.delete_button.pack(side="left", padx=10)
 
+        self.search_note = ctk.CTkLabel(bottom_frame, text="", text_color="gray")
+        self.search_note.pack(side="right")
+
         self.load_students()
+        # Thay đổi từ nơi khác (pop-up, nhập file, view khác) được cập nhật ngay vào bảng
+        self.executor.listen(self.db.changes, self.on_changes, kinds=(STUDENT,))
 
     def on_search(self, event):
-        search_term = self.search_entry.get()
+        # Debounce: mỗi phím gõ hủy lượt tìm kiếm đang chờ và hẹn lại
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(self.SEARCH_DELAY_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        search_term = self.search_entry.get().strip()
+        if search_term == self._last_search:
+            return # Từ khóa không đổi (vd: phím mũi tên, Shift)
         self.load_students(search_term)
 
     def load_students(self, search_term=None):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        student_list = self.db.get_all_students(search_term)
-        
-        for student in student_list:
-            self.tree.insert("", "end", iid=student['student_id'], values=(
-                student['student_id'],
-                student['name'],
-                student['age'],
-                student['gender'],
-                student['room_no'],
-                student['admission_date'],
-                student['contact'],
-                student['email']
-            ))
-        
-        self.on_row_select(None) 
+        self._last_search = search_term or ""
+        if search_term:
+            # Kết quả tìm kiếm được giới hạn ở SEARCH_LIMIT dòng, đọc một lần (thêm 1 dòng để biết có bị cắt không)
+            source = ListSource(loader=lambda: self.db.search_students(search_term, limit=self.SEARCH_LIMIT + 1),
+                                limit=self.SEARCH_LIMIT)
+        else:
+            source = QuerySource(self.db.get_student_count, self.db.get_students_page,
+                                 cursor_of=lambda student: student['student_id'])
+        self.table.set_source(source)
+
+    def on_count(self, total):
+        source = self.table.source
+        if getattr(source, 'truncated', False):
+            self.search_note.configure(text=f"Showing the first {total:,} matches. Refine your search to see more.")
+        else:
+            self.search_note.configure(text="")
 
-    def on_row_select(self, event):
-        selected_item = self.tree.focus()
-        if selected_item:
-            self.selected_student_id = selected_item
+    def on_changes(self, batch):
+        if batch.reshaped(STUDENT):
+            self.table.refresh() # Số dòng / thứ tự thay đổi: đọc lại các trang đang hiển thị
+        else:
+            self.executor.submit(self.db.get_students_by_ids, batch.keys(STUDENT), on_done=self.table.patch)
+
+    def student_values(self, student):
+        return (
+            student['student_id'],
+            student['name'],
+            student['age'],
+            student['gender'],
+            student['room_no'],
+            student['admission_date'],
+            student['contact'],
+            student['email']
+        ), ()
+
+    def on_row_select(self, student_id):
+        if student_id:
+            self.selected_student_id = student_id
             self.edit_button.configure(state="normal")
             self.delete_button.configure(state="normal")
         else:
@@ -124,20 +179,87 @@ class StudentView(ctk.CTkFrame):
     def open_add_student_popup(self):
         popup = StudentPopup(self, self.db, title="Add New Student")
         self.wait_window(popup)
-        self.load_students() 
+
+    def import_students_file(self):
+        filename = filedialog.askopenfilename(
+            title="Import Students",
+            filetypes=[("CSV / Excel", "*.csv *.xlsx"), ("CSV Files", "*.csv"), ("Excel Files", "*.xlsx"), ("All Files", "*.*")]
+        )
+        if not filename:
+            return
+
+        # Nhập file lớn có thể mất nhiều thời gian: chạy nền, khóa nút để tránh nhập trùng
+        self.import_button.configure(state="disabled")
+        self.executor.submit(
+            student_import.import_students, self.db, filename,
+            indicator=self.loading,
+            on_done=lambda result: self._on_import_done(filename, result),
+            on_error=self._on_import_error
+        )
+
+    def _on_import_error(self, error):
+        self.import_button.configure(state="normal")
+        messagebox.showerror("Error", f"Failed to import file: {error}")
+
+    def _on_import_done(self, filename, result):
+        self.import_button.configure(state="normal")
+        message = f"Imported {result['imported']} students."
+        if result['rejected']:
+            report = student_import.rejected_report_path(filename)
+            student_import.write_rejected_report(result['rejected'], report)
+            preview = "\n".join(f"  Line {line}: {reason}" for line, reason, _ in result['rejected'][:10])
+            message += f"\n{len(result['rejected'])} rows were rejected:\n{preview}"
+            if len(result['rejected']) > 10:
+                message += "\n  ..."
+            message += f"\n\nFull list saved to:\n{report}"
+        messagebox.showinfo("Import Finished", message)
+
+    def open_auto_assign_popup(self):
+        popup = AutoAssignPopup(self, self.db)
+        self.wait_window(popup)
+        if not popup.options:
+            return
+
+        # Xếp phòng cho mọi sinh viên chưa có phòng trong một giao dịch (chạy nền)
+        self.assign_button.configure(state="disabled")
+        self.executor.submit(
+            self.db.allocate_rooms,
+            indicator=self.loading,
+            on_done=self._on_assign_done,
+            on_error=self._on_assign_error,
+            **popup.options
+        )
+
+    def _on_assign_error(self, error):
+        self.assign_button.configure(state="normal")
+        messagebox.showerror("Error", f"Failed to assign rooms: {error}")
+
+    def _on_assign_done(self, result):
+        self.assign_button.configure(state="normal")
+        placements, unplaced = result
+        if not placements and not unplaced:
+            messagebox.showinfo("Auto Assign", "All students already have a room.")
+            return
+        message = f"Assigned {len(placements)} students to {len({room_no for _, room_no in placements})} rooms."
+        if unplaced:
+            preview = "\n".join(f"  {student_id}: {reason}" for student_id, reason in unplaced[:10])
+            message += f"\n{len(unplaced)} students could not be placed:\n{preview}"
+            if len(unplaced) > 10:
+                message += "\n  ..."
+        messagebox.showinfo("Auto Assign", message)
 
     def open_edit_student_popup(self):
         if not self.selected_student_id:
             return
         
-        student_data = self.db.get_student_by_id(self.selected_student_id)
+        # Đọc trên primary: pop-up sửa ghi lại dữ liệu này, không được lấy bản cũ từ replica
+        student_data = self.db.get_student_by_id(self.selected_student_id, primary=True)
         if not student_data:
             messagebox.showerror("Error", "Student not found.")
             return
             
         popup = StudentPopup(self, self.db, title="Edit Student", student_data=student_data)
         self.wait_window(popup)
-        self.load_students() 
 
     def delete_selected_student(self):
         if not self.selected_student_id:
@@ -150,7 +272,7 @@ class StudentView(ctk.CTkFrame):
         
         if success:
             messagebox.showinfo("Success", message)
-            self.load_students()
+            self.table.clear_selection() # Dòng đã bị xóa (bảng tự cập nhật theo sự kiện thay đổi)
         else:
             messagebox.showerror("Error", message)
 
@@ -208,6 +330,7 @@ class StudentPopup(ctk.CTkToplevel):
         date_room_frame.grid_columnconfigure((1, 3), weight=1)
 
         ctk.CTkLabel(date_room_frame, text="Admission Date:").grid(row=0, column=0, sticky="w")
+        from tkcalendar import DateEntry # Chỉ nạp tkcalendar khi mở pop-up
         self.admission_date_entry = DateEntry(date_room_frame, date_pattern='yyyy-mm-dd')
         self.admission_date_entry.grid(row=0, column=1, sticky="ew", padx=(0, 10))
 
@@ -289,4 +412,61 @@ class StudentPopup(ctk.CTkToplevel):
             messagebox.showinfo("Success", message, parent=self)
             self.destroy()
         else:
-            self.message_label.configure(text=message)
\ No newline at end of file
+            self.message_label.configure(text=message)
+
+
+class AutoAssignPopup(ctk.CTkToplevel):
+    """
+    Pop-up chọn điều kiện xếp phòng tự động cho các sinh viên chưa có phòng.
+    Sau khi đóng, self.options là tham số cho DatabaseConnector.allocate_rooms (None nếu hủy).
+    """
+
+    def __init__(self, master, db):
+        super().__init__(master)
+        self.db = db
+        self.options = None
+
+        self.title("Auto Assign Rooms")
+        self.geometry("400x330")
+        self.resizable(False, False)
+        self.transient(master)
+        self.grab_set()
+
+        main_frame = ctk.CTkFrame(self)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ctk.CTkLabel(main_frame, text="Room Type:").pack(anchor="w", padx=10)
+        self.type_var = ctk.StringVar(value="Any")
+        ctk.CTkComboBox(main_frame, variable=self.type_var, values=["Any"] + self.db.get_room_types()).pack(fill="x", padx=10, pady=(0, 10))
+
+        ctk.CTkLabel(main_frame, text="Max Rent (optional):").pack(anchor="w", padx=10)
+        self.rent_entry = ctk.CTkEntry(main_frame)
+        self.rent_entry.pack(fill="x", padx=10, pady=(0, 10))
+
+        self.separate_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(main_frame, text="Keep genders in separate rooms", variable=self.separate_var).pack(anchor="w", padx=10, pady=(5, 10))
+
+        self.message_label = ctk.CTkLabel(main_frame, text="", text_color="red")
+        self.message_label.pack(pady=(5, 0))
+
+        ctk.CTkButton(main_frame, text="Assign Rooms", command=self.confirm).pack(pady=15)
+
+    def confirm(self):
+        max_rent = None
+        if self.rent_entry.get().strip():
+            try:
+                max_rent = float(self.rent_entry.get())
+            except ValueError:
+                self.message_label.configure(text="Max rent must be a number (e.g., 1500).")
+                return
+            if max_rent <= 0:
+                self.message_label.configure(text="Max rent must be a positive number.")
+                return
+
+        room_type = self.type_var.get()
+        self.options = {
+            'room_type': None if room_type == "Any" else room_type,
+            'max_rent': max_rent,
+            'separate_genders': self.separate_var.get(),
+        }
+        self.destroy()
@@ -0,0 +1,378 @@
+from collections import OrderedDict
+
+
+class ListSource:
+    """
+    Nguồn dữ liệu trong bộ nhớ cho VirtualTreeview.
+    Truyền sẵn list 'rows', hoặc 'loader' (hàm trả về list, được gọi lại mỗi lần count(),
+    tức mỗi lần bảng tải lại).
+    limit: chỉ giữ tối đa limit dòng; truncated = True khi loader trả về nhiều hơn
+    (loader nên đọc limit + 1 dòng để biết kết quả có bị cắt hay không).
+    """
+
+    in_memory = True
+
+    def __init__(self, rows=None, loader=None, limit=None):
+        self._rows = rows
+        self._loader = loader
+        self.limit = limit
+        self.truncated = False
+
+    def count(self):
+        if self._loader is not None:
+            rows = list(self._loader())
+            self.truncated = self.limit is not None and len(rows) > self.limit
+            self._rows = rows[:self.limit] if self.truncated else rows
+        return len(self._rows)
+
+    def fetch(self, offset, limit, previous=None):
+        return self._rows[offset:offset + limit]
+
+
+class QuerySource:
+    """
+    Nguồn dữ liệu phân trang từ CSDL cho VirtualTreeview.
+
+    count()                            -> tổng số dòng
+    fetch_page(after, limit, offset)   -> một trang; after là khóa keyset (None = dùng offset)
+    cursor_of(row)                     -> khóa keyset của một dòng
+
+    Khi cuộn tuần tự (trang trước đã có trong bộ nhớ) dùng keyset; khi nhảy xa
+    (kéo thanh cuộn) mới dùng OFFSET.
+    """
+
+    in_memory = False
+
+    def __init__(self, count, fetch_page, cursor_of):
+        self._count = count
+        self._fetch_page = fetch_page
+        self._cursor_of = cursor_of
+
+    def count(self):
+        return self._count()
+
+    def fetch(self, offset, limit, previous=None):
+        if previous is not None:
+            return self._fetch_page(self._cursor_of(previous), limit, 0)
+        return self._fetch_page(None, limit, offset)
+
+
+class VirtualTreeview:
+    """
+    Cuộn ảo cho ttk.Treeview: chỉ giữ đúng số item vừa khung nhìn, khi cuộn thì
+    ghi lại giá trị của các item đó thay vì chèn một item cho mỗi dòng.
+    Dữ liệu được đọc theo trang từ 'source' (ListSource / QuerySource) và giữ
+    trong bộ nhớ đệm LRU giới hạn số trang, nên bảng 500k dòng vẫn cuộn mượt.
+
+    values_of(row) -> (values, tags) để hiển thị một dòng
+    key_of(row)    -> khóa duy nhất của dòng (vd: student_id), dùng để giữ dòng được chọn
+    on_select(key) -> được gọi khi dòng được chọn thay đổi
+    on_count(total) -> được gọi (trên luồng giao diện) mỗi khi nguồn dữ liệu được đếm lại
+
+    Style vẫn do utils.apply_treeview_style quyết định (widget bên dưới là ttk.Treeview).
+
+    refresh() giữ vị trí cuộn và dòng đang chọn: các trang đang hiển thị vẫn được vẽ
+    cho tới khi bản mới về, và chỉ những item có giá trị thay đổi mới được ghi lại.
+    """
+
+    PAGE_SIZE = 200
+    CACHE_PAGES = 64 # Tối đa ~12.800 dòng trong bộ nhớ
+    WHEEL_ROWS = 3 # Số dòng cuộn mỗi nấc chuột
+
+    def __init__(self, tree, scrollbar, values_of, key_of, executor=None, indicator=None,
+                 on_select=None, page_size=None, on_count=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.values_of = values_of
+        self.key_of = key_of
+        self.executor = executor
+        self.indicator = indicator
+        self.on_select = on_select
+        self.on_count = on_count
+        self.page_size = page_size or self.PAGE_SIZE
+
+        self.source = None
+        self.total = 0
+        self.offset = 0 # Chỉ số dòng đầu tiên đang hiển thị
+        self.selected_key = None
+        self._selected_row = None
+        self._items = [] # iid của các item đang dùng để hiển thị (từ trên xuống)
+        self._visible = 1
+        self._pages = OrderedDict() # số trang -> list dòng (LRU)
+        self._stale = {} # số trang -> dòng cũ, vẫn hiển thị trong lúc refresh() tải lại
+        self._painted = {} # iid -> (values, tags) đang hiển thị
+        self._inflight = {} # số trang -> DBTask đang tải
+        self._generation = 0 # Tăng mỗi khi đổi nguồn dữ liệu; kết quả cũ bị bỏ qua
+        self._key = f"vgrid-{id(self)}"
+
+        self._placeholder = ("Loading...",) + ("",) * (len(tree["columns"]) - 1)
+        rowheight = tree.tk.call("ttk::style", "lookup", "Treeview", "-rowheight")
+        self._rowheight = int(rowheight) if rowheight else 25
+
+        tree.configure(selectmode="browse", yscrollcommand="")
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.bind("<Configure>", self._on_resize)
+        tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            tree.bind(sequence, self._on_key)
+
+    # --- Nguồn dữ liệu ---
+
+    def set_source(self, source):
+        """Hiển thị nguồn dữ liệu mới từ đầu (xóa dòng đang chọn)."""
+        self.source = source
+        self.offset = 0
+        self._select(None, None)
+        self._reload()
+
+    def refresh(self):
+        """Tải lại nguồn hiện tại, giữ vị trí cuộn và dòng đang chọn."""
+        if self.source is not None:
+            self._reload(keep=True)
+
+    def patch(self, rows):
+        """
+        Thay dữ liệu của các dòng đã có trong bộ nhớ đệm (so khớp theo key_of) rồi vẽ lại;
+        dòng chưa được tải thì bỏ qua (sẽ được đọc mới khi cuộn tới).
+        Dùng khi chỉ vài dòng đổi giá trị mà không đổi số dòng / thứ tự (vd: theo sự kiện thay đổi).
+        """
+        fresh = {self.key_of(row): row for row in rows}
+        if not fresh:
+            return
+        for page in list(self._pages.values()) + list(self._stale.values()):
+            for row in page:
+                update = fresh.get(self.key_of(row))
+                if update is not None:
+                    row.update(update) # Sửa tại chỗ: mọi nơi giữ dòng này (vd: ListSource) đều thấy giá trị mới
+        self._paint(load=False)
+
+    def clear_selection(self):
+        """Bỏ chọn dòng hiện tại (vd: sau khi dòng đó bị xóa)."""
+        self._select(None, None)
+        self._paint(load=False)
+
+    def redraw(self):
+        """Vẽ lại các dòng đang hiển thị (vd: sau khi dữ liệu phụ như trạng thái chờ ghi thay đổi)."""
+        self._paint()
+
+    def _reload(self, keep=False):
+        self._generation += 1
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+        if keep:
+            # Chỉ giữ các trang đang hiển thị; chúng sẽ được tải lại ngay
+            first = self.offset // self.page_size
+            last = (self.offset + self._visible) // self.page_size
+            self._stale = {page_no: rows for page_no, rows in self._pages.items() if first <= page_no <= last}
+        else:
+            self._stale = {}
+        self._pages.clear()
+
+        generation, source = self._generation, self.source
+        if self.executor is None:
+            self._on_count(generation, source.count())
+        else:
+            self._paint(load=False) # Hiện "Loading..." (hoặc dòng cũ khi refresh) trong khi đếm
+            self.executor.submit(
+                source.count, key=f"{self._key}-count", indicator=self.indicator,
+                on_done=lambda total: self._on_count(generation, total)
+            )
+
+    def _on_count(self, generation, total):
+        if generation != self._generation:
+            return
+        self.total = total
+        self.offset = max(0, min(self.offset, total - self._visible))
+        self._paint()
+        if self.on_count:
+            self.on_count(total)
+
+    # --- Bộ nhớ đệm trang ---
+
+    def _row(self, index):
+        page_no = index // self.page_size
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._stale.get(page_no)
+            if page is None:
+                return None
+        else:
+            self._pages.move_to_end(page_no)
+        position = index % self.page_size
+        return page[position] if position < len(page) else None
+
+    def _store_page(self, page_no, rows):
+        self._stale.pop(page_no, None)
+        self._pages[page_no] = rows
+        self._pages.move_to_end(page_no)
+        while len(self._pages) > self.CACHE_PAGES:
+            self._pages.popitem(last=False)
+
+    def _load_pages(self, wanted):
+        # Bỏ các trang đang tải mà khung nhìn không còn cần (vd: khi kéo thanh cuộn nhanh)
+        for page_no in list(self._inflight):
+            if page_no not in wanted:
+                self._inflight.pop(page_no).cancel()
+
+        loaded = False
+        for page_no in sorted(wanted):
+            if page_no in self._pages or page_no in self._inflight:
+                continue
+            previous_page = self._pages.get(page_no - 1)
+            previous = previous_page[-1] if previous_page else None
+            offset = page_no * self.page_size
+            if self.executor is None or self.source.in_memory:
+                self._store_page(page_no, self.source.fetch(offset, self.page_size, previous))
+                loaded = True
+            else:
+                generation = self._generation
+                self._inflight[page_no] = self.executor.submit(
+                    self.source.fetch, offset, self.page_size, previous,
+                    indicator=self.indicator,
+                    on_done=lambda rows, p=page_no: self._on_page(generation, p, rows)
+                )
+        if loaded:
+            self._paint(load=False)
+
+    def _on_page(self, generation, page_no, rows):
+        if generation != self._generation:
+            return
+        self._inflight.pop(page_no, None)
+        self._store_page(page_no, rows)
+        self._paint()
+
+    # --- Vẽ ---
+
+    def _paint(self, load=True):
+        count = max(0, min(self._visible, self.total - self.offset))
+        while len(self._items) < count:
+            self._items.append(self.tree.insert("", "end", values=self._placeholder))
+            self._painted[self._items[-1]] = (self._placeholder, ())
+        while len(self._items) > count:
+            iid = self._items.pop()
+            self.tree.delete(iid)
+            del self._painted[iid]
+
+        wanted, selected_item = set(), None
+        for position, iid in enumerate(self._items):
+            index = self.offset + position
+            if index // self.page_size not in self._pages:
+                wanted.add(index // self.page_size)
+            row = self._row(index)
+            if row is None:
+                self._paint_item(iid, self._placeholder, ())
+                continue
+            values, tags = self.values_of(row)
+            self._paint_item(iid, tuple(values), tuple(tags))
+            if self.selected_key is not None and self.key_of(row) == self.selected_key:
+                selected_item = iid
+                self._selected_row = row
+
+        if selected_item is not None:
+            if self.tree.selection() != (selected_item,):
+                self.tree.selection_set(selected_item)
+                self.tree.focus(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0) # Treeview không tự cuộn: vị trí do self.offset quyết định
+        self._update_scrollbar()
+
+        if load and self.source is not None and self.total:
+            # Tải trước trang kế tiếp để cuộn xuống không phải chờ
+            next_index = min(self.total - 1, self.offset + 2 * self._visible)
+            wanted.add(next_index // self.page_size)
+            self._load_pages(wanted)
+
+    def _paint_item(self, iid, values, tags):
+        # Bỏ qua item không đổi: đỡ gọi Tk khi refresh() hoặc redraw() chỉ đổi vài dòng
+        if self._painted.get(iid) != (values, tags):
+            self.tree.item(iid, values=values, tags=tags)
+            self._painted[iid] = (values, tags)
+
+    def _update_scrollbar(self):
+        if self.total <= 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self._visible) / self.total))
+
+    # --- Cuộn ---
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, self.total - self._visible))
+        if offset != self.offset:
+            self.offset = offset
+            self._paint()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._visible if args[2] == "pages" else 1)
+            self.scroll_to(self.offset + step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1 # Windows: bội số 120, macOS: giá trị nhỏ
+        self.scroll_to(self.offset + steps * self.WHEEL_ROWS)
+        return "break"
+
+    def _on_resize(self, event):
+        header = self._rowheight
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                header = bbox[1] # Chiều cao phần tiêu đề cột
+        visible = max(1, (event.height - header) // self._rowheight)
+        if visible != self._visible:
+            self._visible = visible
+            self.offset = max(0, min(self.offset, self.total - visible))
+            self._paint()
+
+    # --- Chọn dòng ---
+
+    def _select(self, key, row):
+        changed = key != self.selected_key
+        self.selected_key, self._selected_row = key, row
+        if changed and self.on_select:
+            self.on_select(key)
+
+    def selected_row(self):
+        """Dòng đang được chọn (None nếu không có)."""
+        return self._selected_row
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._items:
+            return # Lựa chọn bị xóa khi dòng cuộn ra khỏi khung nhìn: vẫn giữ selected_key
+        row = self._row(self.offset + self._items.index(selection[0]))
+        if row is not None:
+            self._select(self.key_of(row), row)
+
+    def _on_key(self, event):
+        moves = {"Up": -1, "Down": 1, "Prior": -self._visible, "Next": self._visible,
+                 "Home": -self.total, "End": self.total}
+        if not self.total:
+            return "break"
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            current = self.offset + self._items.index(selection[0])
+        else:
+            current = self.offset - 1 if moves[event.keysym] > 0 else self.offset + self._visible
+        target = max(0, min(self.total - 1, current + moves[event.keysym]))
+
+        if target < self.offset:
+            self.scroll_to(target)
+        elif target >= self.offset + self._visible:
+            self.scroll_to(target - self._visible + 1)
+        position = target - self.offset
+        if 0 <= position < len(self._items):
+            self.tree.selection_set(self._items[position])
+            self.tree.focus(self._items[position])
+        return "break"